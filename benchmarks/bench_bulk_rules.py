@@ -0,0 +1,58 @@
+"""按列执行规则的性能测试：对比逐个文件调用规则方法与整列执行
+
+用法：
+    python benchmarks/bench_bulk_rules.py [--count 1000000]
+
+逐个文件：每个文件经过 RulePipeline.apply（方法分派、参数解包、单独拆分扩展名）；
+按列：RulePipeline.iter_names 每批文件对每条规则只调用一次。
+"""
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from file_manager import FileRecord
+from rename_rules import RenameRuleProcessor
+from rule_pipeline import RulePipeline
+
+
+RULES = [
+    ('批量替换', [('batch_replace', {'old_str': 'IMG', 'new_str': 'photo'})]),
+    ('插入字符', [('insert_text', {'text': '2024_', 'position': 'start', 'include_ext': False})]),
+    ('数字补零', [('pad_numbers', {'width': 6})]),
+    ('命名模板', [('apply_template', {'template': '<name:lower>_<####:1>.<ext>'})]),
+    ('正则替换', [('apply_regex', {'pattern': r'_take', 'repl': '-'})]),
+    ('规则链', [('batch_replace', {'old_str': 'IMG', 'new_str': 'photo'}),
+               ('pad_numbers', {'width': 6}),
+               ('insert_text', {'text': 'x', 'position': 'nth', 'n': 3, 'include_ext': False})]),
+]
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=1000000)
+    args = parser.parse_args()
+    
+    files = [FileRecord('/data', f'IMG_{i % 1000}_take{i}.jpg', False, 0.0) for i in range(args.count)]
+    processor = RenameRuleProcessor()
+    print(f'{args.count} 个文件')
+    for label, rules in RULES:
+        pipeline = RulePipeline(rules)
+        pipeline.prepare(processor)
+        per_file, expected = timed(lambda: [pipeline.apply(processor, file_info, index)
+                                            for index, file_info in enumerate(files)])
+        column, result = timed(lambda: list(pipeline.iter_names(processor, files)))
+        assert expected == result, '两种方式结果不一致'
+        print(f'{label}：逐个文件 {per_file:.2f}s，按列 {column:.2f}s（{per_file / column:.2f}x）')
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,64 @@
+"""目录缓存性能测试：对比无缓存、首次建立缓存、缓存命中、“重置并刷新”以及目录变化后增量读取的加载耗时
+
+用法：
+    python benchmarks/bench_directory_cache.py [--count 500000]
+
+缓存命中要求目录修改时间早于上次扫描 RACY_WINDOW 秒，测试中会把目录修改时间调早。
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from directory_cache import DirectoryCache
+from file_manager import FileManager
+
+
+def age_directory(path):
+    past = time.time() - 60
+    os.utime(path, (past, past))
+
+
+def timed_load(path, cache=None, refresh=False):
+    manager = FileManager()
+    start = time.perf_counter()
+    manager.load_directory(path, cache=cache, refresh_cache=refresh)
+    return time.perf_counter() - start, len(manager.files)
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=500000)
+    args = parser.parse_args()
+    
+    root = tempfile.mkdtemp(prefix='bench_cache_')
+    try:
+        path = os.path.join(root, 'files')
+        os.mkdir(path)
+        for i in range(args.count):
+            open(os.path.join(path, f'file_{i:07d}.dat'), 'w').close()
+        age_directory(path)
+        cache = DirectoryCache(os.path.join(root, 'cache.sqlite3'))
+        
+        print(f'{args.count} 个文件')
+        print(f'{"场景":<12} {"耗时(s)":>10} {"项数":>10}')
+        rows = [('无缓存', timed_load(path)),
+                ('首次建立缓存', timed_load(path, cache)),
+                ('缓存命中', timed_load(path, cache)),
+                ('重置并刷新', timed_load(path, cache, refresh=True))]
+        open(os.path.join(path, 'new_file.dat'), 'w').close()
+        age_directory(path)
+        rows.append(('新增一个文件', timed_load(path, cache)))
+        for label, (elapsed, count) in rows:
+            print(f'{label:<12} {elapsed:>10.3f} {count:>10}')
+        cache.close()
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,83 @@
+"""撤销历史内存与耗时测试：对比每步保存全部新名称的快照与只保存变化行的 EditHistory
+
+用法：
+    python benchmarks/bench_edit_history.py [--count 1000000] [--edits 300] [--rules 3]
+
+模拟在表格中逐个编辑 --edits 个名称，并对全部文件应用 --rules 次规则，
+用 tracemalloc 统计修改过程中新增的内存（两种方案最终保留在记录中的名称相同），再统计撤销全部步骤的耗时。
+"""
+import argparse
+import os
+import sys
+import time
+import tracemalloc
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from file_manager import FileManager, FileRecord
+
+
+class SnapshotHistory:
+    """旧方案：每一步之前保存全部新名称的列表"""
+    def __init__(self, file_manager):
+        self.file_manager = file_manager
+        self.snapshots = []
+    
+    def rename_rows(self, rows, new_names):
+        files = self.file_manager.files
+        self.snapshots.append([file_info.new_name for file_info in files])
+        for row, new_name in zip(rows, new_names):
+            files[row].new_name = new_name
+    
+    def undo(self):
+        for file_info, name in zip(self.file_manager.files, self.snapshots.pop()):
+            file_info.new_name = name
+
+
+def make_manager(count):
+    manager = FileManager()
+    manager.files = [FileRecord('/data', f'IMG_{i:07d}.jpg', False, 0.0) for i in range(count)]
+    return manager
+
+
+def run(label, manager, rename_rows, undo, steps, rounds):
+    count = len(manager.files)
+    tracemalloc.start()
+    start = time.perf_counter()
+    for index in range(steps):
+        row = index * 7919 % count
+        rename_rows([row], [f'edit_{index}.jpg'])
+    rows = range(count)
+    for index in range(rounds):
+        rename_rows(rows, [f'r{index}_{file_info.original_name}' for file_info in manager.files])
+    record_time = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    start = time.perf_counter()
+    for _ in range(steps + rounds):
+        undo()
+    undo_time = time.perf_counter() - start
+    assert all(file_info.new_name == file_info.original_name for file_info in manager.files)
+    print(f'{label:<12} {size / 1024 / 1024:>10.1f} {record_time:>10.3f} {undo_time:>10.3f}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=1000000)
+    parser.add_argument('--edits', type=int, default=300)
+    parser.add_argument('--rules', type=int, default=3)
+    args = parser.parse_args()
+    
+    print(f'{args.count} 个文件，{args.edits} 次编辑，{args.rules} 次规则')
+    print(f'{"方案":<12} {"内存(MB)":>10} {"修改(s)":>10} {"撤销(s)":>10}')
+    manager = make_manager(args.count)
+    snapshots = SnapshotHistory(manager)
+    run('全量快照', manager, snapshots.rename_rows, snapshots.undo, args.edits, args.rules)
+    del snapshots
+    manager = make_manager(args.count)
+    run('EditHistory', manager, manager.rename_rows, manager.undo_edit, args.edits, args.rules)
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,74 @@
+"""过滤性能测试：对比逐个检查全部记录与使用 FilterIndex 的过滤耗时
+
+用法：
+    python benchmarks/bench_filter.py [--count 1000000]
+
+索引在首次使用时建立，“索引首次”包含建立索引的时间，“索引再次”为修改条件后复用索引的耗时。
+"""
+import argparse
+import os
+import random
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from file_manager import FileManager, FileRecord
+from file_filter import FileFilter
+
+
+EXTENSIONS = ['.jpg', '.png', '.txt', '.mp4', '.dat', '']
+
+
+def make_records(count):
+    rng = random.Random(0)
+    return [FileRecord('/data', f'file_{i:07d}{EXTENSIONS[i % len(EXTENSIONS)]}', False,
+                       1.6e9 + rng.random() * 1e8) for i in range(count)]
+
+
+def scan(files, file_filter):
+    """不使用索引，逐个检查每条记录"""
+    extensions = file_filter.extensions
+    low, high = file_filter.mtime_min, file_filter.mtime_max
+    match = file_filter.name_match
+    return [row for row, file_info in enumerate(files)
+            if (not extensions or file_info.type.lower() in extensions)
+            and (low is None or file_info.mtime >= low) and (high is None or file_info.mtime <= high)
+            and (match is None or match(file_info.original_name))]
+
+
+def timed(func):
+    start = time.perf_counter()
+    result = func()
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=1000000)
+    args = parser.parse_args()
+    
+    manager = FileManager()
+    manager.files = make_records(args.count)
+    cases = [
+        ('扩展名 jpg', FileFilter(extensions=['jpg'])),
+        ('一天内修改', FileFilter(mtime_min=1.6e9, mtime_max=1.6e9 + 86400)),
+        ('包含 _00012', FileFilter('_00012')),
+        ('扩展名+包含', FileFilter('_0001', extensions=['png'])),
+        ('正则', FileFilter(r'_\d{5}42\.', 'regex')),
+    ]
+    print(f'{args.count} 个文件')
+    print(f'{"条件":<12} {"逐个检查(s)":>12} {"索引首次(s)":>12} {"索引再次(s)":>12} {"结果数":>8}')
+    for label, file_filter in cases:
+        scan_time, expected = timed(lambda: scan(manager.files, file_filter))
+        # 排序会使索引失效，确保首次测量包含建立索引的时间
+        manager.sort_files('name', use_natural_sort=False)
+        manager.file_filter = None
+        cold, _ = timed(lambda: manager.set_filter(file_filter))
+        warm, _ = timed(lambda: manager.set_filter(file_filter))
+        assert manager.filtered_rows == scan(manager.files, file_filter)
+        print(f'{label:<12} {scan_time:>12.3f} {cold:>12.3f} {warm:>12.3f} {len(expected):>8}')
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,179 @@
+"""目录加载性能测试：对比旧的 listdir + isfile + stat 实现与新的 os.scandir 实现
+
+用法：
+    python benchmarks/bench_load_directory.py [--sizes 10000 100000 1000000] [--folder-mode]
+
+会在临时目录中生成指定数量的空文件，分别统计两种实现的耗时和系统调用次数。
+若系统中存在 strace，则使用 strace -c 统计真实系统调用；否则在进程内统计 Python 层的调用次数。
+"""
+import argparse
+import os
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from file_manager import FileManager
+
+
+def legacy_load(directory_path, is_folder_mode=False):
+    """旧实现：listdir 后对每一项调用 isdir/isfile，再调用 stat 和 isdir"""
+    files = []
+    for item in os.listdir(directory_path):
+        full_path = os.path.join(directory_path, item)
+        if is_folder_mode and os.path.isdir(full_path) or \
+           not is_folder_mode and os.path.isfile(full_path):
+            stat = os.stat(full_path)
+            name = os.path.basename(full_path)
+            files.append({
+                'name': name,
+                'type': '文件夹' if os.path.isdir(full_path) else os.path.splitext(name)[1] or '文件',
+                'modified_time': datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S'),
+                'original_name': name,
+                'new_name': name,
+                'path': full_path,
+                'is_modified': False,
+                'name_length': len(name)
+            })
+    return files
+
+
+def scandir_load(directory_path, is_folder_mode=False):
+    manager = FileManager()
+    manager.load_directory(directory_path, is_folder_mode)
+    return manager.files
+
+
+LOADERS = {'legacy': legacy_load, 'scandir': scandir_load}
+
+
+def make_directory(root, count, folder_mode):
+    """生成包含 count 个条目的测试目录"""
+    path = os.path.join(root, f'{"dirs" if folder_mode else "files"}_{count}')
+    os.mkdir(path)
+    for i in range(count):
+        item = os.path.join(path, f'item_{i}.txt')
+        if folder_mode:
+            os.mkdir(item)
+        else:
+            open(item, 'wb').close()
+    return path
+
+
+class _CountingEntry:
+    """包装 DirEntry，统计首次 stat（DirEntry 之后会使用缓存结果）"""
+    
+    def __init__(self, entry, counter):
+        self._entry = entry
+        self._counter = counter
+        self._stated = False
+        self.name = entry.name
+        self.path = entry.path
+    
+    def is_dir(self):
+        return self._entry.is_dir()
+    
+    def is_file(self):
+        return self._entry.is_file()
+    
+    def stat(self):
+        if not self._stated:
+            self._stated = True
+            self._counter['stat'] += 1
+        return self._entry.stat()
+
+
+class _CountingScandir:
+    def __init__(self, iterator, counter):
+        self._iterator = iterator
+        self._counter = counter
+    
+    def __enter__(self):
+        return self
+    
+    def __exit__(self, *exc):
+        self._iterator.close()
+    
+    def __iter__(self):
+        for entry in self._iterator:
+            yield _CountingEntry(entry, self._counter)
+
+
+def count_calls_in_process(loader, path, folder_mode):
+    """在进程内统计 Python 层的文件系统调用次数（无 strace 时的近似值）"""
+    counter = {'stat': 0, 'listdir': 0, 'scandir': 0}
+    originals = (os.stat, os.listdir, os.scandir)
+    real_stat, real_listdir, real_scandir = originals
+    
+    def stat(*args, **kwargs):
+        counter['stat'] += 1
+        return real_stat(*args, **kwargs)
+    
+    def listdir(*args, **kwargs):
+        counter['listdir'] += 1
+        return real_listdir(*args, **kwargs)
+    
+    def scandir(*args, **kwargs):
+        counter['scandir'] += 1
+        return _CountingScandir(real_scandir(*args, **kwargs), counter)
+    
+    # os.path.isdir/isfile 内部调用 os.stat，因此会被一并统计
+    os.stat, os.listdir, os.scandir = stat, listdir, scandir
+    try:
+        loader(path, folder_mode)
+    finally:
+        os.stat, os.listdir, os.scandir = originals
+    return sum(counter.values())
+
+
+def count_calls_with_strace(loader_name, path, folder_mode):
+    """使用 strace -c 统计真实的系统调用次数"""
+    code = (
+        'import sys; sys.path.insert(0, {root!r}); '
+        'from benchmarks.bench_load_directory import LOADERS; '
+        'LOADERS[{name!r}]({path!r}, {folder})'
+    ).format(root=os.path.dirname(os.path.dirname(os.path.abspath(__file__))),
+             name=loader_name, path=path, folder=folder_mode)
+    result = subprocess.run(
+        ['strace', '-f', '-c', '-e', 'trace=%stat,getdents64', sys.executable, '-c', code],
+        capture_output=True, text=True)
+    for line in result.stderr.splitlines():
+        if line.strip().endswith('total'):
+            return int(line.split()[2])
+    return -1
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', type=int, nargs='+', default=[10000, 100000, 1000000])
+    parser.add_argument('--folder-mode', action='store_true')
+    args = parser.parse_args()
+    
+    use_strace = shutil.which('strace') is not None
+    print(f'系统调用统计方式：{"strace" if use_strace else "进程内计数"}')
+    print(f'{"条目数":>10} {"实现":>8} {"耗时(s)":>10} {"调用次数":>12}')
+    
+    root = tempfile.mkdtemp(prefix='bench_load_')
+    try:
+        for size in args.sizes:
+            path = make_directory(root, size, args.folder_mode)
+            for name, loader in LOADERS.items():
+                start = time.perf_counter()
+                loader(path, args.folder_mode)
+                elapsed = time.perf_counter() - start
+                if use_strace:
+                    calls = count_calls_with_strace(name, path, args.folder_mode)
+                else:
+                    calls = count_calls_in_process(loader, path, args.folder_mode)
+                print(f'{size:>10} {name:>8} {elapsed:>10.3f} {calls:>12}')
+            shutil.rmtree(path)
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
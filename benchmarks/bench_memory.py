@@ -0,0 +1,81 @@
+"""文件记录内存占用测试：对比旧的字典记录与 FileRecord 紧凑记录
+
+用法：
+    python benchmarks/bench_memory.py [--count 1000000]
+
+不访问磁盘，直接按加载目录时的方式构造记录，使用 tracemalloc 统计内存占用，并统计一次完整 GC 的耗时。
+"""
+import argparse
+import gc
+import os
+import sys
+import time
+import tracemalloc
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from file_manager import FileRecord
+
+DIRECTORY = '/mnt/nas/share/photos/2024'
+EXTENSIONS = ['.jpg', '.png', '.txt', '.mp4', '']
+MTIME = datetime(2024, 1, 1).timestamp()
+
+
+def make_names(count):
+    return [f'IMG_{i:07d}{EXTENSIONS[i % len(EXTENSIONS)]}' for i in range(count)]
+
+
+def build_dicts(names):
+    files = []
+    for name in names:
+        full_path = os.path.join(DIRECTORY, name)
+        files.append({
+            'name': name,
+            'type': os.path.splitext(name)[1] or '文件',
+            'modified_time': datetime.fromtimestamp(MTIME).strftime('%Y-%m-%d %H:%M:%S'),
+            'original_name': name,
+            'new_name': name,
+            'path': full_path,
+            'is_modified': False,
+            'name_length': len(name)
+        })
+    return files
+
+
+def build_records(names):
+    return [FileRecord(DIRECTORY, name, False, MTIME) for name in names]
+
+
+def measure(builder, names):
+    gc.collect()
+    tracemalloc.start()
+    start = time.perf_counter()
+    files = builder(names)
+    build_time = time.perf_counter() - start
+    size, _ = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+    
+    start = time.perf_counter()
+    gc.collect()
+    gc_time = time.perf_counter() - start
+    del files
+    return size, build_time, gc_time
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=1000000)
+    args = parser.parse_args()
+    
+    # 文件名列表两种方式共用，不计入统计
+    names = make_names(args.count)
+    print(f'{"记录类型":>12} {"内存(MB)":>10} {"字节/条":>8} {"构造(s)":>8} {"GC(s)":>8}')
+    for label, builder in (('dict', build_dicts), ('FileRecord', build_records)):
+        size, build_time, gc_time = measure(builder, names)
+        print(f'{label:>12} {size / 1024 / 1024:>10.1f} {size / args.count:>8.0f} '
+              f'{build_time:>8.2f} {gc_time:>8.3f}')
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
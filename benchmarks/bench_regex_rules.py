@@ -0,0 +1,92 @@
+"""正则规则性能测试：对比旧的逐文件 re.sub（每次查找 re 模块的缓存、每次创建替换函数）与预先编译的实现
+
+用法：
+    python benchmarks/bench_regex_rules.py [--count 1000000] [--pattern "(\\d+)"] [--repl "[\\1]"]
+
+分别测试正则替换、数字补零以及两者组成的规则链。两种实现都逐个文件调用规则方法（RulePipeline.apply）；
+按列执行的 *_column 方法两者相同，不在此比较，见 bench_bulk_rules.py。
+每种实现运行 --repeat 次，取最短时间。
+"""
+import argparse
+import os
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from file_manager import FileRecord
+from rename_rules import RenameRuleProcessor
+from rule_pipeline import RulePipeline
+
+
+class LegacyRuleProcessor(RenameRuleProcessor):
+    """旧实现：每个文件把表达式字符串交给 re.sub（依赖 re 模块内部缓存），补零时每个文件创建替换函数"""
+    def apply_regex(self, file_info, pattern, repl, include_ext=True, current_name=None):
+        source = file_info['original_name'] if current_name is None else current_name
+        try:
+            if include_ext:
+                return re.sub(pattern, repl, source)
+            else:
+                name, ext = os.path.splitext(source)
+                return re.sub(pattern, repl, name) + ext
+        except re.error:
+            return source
+    
+    def pad_numbers(self, file_info, width, include_ext=True, current_name=None):
+        source = file_info['original_name'] if current_name is None else current_name
+        name, ext = os.path.splitext(source)
+        
+        def pad_match(match):
+            return str(int(match.group())).zfill(width)
+        
+        result = re.sub(r'\d+', pad_match, name)
+        return result + ext
+
+
+def timed(func, repeat):
+    best = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func()
+        elapsed = time.perf_counter() - start
+        best = elapsed if best is None else min(best, elapsed)
+    return best, result
+
+
+def apply_per_file(pipeline, processor, files):
+    pipeline.prepare(processor)
+    return [pipeline.apply(processor, file_info, index) for index, file_info in enumerate(files)]
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=1000000)
+    parser.add_argument('--pattern', default=r'(\d+)')
+    parser.add_argument('--repl', default=r'[\1]')
+    parser.add_argument('--repeat', type=int, default=3)
+    args = parser.parse_args()
+    
+    files = [FileRecord('/data', f'IMG_{i % 1000}_take{i}.jpg', False, 0.0) for i in range(args.count)]
+    regex_rule = ('apply_regex', {'pattern': args.pattern, 'repl': args.repl})
+    literal_rule = ('apply_regex', {'pattern': 'IMG', 'repl': 'photo'})
+    pad_rule = ('pad_numbers', {'width': 6})
+    cases = [
+        ('正则替换（分组引用）', [regex_rule]),
+        ('正则替换（普通文本）', [literal_rule]),
+        ('数字补零', [pad_rule]),
+        ('规则链', [regex_rule, pad_rule]),
+    ]
+    
+    print(f'{args.count} 个文件，表达式 {args.pattern!r} -> {args.repl!r}')
+    for label, rules in cases:
+        # 两种实现都通过规则链调用，只有规则方法不同
+        pipeline = RulePipeline(rules)
+        legacy_time, expected = timed(lambda: apply_per_file(pipeline, LegacyRuleProcessor(), files), args.repeat)
+        compiled_time, result = timed(lambda: apply_per_file(pipeline, RenameRuleProcessor(), files), args.repeat)
+        assert expected == result, '新旧实现结果不一致'
+        print(f'{label}：旧实现 {legacy_time:.2f}s，预先编译 {compiled_time:.2f}s'
+              f'（{legacy_time / compiled_time:.2f}x）')
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,86 @@
+"""并发重命名性能测试：用带延迟的 os.rename 模拟 SMB/NFS 等高延迟文件系统
+
+用法：
+    python benchmarks/bench_rename_executor.py [--count 5000] [--delay-ms 2] [--workers 1 4 8 16]
+
+每种线程数都会在新的临时目录中生成文件，重命名计划中包含一部分交换（a<->b）以验证依赖顺序。
+"""
+import argparse
+import os
+import shutil
+import sys
+import tempfile
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from file_manager import FileManager
+from rename_executor import execute_plan
+from rename_planner import plan_renames
+
+
+class DelayedRename:
+    """每次调用前等待固定时间，模拟一次网络往返"""
+    
+    def __init__(self, delay):
+        self.delay = delay
+        self.calls = 0
+    
+    def __call__(self, src, dst):
+        time.sleep(self.delay)
+        self.calls += 1
+        os.rename(src, dst)
+
+
+def prepare(root, count):
+    path = tempfile.mkdtemp(dir=root)
+    for i in range(count):
+        with open(os.path.join(path, f'file_{i:06d}.txt'), 'w') as f:
+            f.write(str(i))
+    manager = FileManager()
+    manager.load_directory(path)
+    manager.sort_files()
+    for i, file_info in enumerate(manager.files):
+        if i % 10 < 2:
+            # 相邻两个文件互换名称
+            partner = manager.files[i + 1 if i % 2 == 0 else i - 1]
+            manager.rename_file(i, partner['original_name'])
+        else:
+            manager.rename_file(i, f'renamed_{i:06d}.txt')
+    return path, manager
+
+
+def verify(path, count):
+    for name in os.listdir(path):
+        if name.startswith('.rename_tmp_'):
+            return False
+    return len(os.listdir(path)) == count
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=5000)
+    parser.add_argument('--delay-ms', type=float, default=2.0)
+    parser.add_argument('--workers', type=int, nargs='+', default=[1, 4, 8, 16])
+    args = parser.parse_args()
+    
+    root = tempfile.mkdtemp(prefix='bench_rename_')
+    try:
+        print(f'{args.count} 个文件，每次重命名延迟 {args.delay_ms}ms')
+        print(f'{"线程数":>6} {"耗时(s)":>10} {"rename 调用":>12} {"成功":>8} {"错误":>6} {"校验":>6}')
+        for workers in args.workers:
+            path, manager = prepare(root, args.count)
+            rename = DelayedRename(args.delay_ms / 1000)
+            start = time.perf_counter()
+            plan = plan_renames(manager.files)
+            success_count, errors = execute_plan(plan, max_workers=workers, rename=rename)
+            elapsed = time.perf_counter() - start
+            ok = verify(path, args.count)
+            print(f'{workers:>6} {elapsed:>10.2f} {rename.calls:>12} {success_count:>8} '
+                  f'{len(errors):>6} {"通过" if ok else "失败":>6}')
+    finally:
+        shutil.rmtree(root, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,58 @@
+"""自然排序性能测试：对比旧的列表排序键与缓存的元组排序键
+
+用法：
+    python benchmarks/bench_sort.py [--count 1000000]
+
+分别统计：旧实现每次排序都重新计算排序键；新实现首次排序（计算并缓存键）；新实现再次排序（使用缓存）。
+"""
+import argparse
+import os
+import random
+import re
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from file_manager import FileManager, FileRecord
+
+
+def legacy_natural_sort_key(s):
+    """旧实现"""
+    convert = lambda text: int(text) if text.isdigit() else text.lower()
+    return [convert(c) for c in re.split('([0-9]+)', s)]
+
+
+def make_records(count):
+    names = [f'Episode {i % 97} - part{i}_v{i % 7}.mkv' for i in range(count)]
+    random.Random(0).shuffle(names)
+    return [FileRecord('/data', name, False, 0.0) for name in names]
+
+
+def timed(func):
+    start = time.perf_counter()
+    func()
+    return time.perf_counter() - start
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=1000000)
+    args = parser.parse_args()
+    
+    manager = FileManager()
+    manager.files = make_records(args.count)
+    legacy = timed(lambda: manager.files.sort(key=lambda x: legacy_natural_sort_key(x['name'])))
+    
+    manager.files = make_records(args.count)
+    cold = timed(lambda: manager.sort_files('name'))
+    warm = timed(lambda: manager.sort_files('name', reverse=True))
+    
+    print(f'{args.count} 个文件名')
+    print(f'旧实现（每次重新计算）：{legacy:.2f}s')
+    print(f'新实现（首次，计算并缓存）：{cold:.2f}s')
+    print(f'新实现（再次排序，使用缓存）：{warm:.2f}s')
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,51 @@
+"""启动耗时测试：用 python -X importtime 统计导入各模块的耗时
+
+用法：
+    python benchmarks/bench_startup.py [--modules main cli] [--repeat 5] [--top 15]
+
+每个入口模块在新的解释器中导入 repeat 次，取总耗时最短的一次，列出累计耗时最多的模块。
+未安装 PyQt6 时 main 会导入失败，只统计失败前已导入的模块。
+"""
+import argparse
+import os
+import subprocess
+import sys
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def measure(module):
+    """返回 ([(模块名, 自身耗时us, 累计耗时us)], 是否导入成功)"""
+    result = subprocess.run([sys.executable, '-X', 'importtime', '-c', f'import {module}'],
+                            cwd=ROOT, capture_output=True, text=True)
+    timings = []
+    for line in result.stderr.splitlines():
+        if not line.startswith('import time:') or 'self [us]' in line:
+            continue
+        self_us, cumulative_us, name = line[len('import time:'):].split('|')
+        timings.append((name.strip(), int(self_us), int(cumulative_us)))
+    return timings, result.returncode == 0
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--modules', nargs='+', default=['main', 'cli'])
+    parser.add_argument('--repeat', type=int, default=5)
+    parser.add_argument('--top', type=int, default=15)
+    args = parser.parse_args()
+    
+    for module in args.modules:
+        runs = [measure(module) for _ in range(args.repeat)]
+        timings, ok = min(runs, key=lambda run: sum(self_us for _, self_us, _ in run[0]))
+        total = sum(self_us for _, self_us, _ in timings)
+        status = '' if ok else '（导入失败，仅统计已导入部分）'
+        print(f'{module}: 共导入 {len(timings)} 个模块，总耗时 {total / 1000:.1f}ms{status}')
+        print(f'{"累计(ms)":>10} {"自身(ms)":>10}  模块')
+        for name, self_us, cumulative_us in sorted(timings, key=lambda t: t[2], reverse=True)[:args.top]:
+            print(f'{cumulative_us / 1000:>10.1f} {self_us / 1000:>10.1f}  {name}')
+        print()
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,85 @@
+"""命名模板性能测试：对比旧的逐文件解析替换与编译后的模板执行计划
+
+用法：
+    python benchmarks/bench_template.py [--count 1000000] [--template "<name:upper>_<###:1>.<ext>"]
+
+不访问磁盘，模板中请勿使用 <date.modify>/<time.modify>。
+"""
+import argparse
+import os
+import re
+import sys
+import time
+import uuid
+from datetime import datetime
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from file_manager import FileRecord
+from rename_rules import RenameRuleProcessor
+
+
+def legacy_apply_template(template_variables, file_info, template, index=0, include_ext=True):
+    """旧实现：每个文件重新解析模板并多轮 str.replace"""
+    name, ext = os.path.splitext(file_info['original_name'])
+    result = template
+    number_pattern = r'<#+(?::([0-9]+))?>'
+    for match in re.finditer(number_pattern, template):
+        hash_part = match.group().split(':')[0]
+        width = hash_part.count('#')
+        start = int(match.group(1)) if match.group(1) else 1
+        number = str(index + start).zfill(width)
+        result = result.replace(match.group(), number)
+    uuid_pattern = r'<uuid(?::(\d+))?(?::(upper|lower))?>'
+    for match in re.finditer(uuid_pattern, result):
+        length = int(match.group(1)) if match.group(1) else 32
+        style = match.group(2)
+        uuid_str = str(uuid.uuid4()).replace('-', '')[:length]
+        if style == 'upper':
+            uuid_str = uuid_str.upper()
+        elif style == 'lower':
+            uuid_str = uuid_str.lower()
+        result = result.replace(match.group(), uuid_str)
+    for var_name in template_variables:
+        simple_tag = f'<{var_name}>'
+        if simple_tag in result:
+            result = result.replace(simple_tag, template_variables[var_name](file_info))
+    for var_name in ['name', 'ext']:
+        base_value = template_variables[var_name](file_info)
+        result = result.replace(f'<{var_name}:upper>', base_value.upper())
+        result = result.replace(f'<{var_name}:lower>', base_value.lower())
+        result = result.replace(f'<{var_name}>', base_value)
+    if not include_ext:
+        return result + ext
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--count', type=int, default=1000000)
+    parser.add_argument('--template', default='<name:upper>_<###:1>.<ext>')
+    args = parser.parse_args()
+    
+    files = [FileRecord('/data', f'photo_{i}.jpg', False, datetime.now().timestamp())
+             for i in range(args.count)]
+    processor = RenameRuleProcessor()
+    
+    start = time.perf_counter()
+    legacy = [legacy_apply_template(processor.template_variables, file_info, args.template, i)
+              for i, file_info in enumerate(files)]
+    legacy_time = time.perf_counter() - start
+    
+    start = time.perf_counter()
+    compiled = [processor.apply_template(file_info, args.template, i)
+                for i, file_info in enumerate(files)]
+    compiled_time = time.perf_counter() - start
+    
+    if '<uuid' not in args.template:
+        assert legacy == compiled, '新旧实现结果不一致'
+    print(f'{args.count} 个文件，模板 {args.template}')
+    print(f'旧实现：{legacy_time:.2f}s')
+    print(f'编译模板：{compiled_time:.2f}s（{legacy_time / compiled_time:.1f}x）')
+
+
+if __name__ == '__main__':
+    main()
\ No newline at end of file
@@ -0,0 +1,230 @@
+"""命令行批量重命名，不依赖 PyQt6，可在无图形界面的服务器、计划任务和脚本中使用
+
+用法示例：
+    python cli.py D:/photos --replace IMG_ photo_ --pad 4 --dry-run
+    python cli.py D:/photos --pipeline rules.json --json
+    python cli.py --undo
+
+命令行中的规则按出现顺序组成规则链，--pipeline 载入的规则排在最前面。
+--dry-run 只输出重命名计划；--json 按行输出 JSON（每行一个对象），便于其他程序逐行读取。
+"""
+import argparse
+import json
+import os
+import re
+import sys
+
+from file_manager import FileManager
+from name_validation import validate_names
+from rename_executor import execute_plan
+from rename_journal import JOURNAL_FILE, RenameJournal, resume_batch, undo_batch
+from rename_planner import plan_renames
+from rename_rules import RenameRuleProcessor
+from rule_pipeline import RulePipeline
+
+INSERT_POSITIONS = ['start', 'end', 'nth', 'nth_last', 'before', 'after']
+
+class RuleAction(argparse.Action):
+    """把规则按命令行中出现的顺序追加到 namespace.rules"""
+    def __call__(self, parser, namespace, values, option_string=None):
+        rules = getattr(namespace, 'rules', None) or []
+        if self.dest == 'batch_replace':
+            params = {'old_str': values[0], 'new_str': values[1]}
+        elif self.dest == 'insert_text':
+            params = {'text': values}
+        elif self.dest == 'pad_numbers':
+            params = {'width': values}
+        elif self.dest == 'apply_template':
+            params = {'template': values}
+        else:
+            try:
+                # 同时检查替换字符串中的分组引用
+                re.compile(values[0]).sub(values[1], '')
+            except re.error as e:
+                parser.error(f'无效的正则表达式 {values[0]!r}：{e}')
+            params = {'pattern': values[0], 'repl': values[1]}
+        rules.append((self.dest, params))
+        namespace.rules = rules
+
+def build_parser():
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0],
+                                     formatter_class=argparse.RawDescriptionHelpFormatter,
+                                     epilog='\n'.join(__doc__.splitlines()[2:]))
+    parser.add_argument('directory', nargs='?', help='要处理的目录')
+    parser.add_argument('--folders', action='store_true', help='重命名文件夹而不是文件')
+    parser.add_argument('-r', '--recursive', action='store_true', help='包含子目录')
+    parser.add_argument('--max-depth', type=int, help='包含子目录时向下的最大层数（默认不限）')
+    parser.add_argument('--include', action='append', metavar='GLOB',
+                        help='只处理匹配的名称或相对路径，可重复')
+    parser.add_argument('--exclude', action='append', metavar='GLOB',
+                        help='跳过匹配的文件和子目录，可重复')
+    
+    rules = parser.add_argument_group('规则（可重复，按出现顺序执行）')
+    rules.add_argument('--replace', dest='batch_replace', nargs=2, metavar=('OLD', 'NEW'),
+                       action=RuleAction, help='批量替换')
+    rules.add_argument('--insert', dest='insert_text', metavar='TEXT', action=RuleAction,
+                       help='插入字符，位置由 --position 等选项指定')
+    rules.add_argument('--pad', dest='pad_numbers', type=int, metavar='WIDTH', action=RuleAction,
+                       help='序号补齐到指定位数')
+    rules.add_argument('--template', dest='apply_template', metavar='TEMPLATE', action=RuleAction,
+                       help="按模板重新命名，如 'photo_<###:1>'")
+    rules.add_argument('--regex', dest='apply_regex', nargs=2, metavar=('PATTERN', 'REPL'),
+                       action=RuleAction, help='正则替换')
+    rules.add_argument('--pipeline', metavar='FILE', help='载入保存的规则链（JSON）')
+    rules.add_argument('--position', choices=INSERT_POSITIONS, default='start',
+                       help='--insert 的插入位置（默认 start）')
+    rules.add_argument('--n', type=int, default=0, help='position 为 nth/nth_last 时的字符位置')
+    rules.add_argument('--target', default='', help='position 为 before/after 时的目标字符串')
+    rules.add_argument('--include-ext', action='store_true', help='规则同时作用于扩展名')
+    
+    order = parser.add_argument_group('排序（影响模板中的序号）')
+    order.add_argument('--sort', choices=['name', 'type', 'modified_time'], default='name')
+    order.add_argument('--reverse', action='store_true', help='倒序')
+    order.add_argument('--no-natural', action='store_true', help='文件名按字符顺序而不是自然顺序排序')
+    
+    run = parser.add_argument_group('执行')
+    run.add_argument('--dry-run', action='store_true', help='只输出重命名计划，不修改磁盘')
+    run.add_argument('--json', action='store_true', help='按行输出 JSON')
+    run.add_argument('--threads', type=int, default=8, help='并发重命名的线程数（默认 8）')
+    run.add_argument('--journal', default=JOURNAL_FILE, help=f'重命名日志文件（默认 {JOURNAL_FILE}）')
+    run.add_argument('--no-journal', action='store_true', help='不写入重命名日志（无法撤销）')
+    run.add_argument('--undo', action='store_true', help='撤销日志中最近一次重命名')
+    run.add_argument('--resume', action='store_true', help='继续执行日志中未完成的重命名')
+    return parser
+
+def build_pipeline(args):
+    pipeline = RulePipeline.load(args.pipeline) if args.pipeline else RulePipeline()
+    for method, params in getattr(args, 'rules', None) or []:
+        if method == 'insert_text':
+            n = args.n if args.position in ['nth', 'nth_last'] else 0
+            target = args.target if args.position in ['before', 'after'] else ''
+            params.update(position=args.position, n=n, target=target)
+        if method != 'pad_numbers':
+            params['include_ext'] = args.include_ext
+        pipeline.add_rule((method, params))
+    return pipeline
+
+class Output:
+    """逐行输出结果；大目录下不在内存中拼接完整输出
+    
+    文本输出中的路径相对于 root（处理的目录），包含子目录时不同目录中的同名文件也能区分；JSON 输出完整路径。
+    """
+    def __init__(self, use_json, root=None, stream=sys.stdout):
+        self.use_json = use_json
+        self.root = root
+        self.stream = stream
+    
+    def step(self, group, src, dst):
+        if self.use_json:
+            self._json({'group': group, 'src': src, 'dst': dst})
+        else:
+            self.stream.write(f'{self._display_path(src)} -> {self._display_path(dst)}\n')
+    
+    def error(self, message):
+        if self.use_json:
+            self._json({'error': message})
+        else:
+            sys.stderr.write(f'错误：{message}\n')
+    
+    def summary(self, **values):
+        if self.use_json:
+            self._json({'summary': values})
+        else:
+            sys.stderr.write('，'.join(f'{key}: {value}' for key, value in values.items()) + '\n')
+    
+    def _display_path(self, path):
+        return os.path.basename(path) if self.root is None else os.path.relpath(path, self.root)
+    
+    def _json(self, record):
+        self.stream.write(json.dumps(record, ensure_ascii=False) + '\n')
+
+def print_progress(finished, total):
+    if sys.stderr.isatty():
+        sys.stderr.write(f'\r正在重命名 {finished}/{total}')
+        if finished == total:
+            sys.stderr.write('\n')
+        sys.stderr.flush()
+
+def run_journal_command(args, output):
+    journal = RenameJournal(args.journal)
+    try:
+        if args.undo:
+            batch = journal.last_undoable_batch()
+            if batch is None:
+                output.error('没有可撤销的重命名')
+                return 1
+            success_count, errors = undo_batch(batch, journal, progress=print_progress)
+        else:
+            success_count, errors = 0, []
+            for batch in journal.incomplete_batches():
+                done, batch_errors = resume_batch(batch, journal, progress=print_progress)
+                success_count += done
+                errors.extend(batch_errors)
+    finally:
+        journal.close()
+    for message in errors:
+        output.error(message)
+    output.summary(renamed=success_count, errors=len(errors))
+    return 1 if errors else 0
+
+def main(argv=None):
+    parser = build_parser()
+    args = parser.parse_args(argv)
+    output = Output(args.json, os.path.abspath(args.directory) if args.directory else None)
+    
+    if args.undo or args.resume:
+        return run_journal_command(args, output)
+    if not args.directory:
+        parser.error('请指定要处理的目录')
+    processor = RenameRuleProcessor()
+    try:
+        pipeline = build_pipeline(args)
+        # 加载目录之前编译并检查全部规则，规则链文件中的无效正则表达式或模板在此报错
+        pipeline.prepare(processor)
+    except re.error as e:
+        parser.error(f'规则链中的正则表达式无效：{e}')
+    except (OSError, ValueError, KeyError) as e:
+        parser.error(f'无法载入规则链：{e}')
+    if not len(pipeline):
+        parser.error('请至少指定一条规则')
+    
+    file_manager = FileManager()
+    if not file_manager.load_directory(os.path.abspath(args.directory), args.folders,
+                                       recursive=args.recursive, max_depth=args.max_depth,
+                                       include=args.include, exclude=args.exclude):
+        return 1
+    file_manager.sort_files(key=args.sort, reverse=args.reverse, use_natural_sort=not args.no_natural)
+    files = file_manager.files
+    
+    for file_info, new_name in zip(files, pipeline.iter_names(processor, files)):
+        file_info['new_name'] = new_name
+    # 新名称无效的文件保持原名，不进入重命名计划
+    problems = validate_names(files)
+    for message in problems.values():
+        output.error(message)
+    plan = plan_renames([file_info for file_info in files if file_info not in problems] if problems else files)
+    
+    for message in plan.errors:
+        output.error(message)
+    if args.dry_run:
+        for index, group in enumerate(plan.groups):
+            for src, dst, _ in group:
+                output.step(index, src, dst)
+        output.summary(planned=plan.file_count, errors=len(problems) + len(plan.errors))
+        return 1 if problems or plan.errors else 0
+    
+    journal = None if args.no_journal else RenameJournal(args.journal)
+    try:
+        success_count, errors = execute_plan(plan, max_workers=args.threads,
+                                             progress=print_progress, journal=journal)
+    finally:
+        if journal is not None:
+            journal.close()
+    # problems 和 plan.errors 已在上面输出
+    for message in errors[len(plan.errors):]:
+        output.error(message)
+    output.summary(renamed=success_count, errors=len(problems) + len(errors))
+    return 1 if problems or errors else 0
+
+if __name__ == '__main__':
+    sys.exit(main())
\ No newline at end of file
@@ -1,15 +1,24 @@
 import os
 import configparser
-from PyQt6.QtGui import QColor
+from rename_journal import JOURNAL_FILE
+from directory_cache import CACHE_FILE
 
 class ConfigManager:
+    """读写 settings.ini，不依赖 Qt；颜色以 '#RRGGBB' 字符串保存和返回"""
     def __init__(self):
         self.config_file = 'settings.ini'
+        # 重命名日志与配置文件放在同一目录
+        self.journal_file = os.path.join(os.path.dirname(self.config_file), JOURNAL_FILE)
+        self.cache_file = os.path.join(os.path.dirname(self.config_file), CACHE_FILE)
         self.config = configparser.ConfigParser()
         self.default_settings = {
             'redundancy': '25',
             'sort_method': '自然排序',
-            'modified_color': '#FFFFC8'
+            'modified_color': '#FFFFC8',
+            'parallel_preview': 'False',
+            'rename_threads': '8',
+            'directory_cache': 'True',
+            'watch_directory': 'True'
         }
     
     def load_settings(self):
@@ -22,7 +31,11 @@ class ConfigManager:
             settings = {
                 'redundancy': self.config.getint('Settings', 'redundancy'),
                 'sort_method': self.config.get('Settings', 'sort_method'),
-                'modified_color': QColor(self.config.get('Settings', 'modified_color'))
+                'modified_color': self.config.get('Settings', 'modified_color'),
+                'parallel_preview': self.config.getboolean('Settings', 'parallel_preview', fallback=False),
+                'rename_threads': self.config.getint('Settings', 'rename_threads', fallback=8),
+                'directory_cache': self.config.getboolean('Settings', 'directory_cache', fallback=True),
+                'watch_directory': self.config.getboolean('Settings', 'watch_directory', fallback=True)
             }
             return settings
         except Exception as e:
@@ -35,7 +48,11 @@ class ConfigManager:
             self.config['Settings'] = {
                 'redundancy': str(settings['redundancy']),
                 'sort_method': settings['sort_method'],
-                'modified_color': settings['modified_color'].name()
+                'modified_color': settings['modified_color'],
+                'parallel_preview': str(settings.get('parallel_preview', False)),
+                'rename_threads': str(settings.get('rename_threads', 8)),
+                'directory_cache': str(settings.get('directory_cache', True)),
+                'watch_directory': str(settings.get('watch_directory', True))
             }
             with open(self.config_file, 'w', encoding='utf-8') as f:
                 self.config.write(f)
@@ -52,5 +69,9 @@ class ConfigManager:
         return {
             'redundancy': int(self.default_settings['redundancy']),
             'sort_method': self.default_settings['sort_method'],
-            'modified_color': QColor(self.default_settings['modified_color'])
+            'modified_color': self.default_settings['modified_color'],
+            'parallel_preview': self.default_settings['parallel_preview'] == 'True',
+            'rename_threads': int(self.default_settings['rename_threads']),
+            'directory_cache': self.default_settings['directory_cache'] == 'True',
+            'watch_directory': self.default_settings['watch_directory'] == 'True'
         }
\ No newline at end of file
@@ -0,0 +1,197 @@
+import os
+import sqlite3
+import threading
+import time
+from array import array
+
+# 默认缓存文件名，与 settings.ini 放在同一目录
+CACHE_FILE = 'directory_cache.sqlite3'
+# 最多缓存的目录数，超出时删除最久未使用的目录
+MAX_DIRECTORIES = 20000
+# 目录修改时间的精度可能只有 1~2 秒（FAT、部分网络文件系统），
+# 扫描前这段时间内修改过的目录，之后的修改可能不会改变修改时间，下次仍需重新扫描
+RACY_WINDOW = 2.0
+# Windows 上 DirEntry.stat() 直接使用目录读取时返回的数据，不需要额外的系统调用；其他系统上 inode() 不需要
+STAT_IS_FREE = os.name == 'nt'
+# 表结构版本，与缓存文件中的不同时重建
+SCHEMA_VERSION = 2
+
+KIND_DIR = 1
+KIND_FILE = 2
+KIND_SYMLINK = 4
+
+class CachedEntry:
+    """缓存中的目录条目，提供与 os.DirEntry 相同的接口，stat() 只包含 st_mtime"""
+    __slots__ = ('directory', 'name', '_kind', 'st_mtime')
+    
+    def __init__(self, directory, name, kind, mtime):
+        self.directory = directory
+        self.name = name
+        self._kind = kind
+        self.st_mtime = mtime
+    
+    @property
+    def path(self):
+        return os.path.join(self.directory, self.name)
+    
+    def is_dir(self, follow_symlinks=True):
+        return bool(self._kind & KIND_DIR)
+    
+    def is_file(self, follow_symlinks=True):
+        return bool(self._kind & KIND_FILE)
+    
+    def is_symlink(self):
+        return bool(self._kind & KIND_SYMLINK)
+    
+    def stat(self, follow_symlinks=True):
+        return self
+
+class DirectoryCache:
+    """持久化的目录列表缓存（SQLite）
+    
+    每个目录一行，以目录路径为键，记录目录的修改时间；条目名称、类型和修改时间分别压缩为一个 BLOB，
+    读取 50 万项的目录只需一次查询和几次批量解码。
+    目录修改时间未变化时直接使用缓存；变化时（或以 refresh=True 扫描时）重新读取目录，
+    与缓存逐项比较名称、类型和 inode，只对新增或被替换的条目调用 stat，其余沿用缓存的修改时间。
+    原地写入的文件 inode 不变，其修改时间在缓存中会过期，直到该文件被替换或在设置中关闭缓存；
+    保存时写入临时文件再替换的程序（多数编辑器）会得到新的 inode，不受影响。
+    """
+    def __init__(self, file_path=CACHE_FILE):
+        self.file_path = file_path
+        self._connection = None
+        self._lock = threading.Lock()
+    
+    def _connect(self):
+        if self._connection is None:
+            try:
+                self._connection = self._open()
+            except sqlite3.DatabaseError:
+                # 缓存文件损坏时直接重建
+                os.remove(self.file_path)
+                self._connection = self._open()
+        return self._connection
+    
+    def _open(self):
+        connection = sqlite3.connect(self.file_path, check_same_thread=False)
+        try:
+            # 缓存丢失只会导致重新扫描，不需要每次提交都写入磁盘
+            connection.execute('PRAGMA synchronous=OFF')
+            if connection.execute('PRAGMA user_version').fetchone()[0] != SCHEMA_VERSION:
+                connection.execute('DROP TABLE IF EXISTS directories')
+                connection.execute(f'PRAGMA user_version = {SCHEMA_VERSION}')
+            connection.execute('CREATE TABLE IF NOT EXISTS directories ('
+                               'path TEXT PRIMARY KEY, mtime REAL, scanned_at REAL, last_used REAL, '
+                               'names BLOB, kinds BLOB, mtimes BLOB, inodes BLOB)')
+            connection.execute('DELETE FROM directories WHERE path NOT IN '
+                               '(SELECT path FROM directories ORDER BY last_used DESC LIMIT ?)',
+                               (MAX_DIRECTORIES,))
+            connection.commit()
+        except sqlite3.DatabaseError:
+            connection.close()
+            raise
+        return connection
+    
+    def scan(self, directory, refresh=False):
+        """逐个返回目录中的文件和文件夹；refresh 为 True 时即使目录修改时间未变化也重新读取目录并与缓存比较
+        
+        为减少大目录的对象创建，返回的条目共用同一个 CachedEntry，调用方需要在取下一项之前使用完当前条目。
+        """
+        dir_mtime = os.stat(directory).st_mtime
+        # 缓存不可用（文件被锁定、磁盘已满等）时按未缓存处理，不影响目录加载
+        try:
+            with self._lock:
+                connection = self._connect()
+                row = connection.execute('SELECT mtime, scanned_at, names, kinds, mtimes, inodes FROM directories '
+                                         'WHERE path = ?', (directory,)).fetchone()
+                if (not refresh and row is not None and row[0] == dir_mtime
+                        and dir_mtime < row[1] - RACY_WINDOW):
+                    connection.execute('UPDATE directories SET last_used = ? WHERE path = ?',
+                                       (time.time(), directory))
+                    connection.commit()
+                    return _iter_entries(directory, *_decode(*row[2:5]))
+        except (sqlite3.Error, OSError) as e:
+            print(f'Error reading directory cache: {e}')
+            row = None
+        
+        # 名称 -> (类型, inode, 修改时间)；类型和 inode 都未变化的条目不需要 stat
+        previous = {}
+        if row is not None:
+            names, kinds, mtimes, inodes = _decode(*row[2:6])
+            previous = dict(zip(names, zip(kinds, inodes, mtimes)))
+        scanned_at = time.time()
+        names = []
+        kinds = bytearray()
+        mtimes = array('d')
+        inodes = array('Q')
+        changed = row is None or row[0] != dir_mtime
+        with os.scandir(directory) as it:
+            for entry in it:
+                try:
+                    kind = ((KIND_DIR if entry.is_dir() else 0) | (KIND_FILE if entry.is_file() else 0)
+                            | (KIND_SYMLINK if entry.is_symlink() else 0))
+                    if not kind & (KIND_DIR | KIND_FILE):
+                        continue
+                    cached = previous.pop(entry.name, None)
+                    if STAT_IS_FREE:
+                        inode = 0
+                        mtime = entry.stat().st_mtime
+                    else:
+                        inode = entry.inode()
+                        same = cached is not None and cached[0] == kind and cached[1] == inode
+                        mtime = cached[2] if same else entry.stat().st_mtime
+                except OSError:
+                    changed = True
+                    continue
+                if cached != (kind, inode, mtime):
+                    changed = True
+                names.append(entry.name)
+                kinds.append(kind)
+                mtimes.append(mtime)
+                inodes.append(inode)
+        
+        try:
+            with self._lock:
+                connection = self._connect()
+                if changed or previous:
+                    connection.execute('INSERT OR REPLACE INTO directories VALUES (?, ?, ?, ?, ?, ?, ?, ?)',
+                                       (directory, dir_mtime, scanned_at, scanned_at,
+                                        *_encode(names, kinds, mtimes, inodes)))
+                else:
+                    # 列表没有变化，只更新扫描时间，不重写整行
+                    connection.execute('UPDATE directories SET scanned_at = ?, last_used = ? WHERE path = ?',
+                                       (scanned_at, scanned_at, directory))
+                connection.commit()
+        except (sqlite3.Error, OSError) as e:
+            print(f'Error writing directory cache: {e}')
+        return _iter_entries(directory, names, kinds, mtimes)
+    
+    def clear(self):
+        with self._lock:
+            connection = self._connect()
+            connection.execute('DELETE FROM directories')
+            connection.commit()
+    
+    def close(self):
+        with self._lock:
+            if self._connection is not None:
+                self._connection.close()
+                self._connection = None
+
+def _iter_entries(directory, names, kinds, mtimes):
+    entry = CachedEntry(directory, '', 0, 0.0)
+    for entry.name, entry._kind, entry.st_mtime in zip(names, kinds, mtimes):
+        yield entry
+
+def _encode(names, kinds, mtimes, inodes):
+    # 文件名中不会出现 \0；surrogatepass 保证无法解码的文件名也能原样保存
+    return '\0'.join(names).encode('utf-8', 'surrogatepass'), bytes(kinds), mtimes.tobytes(), inodes.tobytes()
+
+def _decode(names, kinds, mtimes, inodes=None):
+    times = array('d')
+    times.frombytes(mtimes)
+    decoded = (names.decode('utf-8', 'surrogatepass').split('\0') if names else [], kinds, times)
+    if inodes is None:
+        return decoded
+    numbers = array('Q')
+    numbers.frombytes(inodes)
+    return (*decoded, numbers)
\ No newline at end of file
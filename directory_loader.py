@@ -0,0 +1,40 @@
+from PyQt6.QtCore import QObject, pyqtSignal
+
+class DirectoryLoader(QObject):
+    """在工作线程中分批读取目录，通过信号把每批 FileRecord 交给界面线程
+    
+    batch_loaded(list)：读取到一批记录
+    finished(bool)：读取结束，参数表示是否被取消
+    failed(str)：读取出错
+    """
+    batch_loaded = pyqtSignal(list)
+    finished = pyqtSignal(bool)
+    failed = pyqtSignal(str)
+    
+    def __init__(self, file_manager, directory_path, is_folder_mode=False, batch_size=2000, walk_options=None):
+        super().__init__()
+        self.file_manager = file_manager
+        self.directory_path = directory_path
+        self.is_folder_mode = is_folder_mode
+        self.batch_size = batch_size
+        # 子目录遍历选项（recursive/max_depth/include/exclude），见 FileManager.iter_directory
+        self.walk_options = walk_options or {}
+        self._cancelled = False
+    
+    def run(self):
+        try:
+            for batch in self.file_manager.iter_directory(
+                    self.directory_path, self.is_folder_mode, self.batch_size,
+                    should_stop=lambda: self._cancelled, **self.walk_options):
+                if self._cancelled:
+                    break
+                self.batch_loaded.emit(batch)
+        except Exception as e:
+            print(f'Error loading directory: {e}')
+            self.failed.emit(str(e))
+            return
+        self.finished.emit(self._cancelled)
+    
+    def cancel(self):
+        """请求取消，最多再读取 STOP_CHECK_INTERVAL 项（见 FileManager.iter_directory）后停止"""
+        self._cancelled = True
\ No newline at end of file
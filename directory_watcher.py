@@ -0,0 +1,60 @@
+import time
+from PyQt6.QtCore import QObject, pyqtSignal
+from file_manager import compile_globs, glob_matches
+from file_watcher import create_watcher
+
+class DirectoryWatcher(QObject):
+    """在工作线程中监视已加载的目录，把文件系统的变化分批交给界面线程
+    
+    changed(list)：一批事件，格式见 file_watcher；同一时段内的事件合并后最多每 coalesce 秒发出一次
+    status(str)：需要告知用户的监视状态，如 inotify 不可用而改为轮询
+    finished()：监视结束
+    """
+    changed = pyqtSignal(list)
+    status = pyqtSignal(str)
+    finished = pyqtSignal()
+    
+    def __init__(self, directory_path, walk_options=None, coalesce=0.3, poll_interval=2.0):
+        super().__init__()
+        self.directory_path = directory_path
+        # 与加载时相同的遍历选项，只监视会被加载的子目录
+        self.walk_options = walk_options or {}
+        self.coalesce = coalesce
+        self.poll_interval = poll_interval
+        self._stopped = False
+    
+    def run(self):
+        exclude_match = compile_globs(self.walk_options.get('exclude'))
+        skip = (lambda name, relative_dir: glob_matches(exclude_match, name, relative_dir)) if exclude_match else None
+        try:
+            watcher = create_watcher(self.directory_path, self.walk_options.get('recursive', False),
+                                     self.walk_options.get('max_depth'), skip, self.poll_interval,
+                                     self.status.emit)
+        except OSError as e:
+            print(f'Error watching directory: {e}')
+            self.finished.emit()
+            return
+        try:
+            pending = []
+            deadline = None
+            while not self._stopped:
+                # 定期醒来检查是否已停止
+                timeout = 0.5 if deadline is None else max(0.0, deadline - time.monotonic())
+                events = watcher.read_events(timeout)
+                if events:
+                    pending.extend(events)
+                    if deadline is None:
+                        deadline = time.monotonic() + self.coalesce
+                if pending and time.monotonic() >= deadline:
+                    self.changed.emit(pending)
+                    pending = []
+                    deadline = None
+        except OSError as e:
+            print(f'Error watching directory: {e}')
+        finally:
+            watcher.close()
+        self.finished.emit()
+    
+    def stop(self):
+        """请求停止，最多在 0.5 秒内生效"""
+        self._stopped = True
\ No newline at end of file
@@ -0,0 +1,111 @@
+"""新名称的撤销/重做历史
+
+每一步只保存被修改的记录和它们修改前的名称，不保存整个文件列表的快照：
+在表格中编辑一个名称只占一项，对全部文件应用规则占与文件数相同的项。
+步骤之间尽量共享数据：连续对同一批记录应用规则时共用同一个记录列表，
+修改前的名称都是原名称时不保存名称列表，名称字符串本身也与记录共用。
+撤销时把步骤中保存的名称与记录当前的名称交换，同一个步骤对象移到重做栈，因此撤销和重做都只涉及该步的记录。
+"""
+from operator import is_
+
+# 两个栈中保存的项数上限（每项为一个列表元素，约 8 字节，不含名称字符串），超出时丢弃最早的步骤
+MAX_ENTRIES = 10_000_000
+# 撤销步数上限
+MAX_STEPS = 1000
+
+class EditStep:
+    """一步修改：records 为记录列表，names 为与之对应的另一侧名称（撤销栈中为修改前，重做栈中为修改后）
+    
+    names 为 None 表示各记录的原名称。
+    """
+    __slots__ = ('records', 'names', 'shared')
+    
+    def __init__(self, records, names, shared=False):
+        self.records = records
+        self.names = names
+        # records 与前一步共用时不重复计入项数
+        self.shared = shared
+    
+    @property
+    def entry_count(self):
+        return (0 if self.shared else len(self.records)) + (0 if self.names is None else len(self.names))
+    
+    def __len__(self):
+        return len(self.records)
+
+class EditHistory:
+    """撤销栈和重做栈；记录新的一步时清空重做栈"""
+    def __init__(self, max_entries=MAX_ENTRIES, max_steps=MAX_STEPS):
+        self.max_entries = max_entries
+        self.max_steps = max_steps
+        self._undo = []
+        self._redo = []
+        self._entry_count = 0
+    
+    def can_undo(self):
+        return bool(self._undo)
+    
+    def can_redo(self):
+        return bool(self._redo)
+    
+    def clear(self):
+        self._undo = []
+        self._redo = []
+        self._entry_count = 0
+    
+    def record(self, records, names):
+        """记录一步：records 的新名称已被修改，names 为它们修改前的名称"""
+        if not records:
+            return
+        self._entry_count -= sum(step.entry_count for step in self._redo)
+        self._redo = []
+        shared = False
+        if self._undo:
+            previous = self._undo[-1].records
+            if len(previous) == len(records) and all(map(is_, previous, records)):
+                records = previous
+                shared = True
+        step = EditStep(records, _compact(records, names), shared)
+        self._undo.append(step)
+        self._entry_count += step.entry_count
+        # 至少保留刚记录的一步
+        while len(self._undo) > 1 and (self._entry_count > self.max_entries or len(self._undo) > self.max_steps):
+            self._drop_oldest()
+    
+    def _drop_oldest(self):
+        oldest = self._undo.pop(0)
+        self._entry_count -= oldest.entry_count
+        following = self._undo[0]
+        if following.shared and following.records is oldest.records:
+            # 共用的记录列表改由下一步计入
+            following.shared = False
+            self._entry_count += len(following.records)
+    
+    def undo(self, apply):
+        """撤销最近一步，apply(records, names) 把 names 写入对应记录的新名称；返回该步的记录列表，没有可撤销的步骤时返回 None"""
+        return self._swap(self._undo, self._redo, apply)
+    
+    def redo(self, apply):
+        """重做最近撤销的一步，参数和返回值同 undo"""
+        return self._swap(self._redo, self._undo, apply)
+    
+    def _swap(self, source, target, apply):
+        if not source:
+            return None
+        step = source.pop()
+        self._entry_count -= step.entry_count
+        current = [file_info.new_name for file_info in step.records]
+        names = step.names
+        apply(step.records, [file_info.original_name for file_info in step.records] if names is None else names)
+        step.names = _compact(step.records, current)
+        # 按移入后的相邻步骤重新判断是否共用记录列表
+        step.shared = bool(target) and target[-1].records is step.records
+        target.append(step)
+        self._entry_count += step.entry_count
+        return step.records
+
+def _compact(records, names):
+    """名称都与原名称相同时不保存"""
+    if all(name == file_info.original_name for file_info, name in zip(records, names)):
+        return None
+    return names
\ No newline at end of file
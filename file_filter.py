@@ -0,0 +1,166 @@
+import fnmatch
+import re
+from array import array
+from bisect import bisect_left, bisect_right
+from heapq import merge
+from itertools import accumulate, chain
+
+# 名称匹配方式
+MATCH_MODES = {
+    'substring': '包含',
+    'glob': '通配符',
+    'regex': '正则',
+}
+
+class FileFilter:
+    """文件列表的过滤条件，各条件同时满足才显示
+    
+    pattern 按 mode 匹配原文件名：substring 为包含，glob 为通配符（整个名称），regex 为正则搜索；
+    extensions 为扩展名列表（如 ['jpg', '.png']，不区分大小写，'文件夹' 匹配文件夹，'文件' 匹配无扩展名的文件）；
+    mtime_min/mtime_max 为修改时间范围（时间戳，含两端，None 表示不限）。
+    """
+    def __init__(self, pattern='', mode='substring', case_sensitive=False, extensions=None,
+                 mtime_min=None, mtime_max=None):
+        if mode not in MATCH_MODES:
+            raise ValueError(f'未知的匹配方式：{mode}')
+        self.pattern = pattern
+        self.mode = mode
+        self.case_sensitive = case_sensitive
+        self.extensions = {_normalize_extension(ext) for ext in extensions or [] if ext.strip()}
+        self.mtime_min = mtime_min
+        self.mtime_max = mtime_max
+        # 在创建时编译，正则表达式无效时立即抛出 re.error
+        self.name_match = self._compile()
+    
+    def _compile(self):
+        if not self.pattern:
+            return None
+        if self.mode == 'substring':
+            # 与 FilterIndex.substring_rows 一致，不区分大小写时比较 lower() 的结果
+            needle = self.pattern if self.case_sensitive else self.pattern.lower()
+            if self.case_sensitive:
+                return lambda name: needle in name
+            return lambda name: needle in name.lower()
+        flags = 0 if self.case_sensitive else re.IGNORECASE
+        if self.mode == 'glob':
+            return re.compile(fnmatch.translate(self.pattern), flags).match
+        return re.compile(self.pattern, flags).search
+    
+    def is_empty(self):
+        return (self.name_match is None and not self.extensions
+                and self.mtime_min is None and self.mtime_max is None)
+    
+    def has_mtime_range(self):
+        return self.mtime_min is not None or self.mtime_max is not None
+
+def _normalize_extension(ext):
+    ext = ext.strip().lower()
+    if ext in ('文件夹', '文件') or ext.startswith('.'):
+        return ext
+    return '.' + ext
+
+class FilterIndex:
+    """为过滤建立的索引，按 files 当前的行号组织，files 排序或增删、改名、修改时间变化后需要重建
+    
+    各部分在首次需要时建立：
+    扩展名 -> 行号数组；按修改时间排序的时间数组及对应行号；全部文件名以 \\0 连接成的一个字符串及各名称的起始位置。
+    扩展名和时间范围通过字典查找和二分查找直接得到候选行，包含匹配在连接后的字符串上用 str.find 查找，
+    不需要对每个文件调用一次 Python 函数。
+    """
+    def __init__(self, files):
+        self.files = files
+        self._by_type = None
+        self._mtime_rows = None
+        self._sorted_mtimes = None
+        self._names = {}
+    
+    def by_type(self):
+        if self._by_type is None:
+            by_type = {}
+            for row, file_info in enumerate(self.files):
+                key = file_info.type
+                rows = by_type.get(key)
+                if rows is None:
+                    rows = by_type[key] = []
+                rows.append(row)
+            # 扩展名不区分大小写，合并 .JPG 与 .jpg
+            merged = {}
+            for key, rows in by_type.items():
+                merged.setdefault(key.lower(), []).append(rows)
+            self._by_type = {key: array('l', groups[0] if len(groups) == 1 else merge(*groups))
+                             for key, groups in merged.items()}
+        return self._by_type
+    
+    def mtime_range(self, low, high):
+        """修改时间在 [low, high] 内的行号（未排序）"""
+        if self._sorted_mtimes is None:
+            mtimes = array('d', (file_info.mtime for file_info in self.files))
+            order = sorted(range(len(mtimes)), key=mtimes.__getitem__)
+            self._mtime_rows = array('l', order)
+            self._sorted_mtimes = array('d', sorted(mtimes))
+        start = 0 if low is None else bisect_left(self._sorted_mtimes, low)
+        end = len(self._sorted_mtimes) if high is None else bisect_right(self._sorted_mtimes, high)
+        return self._mtime_rows[start:max(start, end)]
+    
+    def substring_rows(self, needle, case_sensitive=False):
+        """原文件名包含 needle 的行号（升序）"""
+        names = self._names.get(case_sensitive)
+        if names is None:
+            parts = [file_info.original_name for file_info in self.files]
+            if not case_sensitive:
+                parts = [name.lower() for name in parts]
+            # 文件名中不会出现 \0，查找结果不会跨越两个文件名
+            starts = array('l', accumulate(chain((0,), (len(name) + 1 for name in parts))))
+            names = self._names[case_sensitive] = ('\0'.join(parts), starts)
+        text, starts = names
+        if not case_sensitive:
+            needle = needle.lower()
+        rows = []
+        last = len(starts) - 2
+        position = text.find(needle)
+        while position >= 0:
+            row = bisect_right(starts, position) - 1
+            rows.append(row)
+            # 同一文件名中的其他匹配不需要再找
+            position = text.find(needle, starts[row + 1]) if row < last else -1
+        return rows
+    
+    def candidates(self, file_filter):
+        """满足扩展名和时间范围条件的行号（升序），没有这两类条件时返回 None"""
+        rows = None
+        if file_filter.extensions:
+            by_type = self.by_type()
+            groups = [by_type[ext] for ext in file_filter.extensions if ext in by_type]
+            rows = list(groups[0] if len(groups) == 1 else merge(*groups))
+        if file_filter.has_mtime_range():
+            low, high = file_filter.mtime_min, file_filter.mtime_max
+            in_range = self.mtime_range(low, high)
+            if rows is None:
+                return sorted(in_range)
+            # 从较小的集合出发检查另一个条件
+            if len(in_range) < len(rows):
+                extensions = file_filter.extensions
+                files = self.files
+                return sorted(row for row in in_range if files[row].type.lower() in extensions)
+            files = self.files
+            return [row for row in rows
+                    if (low is None or files[row].mtime >= low) and (high is None or files[row].mtime <= high)]
+        return rows
+
+def filter_rows(files, file_filter, index=None):
+    """返回 files 中满足条件的行号（升序）；index 为 files 上的 FilterIndex，不传时临时建立"""
+    index = index or FilterIndex(files)
+    rows = index.candidates(file_filter)
+    name_match = file_filter.name_match
+    if name_match is None:
+        return list(range(len(files))) if rows is None else rows
+    # 候选较少时逐个匹配，否则包含匹配使用连接后的文件名查找
+    if file_filter.mode == 'substring' and (rows is None or len(rows) * 8 > len(files)):
+        matched = index.substring_rows(file_filter.pattern, file_filter.case_sensitive)
+        if rows is None:
+            return matched
+        matched = set(matched)
+        return [row for row in rows if row in matched]
+    if rows is None:
+        return [row for row, file_info in enumerate(files) if name_match(file_info.original_name)]
+    return [row for row in rows if name_match(files[row].original_name)]
\ No newline at end of file
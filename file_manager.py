@@ -1,91 +1,541 @@
 import os
+import sys
+import stat
+import fnmatch
+from contextlib import nullcontext
 from datetime import datetime
+from operator import attrgetter
 import re
+from file_watcher import CHANGED, DIR_REMOVED, LISTING, OVERFLOW
+from file_filter import FilterIndex, filter_rows
+from name_validation import validate_names
+from edit_history import EditHistory
+from rename_planner import plan_renames
+from rename_executor import execute_plan
+
+_NUMBER_SPLIT = re.compile('([0-9]+)').split
 
 def natural_sort_key(s):
-    """实现自然排序的键函数"""
-    convert = lambda text: int(text) if text.isdigit() else text.lower()
-    return [convert(c) for c in re.split('([0-9]+)', s)]
+    """实现自然排序的键函数
+    
+    返回元组：偶数位为小写文本，奇数位为整数，两个键逐位比较时类型总是一致。
+    """
+    parts = _NUMBER_SPLIT(s.lower())
+    parts[1::2] = map(int, parts[1::2])
+    return tuple(parts)
+
+FOLDER_TYPE = sys.intern('文件夹')
+FILE_TYPE = sys.intern('文件')
+# iter_directory 每读取这么多项检查一次是否需要停止，匹配项很少时取消也能及时生效
+STOP_CHECK_INTERVAL = 1000
+
+def compile_globs(patterns):
+    """把通配符列表合并为一个正则表达式的 match 函数，列表为空时返回 None；Windows 下不区分大小写"""
+    patterns = [pattern.strip() for pattern in patterns or [] if pattern.strip()]
+    if not patterns:
+        return None
+    if os.name == 'nt':
+        patterns = [pattern.replace('\\', '/') for pattern in patterns]
+    flags = re.IGNORECASE if os.name == 'nt' else 0
+    return re.compile('|'.join(f'(?:{fnmatch.translate(pattern)})' for pattern in patterns), flags).match
+
+def glob_matches(match, name, relative_dir):
+    """通配符先匹配名称，再匹配以 / 分隔的相对路径（如 raw/*.tmp）"""
+    if match(name):
+        return True
+    return bool(relative_dir) and match(f'{relative_dir}/{name}'.replace(os.sep, '/')) is not None
+
+def _split_extension(name):
+    """与 os.path.splitext(name)[1] 相同（name 为不含目录的文件名），省去通用实现处理路径分隔符的开销"""
+    dot = name.rfind('.')
+    if dot <= 0 or (name[dot - 1] == '.' and not name[:dot].strip('.')):
+        return ''
+    return name[dot:]
+
+class FileRecord:
+    """单个文件或文件夹的紧凑记录
+    
+    使用 __slots__ 代替字典；同一目录下的记录共享目录字符串，类型（扩展名）字符串经过 intern。
+    name/path/is_modified/name_length 等字段按需计算，仍可通过 file_info['key'] 访问。
+    修改时间保存为原始时间戳 mtime，只在显示时格式化为字符串。
+    relative_dir 为所在目录相对于导入目录的路径，导入目录本身为空字符串。
+    """
+    __slots__ = ('directory', '_original_name', 'new_name', 'is_dir', '_type', 'mtime',
+                 '_natural_key', 'relative_dir')
+    
+    def __init__(self, directory, name, is_dir, mtime, relative_dir=''):
+        self.directory = directory
+        self.relative_dir = relative_dir
+        self.is_dir = is_dir
+        self.original_name = name
+        self.new_name = name
+        self.mtime = mtime
+    
+    def __getitem__(self, key):
+        try:
+            return getattr(self, key)
+        except AttributeError:
+            raise KeyError(key) from None
+    
+    def __setitem__(self, key, value):
+        setattr(self, key, value)
+    
+    @property
+    def original_name(self):
+        return self._original_name
+    
+    @original_name.setter
+    def original_name(self, name):
+        self._original_name = name
+        self._natural_key = None
+        self._type = None
+    
+    @property
+    def type(self):
+        """类型（扩展名），首次使用时计算并缓存"""
+        file_type = self._type
+        if file_type is None:
+            file_type = self._type = (FOLDER_TYPE if self.is_dir
+                                      else sys.intern(_split_extension(self._original_name) or FILE_TYPE))
+        return file_type
+    
+    @property
+    def natural_key(self):
+        """自然排序键，首次使用时计算并缓存，文件名改变后失效"""
+        key = self._natural_key
+        if key is None:
+            key = self._natural_key = natural_sort_key(self._original_name)
+        return key
+    
+    @property
+    def name(self):
+        return self._original_name
+    
+    @property
+    def path(self):
+        return os.path.join(self.directory, self._original_name)
+    
+    @property
+    def relative_path(self):
+        return os.path.join(self.relative_dir, self._original_name) if self.relative_dir else self._original_name
+    
+    @property
+    def modified_time(self):
+        return datetime.fromtimestamp(self.mtime).strftime('%Y-%m-%d %H:%M:%S')
+    
+    @property
+    def is_modified(self):
+        return self.new_name != self._original_name
+    
+    @property
+    def name_length(self):
+        return len(self.relative_path)
 
 class FileManager:
     def __init__(self):
         self.current_directory = ''
         self.files = []
         self.is_folder_mode = False
+        self.walk_options = {}
+        # 目录 -> {名称: 记录}，供监视事件查找记录，见 _record_index
+        self._index = None
+        # 当前的过滤条件（FileFilter）和满足条件的行号（files 的下标），未过滤时为 None
+        self.file_filter = None
+        self.filtered_rows = None
+        self._filtered_files = None
+        self._filter_index = None
+        # 新名称无法执行的记录 -> 错误信息，见 validate_names
+        self.name_problems = {}
+        # 新名称与原名称不同的行号（files 的下标），由 rename_file 维护，应用和检查更改时不必遍历全部文件
+        self._dirty = set()
+        # 新名称的撤销/重做历史，以及撤销时由记录查找行号的索引（记录 -> 行号，见 _record_rows）
+        self.history = EditHistory()
+        self._rows = None
     
-    def load_directory(self, directory_path, is_folder_mode=False):
-        """加载目录内容"""
-        self.current_directory = directory_path
-        self.is_folder_mode = is_folder_mode
-        self.files = []
+    def load_directory(self, directory_path, is_folder_mode=False, **walk_options):
+        """加载目录内容，walk_options 见 iter_directory"""
+        self.begin_load(directory_path, is_folder_mode, walk_options)
         
         try:
-            items = os.listdir(directory_path)
-            for item in items:
-                full_path = os.path.join(directory_path, item)
-                # 根据模式筛选文件或文件夹
-                if is_folder_mode and os.path.isdir(full_path) or \
-                   not is_folder_mode and os.path.isfile(full_path):
-                    self.files.append(self._get_file_info(full_path))
+            for batch in self.iter_directory(directory_path, is_folder_mode, **walk_options):
+                self.files.extend(batch)
             return True
         except Exception as e:
             print(f'Error loading directory: {e}')
             return False
     
-    def _get_file_info(self, file_path):
-        """获取文件或文件夹信息"""
-        stat = os.stat(file_path)
-        name = os.path.basename(file_path)
-        return {
-            'name': name,
-            'type': '文件夹' if os.path.isdir(file_path) else os.path.splitext(name)[1] or '文件',
-            'modified_time': datetime.fromtimestamp(stat.st_mtime).strftime('%Y-%m-%d %H:%M:%S'),
-            'original_name': name,
-            'new_name': name,
-            'path': file_path,
-            'is_modified': False,
-            'name_length': len(name)
-        }
+    def begin_load(self, directory_path, is_folder_mode=False, walk_options=None):
+        """开始加载新目录：记录目录、模式和遍历选项并清空文件列表，之后由调用方分批追加"""
+        self.current_directory = directory_path
+        self.is_folder_mode = is_folder_mode
+        self.walk_options = {key: value for key, value in (walk_options or {}).items()
+                             if key not in ('cache', 'refresh_cache')}
+        self.files = []
+        self._index = None
+        self.name_problems = {}
+        self._dirty = set()
+        self.history.clear()
+        self._rows = None
+        # 保留过滤条件，加载过程中先显示全部，加载完成排序时重新过滤
+        self.filtered_rows = None
+        self._filtered_files = None
+        self._filter_index = None
+    
+    def iter_directory(self, directory_path, is_folder_mode=False, batch_size=1000,
+                       recursive=False, max_depth=None, include=None, exclude=None, cache=None,
+                       refresh_cache=False, should_stop=None):
+        """分批读取目录内容，每次返回一批 FileRecord
+        
+        不修改 self.files，可以在工作线程中调用。
+        recursive=True 时按深度优先逐个遍历子目录，max_depth 为向下的层数上限（None 不限），不进入符号链接目录。
+        include/exclude 为通配符列表，匹配名称或相对路径；exclude 同时用于跳过整个子目录。
+        遍历时只保存待读取的子目录和当前一批记录，不会先把整棵目录树读入内存。
+        cache 为 DirectoryCache 时，未变化的目录直接使用缓存的列表，不再访问每个文件；
+        refresh_cache 为 True 时即使目录未变化也重新读取目录列表，见 DirectoryCache.scan。
+        should_stop 为可调用对象时，每个目录开始前和每读取 STOP_CHECK_INTERVAL 项检查一次，返回 True 时停止遍历，
+        不必等到凑满一批。
+        """
+        include_match = compile_globs(include)
+        exclude_match = compile_globs(exclude)
+        batch = []
+        # 待遍历的 (目录, 相对路径, 深度)
+        pending = [(directory_path, '', 0)]
+        while pending:
+            if should_stop is not None and should_stop():
+                return
+            directory, relative_dir, depth = pending.pop()
+            subdirectories = []
+            try:
+                # 使用 os.scandir 单次遍历，DirEntry 会缓存类型和 stat 结果，避免每项重复的系统调用
+                with os.scandir(directory) if cache is None else nullcontext(cache.scan(directory, refresh_cache)) as entries:
+                    for scanned, entry in enumerate(entries, 1):
+                        if should_stop is not None and scanned % STOP_CHECK_INTERVAL == 0 and should_stop():
+                            return
+                        if exclude_match and glob_matches(exclude_match, entry.name, relative_dir):
+                            continue
+                        try:
+                            is_dir = entry.is_dir()
+                            if (recursive and is_dir and (max_depth is None or depth < max_depth)
+                                    and not entry.is_symlink()):
+                                subdirectories.append((entry.path, os.path.join(relative_dir, entry.name), depth + 1))
+                            # 根据模式筛选文件或文件夹
+                            if not (is_dir if is_folder_mode else entry.is_file()):
+                                continue
+                            if include_match and not glob_matches(include_match, entry.name, relative_dir):
+                                continue
+                            batch.append(self._get_file_info(entry, directory, relative_dir))
+                        except OSError:
+                            # 读取目录之后条目被删除或无权访问等，只跳过该条目
+                            continue
+                        if len(batch) >= batch_size:
+                            yield batch
+                            batch = []
+            except OSError as e:
+                # 导入目录本身无法读取时报错，子目录无法读取时跳过
+                if depth == 0:
+                    raise
+                print(f'Error loading directory: {e}')
+            # 逆序入栈，子目录按读取顺序遍历
+            pending.extend(reversed(subdirectories))
+        if batch:
+            yield batch
+    
+    def _get_file_info(self, entry, directory_path, relative_dir=''):
+        """根据 DirEntry 获取文件或文件夹信息（每项最多一次 stat）"""
+        return FileRecord(directory_path, entry.name, entry.is_dir(), entry.stat().st_mtime, relative_dir)
     
     def sort_files(self, key='name', reverse=False, use_natural_sort=True):
         """排序文件列表"""
         if key == 'name':
             if use_natural_sort:
-                self.files.sort(key=lambda x: natural_sort_key(x['name']), reverse=reverse)
+                self.files.sort(key=attrgetter('natural_key'), reverse=reverse)
             else:
                 self.files.sort(key=lambda x: x['name'].lower(), reverse=reverse)
         elif key == 'modified_time':
-            self.files.sort(key=lambda x: x['modified_time'], reverse=reverse)
+            # 直接比较时间戳，无需格式化
+            self.files.sort(key=attrgetter('mtime'), reverse=reverse)
         else:
             self.files.sort(key=lambda x: x[key], reverse=reverse)
+        self._rows = None
+        if self._dirty:
+            # 排序后行号改变，重新找出待修改的行（排序本身已是 O(n log n)）
+            self._dirty = {row for row, file_info in enumerate(self.files)
+                           if file_info.new_name != file_info.original_name}
+        # 过滤索引按行号组织，排序后需要重建
+        self._filter_index = None
+        if self.file_filter is not None:
+            self.refilter()
+    
+    @property
+    def visible_files(self):
+        """过滤后显示的记录，未过滤时为 files 本身"""
+        return self.files if self.filtered_rows is None else self._filtered_files
+    
+    def file_row(self, row):
+        """显示的第 row 行对应的 files 下标"""
+        return row if self.filtered_rows is None else self.filtered_rows[row]
+    
+    def set_filter(self, file_filter):
+        """设置过滤条件（FileFilter），None 或空条件表示显示全部"""
+        self.file_filter = None if file_filter is None or file_filter.is_empty() else file_filter
+        self.refilter()
+    
+    def refilter(self):
+        """files 变化（排序、增删记录）后按当前条件重新过滤；修改条件时复用已建立的索引"""
+        file_filter = self.file_filter
+        if file_filter is None:
+            self.filtered_rows = None
+            self._filtered_files = None
+            return
+        if self._filter_index is None:
+            self._filter_index = FilterIndex(self.files)
+        files = self.files
+        self.filtered_rows = filter_rows(files, file_filter, self._filter_index)
+        self._filtered_files = [files[row] for row in self.filtered_rows]
+    
+    def refresh_metadata(self, files=None):
+        """重新读取文件修改时间
+        
+        按所在目录分组，每个目录只遍历一次 scandir，而不是逐个文件调用 os.stat。
+        """
+        files = self.files if files is None else files
+        by_directory = {}
+        for file_info in files:
+            by_directory.setdefault(file_info['directory'], {})[file_info['original_name']] = file_info
+        
+        for directory, records in by_directory.items():
+            try:
+                with os.scandir(directory) as entries:
+                    for entry in entries:
+                        file_info = records.get(entry.name)
+                        if file_info is not None:
+                            file_info['mtime'] = entry.stat().st_mtime
+            except OSError as e:
+                print(f'Error refreshing metadata: {e}')
     
     def rename_file(self, index, new_name):
-        """重命名文件"""
+        """重命名文件，作为撤销历史中单独的一步"""
         if 0 <= index < len(self.files):
-            self.files[index]['new_name'] = new_name
-            self.files[index]['is_modified'] = new_name != self.files[index]['original_name']
+            self.rename_rows([index], [new_name])
             return True
         return False
     
-    def apply_changes(self):
-        """应用重命名更改"""
-        success_count = 0
-        errors = []
+    def rename_rows(self, rows, new_names):
+        """把 rows 各行的新名称改为 new_names 中对应的名称，整体作为撤销历史中的一步，返回实际改变的行数"""
+        files = self.files
+        records = []
+        previous = []
+        for row, new_name in zip(rows, new_names):
+            file_info = files[row]
+            if file_info.new_name == new_name:
+                continue
+            records.append(file_info)
+            previous.append(file_info.new_name)
+            self._set_new_name(row, file_info, new_name)
+        self.history.record(records, previous)
+        return len(records)
+    
+    def _set_new_name(self, row, file_info, new_name):
+        file_info.new_name = new_name
+        if new_name != file_info.original_name:
+            self._dirty.add(row)
+        else:
+            self._dirty.discard(row)
+    
+    def undo_edit(self):
+        """撤销上一步对新名称的修改，返回受影响的行号（升序）；没有可撤销的步骤时返回 None"""
+        return self._apply_history(self.history.undo)
+    
+    def redo_edit(self):
+        """重做上一步撤销的修改，返回值同 undo_edit"""
+        return self._apply_history(self.history.redo)
+    
+    def _apply_history(self, step):
+        rows = []
+        
+        def apply(records, names):
+            record_rows = self._record_rows()
+            for file_info, name in zip(records, names):
+                row = record_rows.get(file_info)
+                # 已从列表中移除（如被其他程序删除）的记录跳过
+                if row is not None:
+                    self._set_new_name(row, file_info, name)
+                    rows.append(row)
+        
+        if step(apply) is None:
+            return None
+        rows.sort()
+        return rows
+    
+    def _record_rows(self):
+        """记录 -> 行号，首次使用时建立，排序或删除行后失效；files 只在末尾追加时（加载、add_records）自动补全"""
+        if self._rows is None or len(self._rows) != len(self.files):
+            self._rows = {file_info: row for row, file_info in enumerate(self.files)}
+        return self._rows
+    
+    def has_modified_files(self):
+        return bool(self._dirty)
+    
+    def modified_rows(self):
+        """待修改的行号（升序）"""
+        return sorted(self._dirty)
+    
+    def modified_files(self):
+        """待修改的记录，按行号顺序"""
+        files = self.files
+        return [files[row] for row in sorted(self._dirty)]
+    
+    def validate_names(self):
+        """检查所有待修改记录的新名称，结果保存在 name_problems 中并返回"""
+        self.name_problems = validate_names(self.modified_files(), index=self._record_index())
+        return self.name_problems
+    
+    def apply_changes(self, max_workers=1, progress=None, journal=None, exclude=None):
+        """应用重命名更改
+        
+        先生成完整的重命名计划（检查重名和冲突、安排交换和循环重命名的顺序），再执行磁盘操作。
+        max_workers 大于 1 时互不依赖的重命名在线程池中并发执行；progress、journal 见 execute_plan。
+        exclude 为本次不应用的记录集合（如 name_problems 中的记录），它们保持原名。
+        """
+        files = self.modified_files()
+        if exclude:
+            files = [file_info for file_info in files if file_info not in exclude]
+        plan = plan_renames(files)
+        folders = {file_info['path']: file_info for group in plan.groups for _, _, file_info in group
+                   if file_info is not None and file_info['is_dir']}
+        result = execute_plan(plan, max_workers=max_workers, progress=progress, journal=journal)
+        self._index = None
+        self.name_problems = {}
+        self._filter_index = None
+        # 已应用的修改可通过重命名日志撤销，待修改名称的历史不再适用
+        self.history.clear()
+        # 成功重命名的记录原名称已更新，不再待修改
+        files = self.files
+        self._dirty = {row for row in self._dirty if files[row].new_name != files[row].original_name}
+        renamed = {path: file_info['original_name'] for path, file_info in folders.items()
+                   if file_info['original_name'] == file_info['new_name']}
+        if renamed:
+            self._update_moved_directories(renamed)
+        return result
+    
+    def _update_moved_directories(self, renamed):
+        """包含子目录时，上层文件夹改名后更新其下各记录的目录；renamed 为 {文件夹原路径: 新名称}"""
+        cache = {}
+        
+        def moved(directory, relative_dir):
+            if not relative_dir:
+                return directory, relative_dir
+            if directory not in cache:
+                parent, name = os.path.split(directory)
+                new_parent, new_parent_relative = moved(parent, os.path.dirname(relative_dir))
+                name = renamed.get(directory, name)
+                cache[directory] = (os.path.join(new_parent, name),
+                                    os.path.join(new_parent_relative, name) if new_parent_relative else name)
+            return cache[directory]
         
         for file_info in self.files:
-            if file_info['original_name'] != file_info['new_name']:
-                old_path = file_info['path']
-                new_path = os.path.join(os.path.dirname(old_path), file_info['new_name'])
-                
-                try:
-                    if not os.path.exists(new_path):
-                        os.rename(old_path, new_path)
-                        file_info['path'] = new_path
-                        file_info['original_name'] = file_info['new_name']
-                        success_count += 1
-                    else:
-                        errors.append(f'文件已存在: {file_info["new_name"]}')
-                except Exception as e:
-                    errors.append(f'重命名失败 {file_info["original_name"]}: {str(e)}')
+            if file_info.relative_dir:
+                file_info.directory, file_info.relative_dir = moved(file_info.directory, file_info.relative_dir)
+    
+    def _record_index(self):
+        """按目录和名称查找记录的索引，首次使用时建立（O(n)），之后随 add_records/remove_rows 增量维护
         
-        return success_count, errors
\ No newline at end of file
+        files 整体替换（加载）或记录的名称、目录改变（应用更改）后失效。
+        """
+        if self._index is None:
+            index = {}
+            for file_info in self.files:
+                index.setdefault(file_info.directory, {})[file_info.original_name] = file_info
+            self._index = index
+        return self._index
+    
+    def collect_changes(self, events):
+        """根据目录监视事件（见 file_watcher）计算 files 需要的修改
+        
+        事件只说明哪些名称可能变化，实际结果以磁盘上的当前状态为准，因此事件合并、乱序或重复都不影响结果。
+        已有记录只更新修改时间，待应用的新名称（new_name）保持不变；行的删除和追加交给调用方，
+        以便先通知表格模型。
+        返回 (待删除行号的升序列表, 新记录列表, 是否有记录被更新, 是否需要重新加载)。
+        """
+        index = self._record_index()
+        changed = {}
+        removed_dirs = []
+        needs_reload = False
+        for kind, directory, name in events:
+            if kind == CHANGED:
+                changed[(directory, name)] = None
+            elif kind == LISTING:
+                # 轮询得到的完整列表：新出现和已消失的名称都需要检查
+                records = index.get(directory, {})
+                changed.update(((directory, item), None) for item in name if item not in records)
+                changed.update(((directory, item), None) for item in records if item not in name)
+            elif kind == DIR_REMOVED:
+                removed_dirs.append(directory)
+            elif kind == OVERFLOW:
+                needs_reload = True
+        
+        removed = set()
+        for directory in removed_dirs:
+            if os.path.isdir(directory):
+                continue
+            prefix = directory + os.sep
+            for path in [path for path in index if path == directory or path.startswith(prefix)]:
+                removed.update(map(id, index[path].values()))
+        
+        include_match = compile_globs(self.walk_options.get('include'))
+        exclude_match = compile_globs(self.walk_options.get('exclude'))
+        new_records = []
+        updated = False
+        for directory, name in changed:
+            file_info = index.get(directory, {}).get(name)
+            try:
+                st = os.stat(os.path.join(directory, name))
+            except OSError:
+                st = None
+            if file_info is not None:
+                if st is None or stat.S_ISDIR(st.st_mode) != file_info.is_dir:
+                    removed.add(id(file_info))
+                elif file_info.mtime != st.st_mtime:
+                    file_info.mtime = st.st_mtime
+                    updated = True
+                if st is None or id(file_info) not in removed:
+                    continue
+            if st is None:
+                continue
+            is_dir = stat.S_ISDIR(st.st_mode)
+            if not (is_dir if self.is_folder_mode else stat.S_ISREG(st.st_mode)):
+                continue
+            relative_dir = os.path.relpath(directory, self.current_directory)
+            relative_dir = '' if relative_dir == os.curdir else relative_dir
+            if exclude_match and glob_matches(exclude_match, name, relative_dir):
+                continue
+            if include_match and not glob_matches(include_match, name, relative_dir):
+                continue
+            new_records.append(FileRecord(directory, name, is_dir, st.st_mtime, relative_dir))
+        
+        if updated:
+            self._filter_index = None
+        rows = [row for row, file_info in enumerate(self.files) if id(file_info) in removed] if removed else []
+        return rows, new_records, updated, needs_reload
+    
+    def remove_rows(self, first, last):
+        """删除 first 到 last（含）行"""
+        index = self._record_index()
+        for file_info in self.files[first:last + 1]:
+            records = index.get(file_info.directory)
+            if records is not None and records.get(file_info.original_name) is file_info:
+                del records[file_info.original_name]
+        del self.files[first:last + 1]
+        self._filter_index = None
+        self._rows = None
+        if self._dirty:
+            count = last - first + 1
+            self._dirty = {row if row < first else row - count for row in self._dirty if not first <= row <= last}
+    
+    def add_records(self, records):
+        """在末尾追加记录"""
+        index = self._record_index()
+        for file_info in records:
+            index.setdefault(file_info.directory, {})[file_info.original_name] = file_info
+        self.files.extend(records)
+        self._filter_index = None
\ No newline at end of file
@@ -0,0 +1,187 @@
+from PyQt6.QtCore import Qt, QAbstractTableModel, QModelIndex, pyqtSignal
+from PyQt6.QtGui import QColor
+
+class FileTableModel(QAbstractTableModel):
+    """基于 FileManager.visible_files（过滤后的文件列表）的表格模型
+    
+    视图只会为可见行请求数据，不再为每个单元格创建 QTableWidgetItem。
+    editable=True 时为修改区域（单列新文件名），否则为原文件信息区域；
+    修改区域中新名称无法执行的行（FileManager.name_problems）显示为红色，提示信息为原因。
+    names_edited()：在表格中编辑了新文件名
+    """
+    names_edited = pyqtSignal()
+    EDIT_HEADERS = ['重命名']
+    INFO_HEADERS = ['原文件名', '类型', '修改时间']
+    # 包含子目录时原文件名一列显示相对路径
+    INFO_FIELDS = ['relative_path', 'type', 'modified_time']
+    INFO_BACKGROUND = QColor(245, 245, 245)
+    PROBLEM_BACKGROUND = QColor(255, 200, 200)
+    
+    def __init__(self, file_manager, editable=False, parent=None):
+        super().__init__(parent)
+        self.file_manager = file_manager
+        self.editable = editable
+        self.modified_color = None
+        self.headers = self.EDIT_HEADERS if editable else self.INFO_HEADERS
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.file_manager.visible_files)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.headers)
+    
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole:
+            if orientation == Qt.Orientation.Horizontal:
+                return self.headers[section]
+            return section + 1
+        return None
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid():
+            return None
+        file_info = self.file_manager.visible_files[index.row()]
+        if role in (Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.EditRole):
+            if self.editable:
+                return file_info['new_name']
+            return file_info[self.INFO_FIELDS[index.column()]]
+        if role == Qt.ItemDataRole.BackgroundRole:
+            if not self.editable:
+                return self.INFO_BACKGROUND
+            if file_info in self.file_manager.name_problems:
+                return self.PROBLEM_BACKGROUND
+            if file_info['is_modified']:
+                return self.modified_color
+        if role == Qt.ItemDataRole.ToolTipRole and self.editable:
+            return self.file_manager.name_problems.get(file_info)
+        return None
+    
+    def flags(self, index):
+        flags = super().flags(index)
+        if self.editable:
+            flags |= Qt.ItemFlag.ItemIsEditable
+        return flags
+    
+    def setData(self, index, value, role=Qt.ItemDataRole.EditRole):
+        if not self.editable or role != Qt.ItemDataRole.EditRole or not index.isValid():
+            return False
+        if self.file_manager.rename_file(self.file_manager.file_row(index.row()), value):
+            # 只通知被修改的单元格
+            self.dataChanged.emit(index, index, [Qt.ItemDataRole.DisplayRole, Qt.ItemDataRole.BackgroundRole])
+            self.names_edited.emit()
+            return True
+        return False
+    
+    def reset(self):
+        """行数发生变化（如重新加载目录）时重置模型"""
+        self.beginResetModel()
+        self.endResetModel()
+    
+    def refresh_rows(self, first=0, last=None):
+        """行数不变时通知指定范围的行已更新，视图只会重绘其中可见的部分"""
+        if last is None:
+            last = self.rowCount() - 1
+        if last < first:
+            return
+        self.dataChanged.emit(self.index(first, 0), self.index(last, self.columnCount() - 1))
+
+class PreviewTableModel(QAbstractTableModel):
+    """重命名对话框中的实时预览模型，只包含过滤后显示的文件
+    
+    新文件名按需计算并缓存：视图请求哪些行就先计算哪些行，其余行由 fill() 分批补全。
+    set_pipeline() 会丢弃旧规则链的全部结果。
+    """
+    HEADERS = ['原文件名', '新文件名']
+    
+    def __init__(self, file_manager, rule_processor, parent=None):
+        super().__init__(parent)
+        self.file_manager = file_manager
+        self.rule_processor = rule_processor
+        self.pipeline = None
+        self.names = []
+        self.computed_count = 0
+        self.error = None
+    
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.names)
+    
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+    
+    def headerData(self, section, orientation, role=Qt.ItemDataRole.DisplayRole):
+        if role == Qt.ItemDataRole.DisplayRole:
+            if orientation == Qt.Orientation.Horizontal:
+                return self.HEADERS[section]
+            return section + 1
+        return None
+    
+    def data(self, index, role=Qt.ItemDataRole.DisplayRole):
+        if not index.isValid() or role != Qt.ItemDataRole.DisplayRole:
+            return None
+        if index.column() == 0:
+            return self.file_manager.visible_files[index.row()]['relative_path']
+        return self.new_name(index.row())
+    
+    def set_pipeline(self, pipeline):
+        """切换预览使用的规则链，所有行改为待计算"""
+        row_count = len(self.file_manager.visible_files)
+        resized = row_count != len(self.names)
+        if resized:
+            self.beginResetModel()
+        self.pipeline = pipeline
+        self.names = [None] * row_count
+        self.computed_count = 0
+        self.error = None
+        if pipeline is not None:
+            try:
+                pipeline.prepare(self.rule_processor)
+            except Exception as e:
+                # 规则无效时所有行都显示原文件名，不再逐行重复出错
+                self.error = str(e)
+                self.pipeline = None
+        if resized:
+            self.endResetModel()
+        elif row_count:
+            # 只通知新文件名列，视图会按需重新计算其中可见的行
+            self.dataChanged.emit(self.index(0, 1), self.index(row_count - 1, 1))
+    
+    def new_name(self, row):
+        name = self.names[row]
+        if name is None:
+            file_info = self.file_manager.visible_files[row]
+            if self.pipeline is None:
+                name = file_info['original_name']
+            else:
+                try:
+                    name = self.pipeline.apply(self.rule_processor, file_info, row)
+                except Exception as e:
+                    self.error = str(e)
+                    name = file_info['original_name']
+            self.names[row] = name
+            self.computed_count += 1
+        return name
+    
+    def fill(self, start, count):
+        """计算 [start, start + count) 中尚未计算的行，返回下一次开始的位置
+        
+        整块按列计算（见 RulePipeline.apply_column），出错时改为逐行计算以便记录错误。
+        """
+        end = min(start + count, len(self.names))
+        names = None
+        if self.pipeline is not None and None in self.names[start:end]:
+            try:
+                names = self.pipeline.apply_column(self.rule_processor,
+                                                   self.file_manager.visible_files[start:end], start)
+            except Exception:
+                names = None
+        for row in range(start, end):
+            if self.names[row] is None:
+                if names is None:
+                    self.new_name(row)
+                else:
+                    self.names[row] = names[row - start]
+                    self.computed_count += 1
+        return end
+    
+    def is_complete(self):
+        return self.computed_count == len(self.names)
\ No newline at end of file
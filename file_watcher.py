@@ -0,0 +1,272 @@
+"""目录监视
+
+Linux 上通过 ctypes 调用 inotify，由内核推送变化；其他平台或 inotify 不可用（如监视数量达到上限）时，
+改为定期检查各目录的修改时间，只重新读取发生变化的目录。
+
+事件为 (类型, 目录, 名称) 元组：
+    CHANGED：该名称的文件或文件夹可能被创建、删除或修改，由使用方根据磁盘上的当前状态更新
+    DIR_REMOVED：目录被删除或移走，名称为空字符串
+    LISTING：轮询时目录发生变化，名称为目录中的全部名称（集合）
+    OVERFLOW：事件队列溢出，部分变化已丢失，需要重新加载
+"""
+import os
+import select
+import struct
+import time
+import warnings
+
+CHANGED = 'changed'
+DIR_REMOVED = 'dir_removed'
+LISTING = 'listing'
+OVERFLOW = 'overflow'
+
+def iter_directories(root, max_depth=None, skip=None):
+    """遍历 root 及其子目录，生成 (目录, 相对路径, 深度)；skip(名称, 相对路径) 为 True 的子目录不进入"""
+    pending = [(root, '', 0)]
+    while pending:
+        directory, relative_dir, depth = pending.pop()
+        yield directory, relative_dir, depth
+        if max_depth is not None and depth >= max_depth:
+            continue
+        try:
+            with os.scandir(directory) as entries:
+                for entry in entries:
+                    if entry.is_dir(follow_symlinks=False) and not (skip and skip(entry.name, relative_dir)):
+                        pending.append((entry.path, os.path.join(relative_dir, entry.name), depth + 1))
+        except OSError:
+            continue
+
+class _WatcherBase:
+    def __init__(self):
+        self.recursive = False
+        self.max_depth = None
+        self.skip = None
+    
+    def watch(self, root, recursive=False, max_depth=None, skip=None):
+        """开始监视 root；recursive 时同时监视子目录，参数与 FileManager.iter_directory 相同"""
+        self.recursive = recursive
+        self.max_depth = max_depth
+        self.skip = skip
+        self._add_tree(root, '', 0)
+    
+    def _add_tree(self, directory, relative_dir, depth):
+        max_depth = 0 if not self.recursive else (None if self.max_depth is None else self.max_depth - depth)
+        for path, relative, offset in iter_directories(directory, max_depth, self.skip):
+            self._add_directory(path, os.path.join(relative_dir, relative) if relative else relative_dir,
+                                depth + offset)
+    
+    def _can_descend(self, depth):
+        return self.recursive and (self.max_depth is None or depth < self.max_depth)
+
+class InotifyWatcher(_WatcherBase):
+    """基于 inotify 的监视器，每个目录一个 watch"""
+    IN_MODIFY = 0x00000002
+    IN_ATTRIB = 0x00000004
+    IN_CLOSE_WRITE = 0x00000008
+    IN_MOVED_FROM = 0x00000040
+    IN_MOVED_TO = 0x00000080
+    IN_CREATE = 0x00000100
+    IN_DELETE = 0x00000200
+    IN_DELETE_SELF = 0x00000400
+    IN_MOVE_SELF = 0x00000800
+    IN_Q_OVERFLOW = 0x00004000
+    IN_IGNORED = 0x00008000
+    IN_ONLYDIR = 0x01000000
+    IN_EXCL_UNLINK = 0x04000000
+    IN_ISDIR = 0x40000000
+    IN_NONBLOCK = 0o4000
+    IN_CLOEXEC = 0o2000000
+    
+    WATCH_MASK = (IN_ATTRIB | IN_CLOSE_WRITE | IN_MOVED_FROM | IN_MOVED_TO | IN_CREATE | IN_DELETE
+                  | IN_DELETE_SELF | IN_MOVE_SELF | IN_ONLYDIR | IN_EXCL_UNLINK)
+    _HEADER = struct.Struct('iIII')
+    
+    def __init__(self):
+        super().__init__()
+        import ctypes
+        import ctypes.util
+        libc = ctypes.CDLL(ctypes.util.find_library('c'), use_errno=True)
+        self._ctypes = ctypes
+        self._add_watch = libc.inotify_add_watch
+        self._add_watch.argtypes = [ctypes.c_int, ctypes.c_char_p, ctypes.c_uint32]
+        self._rm_watch = libc.inotify_rm_watch
+        self._rm_watch.argtypes = [ctypes.c_int, ctypes.c_int]
+        self._fd = libc.inotify_init1(self.IN_NONBLOCK | self.IN_CLOEXEC)
+        if self._fd < 0:
+            raise self._error()
+        # wd -> (目录, 相对路径, 深度)
+        self._watches = {}
+    
+    def _error(self):
+        errno = self._ctypes.get_errno()
+        return OSError(errno, os.strerror(errno))
+    
+    def _add_directory(self, directory, relative_dir, depth):
+        wd = self._add_watch(self._fd, os.fsencode(directory), self.WATCH_MASK)
+        if wd < 0:
+            raise self._error()
+        self._watches[wd] = (directory, relative_dir, depth)
+    
+    def _remove_tree(self, directory):
+        prefix = directory + os.sep
+        for wd, (path, _, _) in list(self._watches.items()):
+            if path == directory or path.startswith(prefix):
+                self._rm_watch(self._fd, wd)
+                del self._watches[wd]
+    
+    def read_events(self, timeout):
+        """等待最多 timeout 秒，返回期间的事件列表"""
+        readable, _, _ = select.select([self._fd], [], [], timeout)
+        if not readable:
+            return []
+        try:
+            data = os.read(self._fd, 1 << 16)
+        except BlockingIOError:
+            return []
+        events = []
+        offset = 0
+        while offset < len(data):
+            wd, mask, _, length = self._HEADER.unpack_from(data, offset)
+            offset += self._HEADER.size
+            name = os.fsdecode(data[offset:offset + length].rstrip(b'\0'))
+            offset += length
+            if mask & self.IN_Q_OVERFLOW:
+                events.append((OVERFLOW, '', ''))
+                continue
+            watch = self._watches.get(wd)
+            if watch is None:
+                continue
+            directory, relative_dir, depth = watch
+            if mask & self.IN_IGNORED:
+                del self._watches[wd]
+                continue
+            if mask & (self.IN_DELETE_SELF | self.IN_MOVE_SELF):
+                # 目录本身被删除或移走；移动到的新位置无法得知
+                self._remove_tree(directory)
+                events.append((DIR_REMOVED, directory, ''))
+                continue
+            events.append((CHANGED, directory, name))
+            if not mask & self.IN_ISDIR:
+                continue
+            path = os.path.join(directory, name)
+            if mask & (self.IN_DELETE | self.IN_MOVED_FROM):
+                self._remove_tree(path)
+                events.append((DIR_REMOVED, path, ''))
+            elif mask & (self.IN_CREATE | self.IN_MOVED_TO) and self._can_descend(depth):
+                if self.skip and self.skip(name, relative_dir):
+                    continue
+                # 新建或移入的目录中可能已有内容，逐项作为变化报告
+                child_relative = os.path.join(relative_dir, name)
+                self._add_tree(path, child_relative, depth + 1)
+                events.extend(_listing_changes(path, child_relative, depth + 1, self))
+        return events
+    
+    def close(self):
+        if self._fd >= 0:
+            os.close(self._fd)
+            self._fd = -1
+            self._watches = {}
+
+class PollingWatcher(_WatcherBase):
+    """定期检查目录修改时间的监视器；只能发现创建、删除和重命名，发现不了原地修改文件内容"""
+    def __init__(self, interval=2.0):
+        super().__init__()
+        self.interval = interval
+        # 目录 -> [相对路径, 深度, 修改时间]
+        self._directories = {}
+        self._next_poll = 0
+    
+    def _add_directory(self, directory, relative_dir, depth):
+        try:
+            mtime = os.stat(directory).st_mtime
+        except OSError:
+            return
+        self._directories[directory] = [relative_dir, depth, mtime]
+    
+    def read_events(self, timeout):
+        delay = self._next_poll - time.monotonic()
+        if delay > 0:
+            time.sleep(min(delay, timeout))
+            if delay > timeout:
+                return []
+        self._next_poll = time.monotonic() + self.interval
+        events = []
+        for directory, state in list(self._directories.items()):
+            if directory not in self._directories:
+                continue
+            relative_dir, depth, mtime = state
+            try:
+                current = os.stat(directory).st_mtime
+            except OSError:
+                self._remove_tree(directory)
+                events.append((DIR_REMOVED, directory, ''))
+                continue
+            if current == mtime:
+                continue
+            state[2] = current
+            try:
+                with os.scandir(directory) as entries:
+                    names = set()
+                    for entry in entries:
+                        names.add(entry.name)
+                        path = entry.path
+                        if (path not in self._directories and self._can_descend(depth)
+                                and entry.is_dir(follow_symlinks=False)
+                                and not (self.skip and self.skip(entry.name, relative_dir))):
+                            child_relative = os.path.join(relative_dir, entry.name)
+                            self._add_tree(path, child_relative, depth + 1)
+                            events.extend(_listing_changes(path, child_relative, depth + 1, self))
+            except OSError:
+                continue
+            events.append((LISTING, directory, names))
+            # 已不存在的子目录
+            for path in [path for path in self._directories
+                         if os.path.dirname(path) == directory and os.path.basename(path) not in names]:
+                self._remove_tree(path)
+                events.append((DIR_REMOVED, path, ''))
+        return events
+    
+    def _remove_tree(self, directory):
+        prefix = directory + os.sep
+        for path in [path for path in self._directories if path == directory or path.startswith(prefix)]:
+            del self._directories[path]
+    
+    def close(self):
+        self._directories = {}
+
+def _listing_changes(directory, relative_dir, depth, watcher):
+    """新出现的目录中的全部内容（按监视器的深度限制）"""
+    max_depth = None if watcher.max_depth is None else watcher.max_depth - depth
+    events = []
+    for path, _, _ in iter_directories(directory, max_depth, watcher.skip):
+        try:
+            events.extend((CHANGED, path, name) for name in os.listdir(path))
+        except OSError:
+            continue
+    return events
+
+def create_watcher(root, recursive=False, max_depth=None, skip=None, poll_interval=2.0, on_fallback=None):
+    """创建并启动监视器，优先使用 inotify，不可用时改为轮询
+    
+    inotify 可用但无法监视全部目录而改为轮询时，以说明文字调用 on_fallback；未提供时发出 RuntimeWarning。
+    """
+    if hasattr(select, 'select') and os.name == 'posix':
+        try:
+            watcher = InotifyWatcher()
+        except (OSError, AttributeError):
+            watcher = None
+        if watcher is not None:
+            try:
+                watcher.watch(root, recursive, max_depth, skip)
+                return watcher
+            except OSError as e:
+                # 例如监视数量超过 fs.inotify.max_user_watches
+                message = f'inotify 不可用，改为定期检查目录：{e}'
+                if on_fallback is None:
+                    warnings.warn(message, RuntimeWarning, stacklevel=2)
+                else:
+                    on_fallback(message)
+                watcher.close()
+    watcher = PollingWatcher(poll_interval)
+    watcher.watch(root, recursive, max_depth, skip)
+    return watcher
\ No newline at end of file
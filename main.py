@@ -1,15 +1,23 @@
 import sys
 import os
+import re
+from bisect import bisect_left, bisect_right
 from PyQt6.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout,
                              QHBoxLayout, QPushButton, QLabel, QFileDialog,
-                             QTableWidget, QTableWidgetItem, QHeaderView,
-                             QMessageBox, QButtonGroup, QRadioButton, QScrollBar)
-from PyQt6.QtCore import Qt
-from PyQt6.QtGui import QColor, QIcon
-from settings_dialog import SettingsDialog
+                             QTableView, QAbstractItemView, QHeaderView,
+                             QMessageBox, QButtonGroup, QRadioButton, QScrollBar,
+                             QProgressBar, QCheckBox, QSpinBox, QLineEdit, QComboBox, QDateEdit)
+from PyQt6.QtCore import Qt, QThread, QModelIndex, QTimer, QDate, QDateTime, QTime
+from PyQt6.QtGui import QIcon, QColor, QKeySequence
 from file_manager import FileManager
+from file_filter import FileFilter, MATCH_MODES
+from file_table_model import FileTableModel
+from directory_loader import DirectoryLoader
+from directory_watcher import DirectoryWatcher
+from rename_worker import RenameWorker
+from rename_journal import RenameJournal, resume_batch, undo_batch
+from directory_cache import DirectoryCache
 from config_manager import ConfigManager
-from rename_dialog import RenameDialog
 
 class MainWindow(QMainWindow):
     def __init__(self):
@@ -31,6 +39,12 @@ class MainWindow(QMainWindow):
         self.file_manager = FileManager()
         self.config_manager = ConfigManager()
         self.settings = self.config_manager.load_settings()
+        self.journal = RenameJournal(self.config_manager.journal_file)
+        self.directory_cache = DirectoryCache(self.config_manager.cache_file)
+        try:
+            self.journal.trim()
+        except OSError:
+            pass
         
         # 创建中心部件
         central_widget = QWidget()
@@ -55,12 +69,21 @@ class MainWindow(QMainWindow):
         self.settings_btn = QPushButton('设置')
         self.rename_btn = QPushButton('高级重命名')
         self.apply_btn = QPushButton('应用更改')
+        self.undo_btn = QPushButton('撤销上次更改')
+        # 撤销/重做尚未应用的名称修改（表格编辑和高级重命名）
+        self.undo_edit_btn = QPushButton('撤销编辑')
+        self.redo_edit_btn = QPushButton('重做编辑')
+        self.undo_edit_btn.setShortcut(QKeySequence.StandardKey.Undo)
+        self.redo_edit_btn.setShortcut(QKeySequence.StandardKey.Redo)
+        for btn in [self.undo_edit_btn, self.redo_edit_btn]:
+            btn.setToolTip(btn.shortcut().toString(QKeySequence.SequenceFormat.NativeText))
         self.apply_btn.setEnabled(False)
         self.refresh_btn.setEnabled(False)
         self.rename_btn.setEnabled(False)
         
         # 统一按钮大小
-        for btn in [self.import_btn, self.refresh_btn, self.settings_btn, self.rename_btn, self.apply_btn]:
+        for btn in [self.import_btn, self.refresh_btn, self.settings_btn, self.rename_btn, self.apply_btn,
+                    self.undo_btn, self.undo_edit_btn, self.redo_edit_btn]:
             btn.setFixedWidth(100)
         
         # 创建文件/文件夹选择按钮组
@@ -78,8 +101,59 @@ class MainWindow(QMainWindow):
         button_layout.addWidget(self.settings_btn)
         button_layout.addWidget(self.rename_btn)
         button_layout.addWidget(self.apply_btn)
+        button_layout.addWidget(self.undo_btn)
+        button_layout.addWidget(self.undo_edit_btn)
+        button_layout.addWidget(self.redo_edit_btn)
         button_layout.addStretch()
         top_layout.addLayout(button_layout)
+        
+        # 创建子目录遍历选项区域，通配符之间用分号分隔
+        walk_layout = QHBoxLayout()
+        self.recursive_check = QCheckBox('包含子目录')
+        self.depth_spin = QSpinBox()
+        self.depth_spin.setRange(0, 99)
+        self.depth_spin.setSpecialValueText('不限')
+        self.include_edit = QLineEdit()
+        self.include_edit.setPlaceholderText('如 *.jpg;*.png')
+        self.exclude_edit = QLineEdit()
+        self.exclude_edit.setPlaceholderText('如 .git;*.tmp')
+        walk_layout.addWidget(self.recursive_check)
+        walk_layout.addWidget(QLabel('最大深度：'))
+        walk_layout.addWidget(self.depth_spin)
+        walk_layout.addWidget(QLabel('只加载：'))
+        walk_layout.addWidget(self.include_edit)
+        walk_layout.addWidget(QLabel('跳过：'))
+        walk_layout.addWidget(self.exclude_edit)
+        top_layout.addLayout(walk_layout)
+        
+        # 创建过滤区域：只显示满足条件的文件，高级重命名也只作用于显示的文件
+        filter_layout = QHBoxLayout()
+        self.filter_edit = QLineEdit()
+        self.filter_edit.setPlaceholderText('过滤文件名')
+        self.filter_mode_combo = QComboBox()
+        for mode, label in MATCH_MODES.items():
+            self.filter_mode_combo.addItem(label, mode)
+        self.filter_ext_edit = QLineEdit()
+        self.filter_ext_edit.setPlaceholderText('如 jpg;png')
+        self.mtime_check = QCheckBox('修改时间：')
+        self.mtime_from_edit = QDateEdit(QDate.currentDate().addMonths(-1))
+        self.mtime_to_edit = QDateEdit(QDate.currentDate())
+        for date_edit in [self.mtime_from_edit, self.mtime_to_edit]:
+            date_edit.setCalendarPopup(True)
+            date_edit.setDisplayFormat('yyyy-MM-dd')
+            date_edit.setEnabled(False)
+        self.filter_status_label = QLabel()
+        filter_layout.addWidget(QLabel('过滤：'))
+        filter_layout.addWidget(self.filter_edit)
+        filter_layout.addWidget(self.filter_mode_combo)
+        filter_layout.addWidget(QLabel('扩展名：'))
+        filter_layout.addWidget(self.filter_ext_edit)
+        filter_layout.addWidget(self.mtime_check)
+        filter_layout.addWidget(self.mtime_from_edit)
+        filter_layout.addWidget(QLabel('至'))
+        filter_layout.addWidget(self.mtime_to_edit)
+        filter_layout.addWidget(self.filter_status_label)
+        top_layout.addLayout(filter_layout)
         main_layout.addLayout(top_layout)
         
         # 创建表格区域
@@ -88,9 +162,12 @@ class MainWindow(QMainWindow):
         # 修改区域表格
         edit_widget = QWidget()
         edit_layout = QVBoxLayout(edit_widget)
-        self.edit_table = QTableWidget()
-        self.edit_table.setColumnCount(1)
-        self.edit_table.setHorizontalHeaderLabels(['重命名'])
+        self.edit_model = FileTableModel(self.file_manager, editable=True, parent=self)
+        self.edit_model.modified_color = QColor(self.settings['modified_color'])
+        self.edit_table = QTableView()
+        self.edit_table.setModel(self.edit_model)
+        self._setup_table_view(self.edit_table)
+        self._edit_triggers = self.edit_table.editTriggers()
         edit_layout.addWidget(self.edit_table)
         edit_layout.setContentsMargins(0, 0, 0, 0)
         tables_layout.addWidget(edit_widget)
@@ -98,10 +175,11 @@ class MainWindow(QMainWindow):
         # 原文件信息区域表格
         info_widget = QWidget()
         info_layout = QVBoxLayout(info_widget)
-        self.info_table = QTableWidget()
-        self.info_table.setColumnCount(3)
-        self.info_table.setHorizontalHeaderLabels(['原文件名', '类型', '修改时间'])
-        self.info_table.setEditTriggers(QTableWidget.EditTrigger.NoEditTriggers)
+        self.info_model = FileTableModel(self.file_manager, editable=False, parent=self)
+        self.info_table = QTableView()
+        self.info_table.setModel(self.info_model)
+        self._setup_table_view(self.info_table)
+        self.info_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
         
 
 
@@ -123,79 +201,373 @@ class MainWindow(QMainWindow):
         
         main_layout.addLayout(tables_layout)
         
+        # 创建加载进度区域（状态栏）
+        self.load_label = QLabel()
+        self.load_progress = QProgressBar()
+        self.load_progress.setFixedWidth(150)
+        self.cancel_load_btn = QPushButton('取消加载')
+        self.cancel_load_btn.clicked.connect(self.cancel_loading)
+        for widget in [self.load_label, self.load_progress, self.cancel_load_btn]:
+            self.statusBar().addPermanentWidget(widget)
+            widget.hide()
+        # 新名称无法应用的文件数
+        self.problem_label = QLabel()
+        self.problem_label.setStyleSheet('color: red')
+        self.statusBar().addPermanentWidget(self.problem_label)
+        self.problem_label.hide()
+        self._load_thread = None
+        self._loader = None
+        self._pending_sort = None
+        self._rename_thread = None
+        # 与 _loader、_watcher 相同，需要保留工作对象的引用，否则移入线程后会被回收，run 不会执行
+        self._rename_worker = None
+        self._reload_after_rename = False
+        # 本次应用更改涉及的行号（files 的下标），完成后只刷新这些行
+        self._applied_rows = []
+        self._watcher = None
+        self._watch_thread = None
+        # 加载、重命名或重命名对话框打开期间收到的目录变化，结束后再应用
+        self._pending_changes = []
+        self._dialog_open = False
+        # 重命名期间修改了过滤条件，完成后需要重新过滤
+        self._filter_pending = False
+        
         # 连接信号
         self.import_btn.clicked.connect(self.import_directory)
         self.settings_btn.clicked.connect(self.open_settings)
         self.rename_btn.clicked.connect(self.open_rename_dialog)
         self.apply_btn.clicked.connect(self.apply_changes)
+        self.undo_btn.clicked.connect(self.undo_last_changes)
+        self.undo_edit_btn.clicked.connect(self.undo_edit)
+        self.redo_edit_btn.clicked.connect(self.redo_edit)
         self.refresh_btn.clicked.connect(self.refresh_directory)
         self.info_table.horizontalHeader().sectionClicked.connect(self.handle_sort)
-        self.edit_table.itemChanged.connect(self.handle_rename)
         self.file_radio.toggled.connect(self.handle_mode_change)
         self.folder_radio.toggled.connect(self.handle_mode_change)
+        self.recursive_check.toggled.connect(self.handle_mode_change)
+        
+        # 过滤条件停止变化一段时间后再过滤，输入时不会每个字符都扫描一遍
+        self.filter_timer = QTimer(self)
+        self.filter_timer.setSingleShot(True)
+        self.filter_timer.setInterval(250)
+        self.filter_timer.timeout.connect(self.apply_filter)
+        # 信号的参数（序号、勾选状态）不能传给 QTimer.start(int)，否则会被当作新的间隔
+        schedule_filter = lambda *args: self.filter_timer.start()
+        for line_edit in [self.filter_edit, self.filter_ext_edit]:
+            line_edit.textChanged.connect(schedule_filter)
+        self.filter_mode_combo.currentIndexChanged.connect(schedule_filter)
+        for date_edit in [self.mtime_from_edit, self.mtime_to_edit]:
+            date_edit.dateChanged.connect(schedule_filter)
+            self.mtime_check.toggled.connect(date_edit.setEnabled)
+        self.mtime_check.toggled.connect(schedule_filter)
+        
+        # 编辑停止一段时间后再检查新名称
+        self.validate_timer = QTimer(self)
+        self.validate_timer.setSingleShot(True)
+        self.validate_timer.setInterval(300)
+        self.validate_timer.timeout.connect(self.validate_names)
+        self.edit_model.names_edited.connect(self.validate_timer.start)
+        self.edit_model.names_edited.connect(self.update_edit_history_buttons)
         
         # 初始化排序状态
         self.sort_column = 1  # 默认按文件名排序
         self.sort_order = Qt.SortOrder.AscendingOrder
         
+        # 检查上次是否有因程序崩溃而未完成的重命名
+        self.update_undo_button()
+        self.update_edit_history_buttons()
+        QTimer.singleShot(0, self.check_incomplete_renames)
+    
+    def _setup_table_view(self, table):
+        # 固定行高，避免视图为每一行计算尺寸，百万行时滚动和刷新依然流畅
+        table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        table.verticalHeader().setDefaultSectionSize(table.fontMetrics().height() + 8)
+        table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Interactive)
+        
     def import_directory(self):
         directory = QFileDialog.getExistingDirectory(self, '选择目录')
         if directory:
             self.dir_label.setText(f'当前目录：{directory}')
             is_folder_mode = self.folder_radio.isChecked()
-            if self.file_manager.load_directory(directory, is_folder_mode):
-                # 应用默认排序方式
-                self.file_manager.sort_files(
-                    key='name',
-                    reverse=False,
-                    use_natural_sort=self.settings['sort_method'] == '自然排序'
-                )
-                self.update_tables()
-                self.apply_btn.setEnabled(True)
-                self.refresh_btn.setEnabled(True)
-                self.rename_btn.setEnabled(True)
-            else:
-                QMessageBox.warning(self, '错误', '无法加载目录')
+            # 加载完成后应用默认排序方式
+            self.start_loading(directory, is_folder_mode,
+                               ('name', False, self.settings['sort_method'] == '自然排序'))
     
     def refresh_directory(self):
-        if self.file_manager.current_directory:
-            if any(file_info['is_modified'] for file_info in self.file_manager.files):
-                reply = QMessageBox.question(self, '确认刷新',
-                    '刷新操作将撤销所有未保存的修改，是否继续？',
-                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
-                if reply == QMessageBox.StandardButton.No:
-                    return
+        if self.file_manager.current_directory and self.confirm_discard_changes():
+            # 手动刷新时即使目录修改时间未变化也重新读取目录，与缓存比较后只对新增或被替换的条目调用 stat
+            self.reload_directory(refresh_cache=True)
             
-            # 保存当前排序状态
-            current_sort_key = {
-                0: 'name',
-                1: 'type',
-                2: 'modified_time'
-            }.get(self.sort_column, 'name')
-            current_sort_reverse = self.sort_order == Qt.SortOrder.DescendingOrder
-            use_natural_sort = current_sort_key == 'name' and self.settings['sort_method'] == '自然排序'
+    def confirm_discard_changes(self):
+        """有未保存的修改时询问是否放弃，返回是否继续"""
+        if self.file_manager.has_modified_files():
+            reply = QMessageBox.question(self, '确认刷新',
+                '刷新操作将撤销所有未保存的修改，是否继续？',
+                QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+            if reply == QMessageBox.StandardButton.No:
+                return False
+        return True
             
-            is_folder_mode = self.folder_radio.isChecked()
-            if self.file_manager.load_directory(self.file_manager.current_directory, is_folder_mode):
-                # 恢复排序状态
-                self.file_manager.sort_files(
-                    key=current_sort_key,
-                    reverse=current_sort_reverse,
-                    use_natural_sort=use_natural_sort
-                )
-                self.update_tables()
-            else:
-                QMessageBox.warning(self, '错误', '无法刷新目录')
+    def reload_directory(self, refresh_cache=False):
+        # 保存当前排序状态
+        current_sort_key = {
+            0: 'name',
+            1: 'type',
+            2: 'modified_time'
+        }.get(self.sort_column, 'name')
+        current_sort_reverse = self.sort_order == Qt.SortOrder.DescendingOrder
+        use_natural_sort = current_sort_key == 'name' and self.settings['sort_method'] == '自然排序'
+        
+        is_folder_mode = self.folder_radio.isChecked()
+        # 加载完成后恢复排序状态
+        self.start_loading(self.file_manager.current_directory, is_folder_mode,
+                           (current_sort_key, current_sort_reverse, use_natural_sort), refresh_cache)
+    
+    def start_loading(self, directory, is_folder_mode, sort_args, refresh_cache=False):
+        """在工作线程中分批加载目录，已读取的行会立即显示在表格中；refresh_cache 见 FileManager.iter_directory"""
+        self.cancel_loading(wait=True)
+        self.stop_watching()
+        walk_options = self.get_walk_options()
+        walk_options['refresh_cache'] = refresh_cache
+        self.file_manager.begin_load(directory, is_folder_mode, walk_options)
+        self.update_tables()
+        self.update_column_widths()
+        self.update_problem_status()
+        self.update_edit_history_buttons()
+        self._pending_sort = sort_args
+        self.load_progress.setRange(0, 0)  # 总数未知，显示忙碌状态
+        self.set_busy(True, '正在加载...', cancellable=True)
+        
+        self._loader = DirectoryLoader(self.file_manager, directory, is_folder_mode,
+                                       walk_options=walk_options)
+        self._loader.batch_loaded.connect(self.handle_batch_loaded)
+        self._loader.finished.connect(self.handle_loading_finished)
+        self._loader.failed.connect(self.handle_loading_failed)
+        self._load_thread = self.run_in_thread(self._loader, [self._loader.finished, self._loader.failed])
+        # 加载期间就开始监视，读取过程中发生的变化在加载完成后补上
+        self.start_watching()
+    
+    def get_walk_options(self):
+        """子目录遍历选项，见 FileManager.iter_directory；最大深度为 0 表示不限"""
+        split = lambda text: [pattern for pattern in text.split(';') if pattern.strip()]
+        return {
+            'recursive': self.recursive_check.isChecked(),
+            'max_depth': self.depth_spin.value() or None,
+            'include': split(self.include_edit.text()),
+            'exclude': split(self.exclude_edit.text()),
+            'cache': self.directory_cache if self.settings.get('directory_cache', True) else None,
+        }
+    
+    def run_in_thread(self, worker, done_signals):
+        """把 worker 移到新线程中执行 worker.run，done_signals 中任一信号发出后结束线程"""
+        thread = QThread(self)
+        worker.moveToThread(thread)
+        thread.started.connect(worker.run)
+        for signal in done_signals:
+            signal.connect(thread.quit)
+        thread.finished.connect(worker.deleteLater)
+        thread.finished.connect(thread.deleteLater)
+        thread.start()
+        return thread
+    
+    def cancel_loading(self, wait=False):
+        """取消正在进行的加载，已加载的行会保留"""
+        if self._loader is None:
+            return
+        loader, thread = self._loader, self._load_thread
+        loader.cancel()
+        if wait:
+            # 丢弃旧线程尚未处理的信号，直接结束
+            self._loader = None
+            self._load_thread = None
+            thread.quit()
+            thread.wait()
+            self.set_busy(False)
+    
+    def set_busy(self, busy, message='', cancellable=False):
+        """显示或隐藏状态栏中的进度；后台任务进行时禁止排序和重命名，完成后再统一处理"""
+        self.load_label.setText(message)
+        self.load_label.setVisible(busy)
+        self.load_progress.setVisible(busy)
+        self.cancel_load_btn.setVisible(busy and cancellable)
+        self.info_table.horizontalHeader().setSectionsClickable(not busy)
+        for btn in [self.apply_btn, self.refresh_btn, self.rename_btn]:
+            btn.setEnabled(not busy and bool(self.file_manager.current_directory))
+    
+    def handle_batch_loaded(self, batch):
+        if self._loader is None or self.sender() is not self._loader:
+            return
+        files = self.file_manager.files
+        first = len(files)
+        last = first + len(batch) - 1
+        models = [self.edit_model, self.info_model]
+        for model in models:
+            model.beginInsertRows(QModelIndex(), first, last)
+        files.extend(batch)
+        for model in models:
+            model.endInsertRows()
+        self.load_label.setText(f'已加载 {len(files)} 项')
+    
+    def handle_loading_finished(self, cancelled):
+        if self._loader is None or self.sender() is not self._loader:
+            return
+        self._loader = None
+        self._load_thread = None
+        key, reverse, use_natural_sort = self._pending_sort
+        self.file_manager.sort_files(key=key, reverse=reverse, use_natural_sort=use_natural_sort)
+        # 加载期间修改的过滤条件在此生效
+        self.apply_filter()
+        self.update_column_widths()
+        self.set_busy(False)
+        if cancelled:
+            # 只加载了部分文件时不再同步变化
+            self.stop_watching()
+            self.statusBar().showMessage(f'加载已取消，共加载 {len(self.file_manager.files)} 项', 5000)
+        else:
+            self.apply_pending_changes()
+    
+    def handle_loading_failed(self, message):
+        if self._loader is None or self.sender() is not self._loader:
+            return
+        self._loader = None
+        self._load_thread = None
+        self.stop_watching()
+        self.set_busy(False)
+        QMessageBox.warning(self, '错误', f'无法加载目录：{message}')
+    
+    def get_file_filter(self):
+        """根据过滤区域的输入生成 FileFilter，正则表达式无效时抛出 re.error"""
+        mtime_min = mtime_max = None
+        if self.mtime_check.isChecked():
+            midnight = QTime(0, 0)
+            mtime_min = QDateTime(self.mtime_from_edit.date(), midnight).toSecsSinceEpoch()
+            # 截止日期当天全天都包含在内
+            mtime_max = QDateTime(self.mtime_to_edit.date().addDays(1), midnight).toSecsSinceEpoch() - 0.001
+        return FileFilter(self.filter_edit.text(), self.filter_mode_combo.currentData(),
+                          extensions=re.split(r'[;,\s]+', self.filter_ext_edit.text()),
+                          mtime_min=mtime_min, mtime_max=mtime_max)
+    
+    def apply_filter(self):
+        """按过滤区域的条件重新过滤文件列表；加载或重命名期间推迟到完成后"""
+        self.filter_timer.stop()
+        if self._loader is not None or self._rename_thread is not None:
+            self._filter_pending = True
+            return
+        self._filter_pending = False
+        try:
+            file_filter = self.get_file_filter()
+        except re.error as e:
+            self.filter_status_label.setText(f'正则表达式无效：{e}')
+            return
+        self.file_manager.set_filter(file_filter)
+        self.update_tables()
+        self.update_filter_status()
+    
+    def update_filter_status(self):
+        if self.file_manager.filtered_rows is None:
+            self.filter_status_label.setText('')
+        else:
+            self.filter_status_label.setText(
+                f'显示 {len(self.file_manager.filtered_rows)} / {len(self.file_manager.files)} 项')
+    
+    def start_watching(self):
+        """在工作线程中监视当前目录，外部程序新增、删除或修改文件时增量更新表格，不需要重新加载"""
+        self.stop_watching()
+        if not self.settings.get('watch_directory', True):
+            return
+        self._watcher = DirectoryWatcher(self.file_manager.current_directory, self.file_manager.walk_options)
+        self._watcher.changed.connect(self.handle_directory_changed)
+        self._watcher.status.connect(lambda message: self.statusBar().showMessage(message, 10000))
+        self._watch_thread = self.run_in_thread(self._watcher, [self._watcher.finished])
+    
+    def stop_watching(self, wait=False):
+        """停止监视并丢弃尚未应用的变化"""
+        self._pending_changes = []
+        if self._watcher is None:
+            return
+        watcher, thread = self._watcher, self._watch_thread
+        self._watcher = None
+        self._watch_thread = None
+        watcher.stop()
+        if wait:
+            thread.quit()
+            thread.wait()
+    
+    def handle_directory_changed(self, events):
+        if self._watcher is None or self.sender() is not self._watcher:
+            return
+        self._pending_changes.extend(events)
+        # 加载或重命名时 files 可能正在被其他线程读取，对话框中的预览也依赖当前的行号
+        if self._loader is None and self._rename_thread is None and not self._dialog_open:
+            self.apply_pending_changes()
+    
+    def apply_pending_changes(self):
+        """把目录变化应用到 files 和表格：删除消失的行，在末尾追加新出现的文件，更新修改时间；未保存的修改保留"""
+        events, self._pending_changes = self._pending_changes, []
+        if not events or self._watcher is None:
+            return
+        rows, records, updated, needs_reload = self.file_manager.collect_changes(events)
+        # 过滤时表格的行与 files 不一一对应，修改完成后重新过滤并重置表格
+        filtered = self.file_manager.filtered_rows is not None
+        models = [] if filtered else [self.edit_model, self.info_model]
+        # 从后往前按连续区间删除，前面的行号不受影响
+        for first, last in reversed(_row_ranges(rows)):
+            for model in models:
+                model.beginRemoveRows(QModelIndex(), first, last)
+            self.file_manager.remove_rows(first, last)
+            for model in models:
+                model.endRemoveRows()
+        if records:
+            first = len(self.file_manager.files)
+            for model in models:
+                model.beginInsertRows(QModelIndex(), first, first + len(records) - 1)
+            self.file_manager.add_records(records)
+            for model in models:
+                model.endInsertRows()
+        if filtered:
+            self.file_manager.refilter()
+            self.edit_model.reset()
+            self.info_model.reset()
+            self.update_filter_status()
+        elif updated:
+            self.refresh_tables()
+        if rows or records:
+            # 新出现的文件可能占用待应用的新名称
+            self.validate_timer.start()
+        if needs_reload:
+            self.statusBar().showMessage('目录变化过多，部分变化未能同步，请刷新目录', 10000)
+        elif rows or records:
+            self.statusBar().showMessage(f'目录已变化：新增 {len(records)} 项，移除 {len(rows)} 项', 5000)
+    
+    def validate_names(self):
+        """检查所有新名称，在修改区域中标出无法应用的行；加载或重命名期间推迟到完成后，返回 name_problems"""
+        self.validate_timer.stop()
+        if self._loader is not None or self._rename_thread is not None:
+            return None
+        had_problems = bool(self.file_manager.name_problems)
+        problems = self.file_manager.validate_names()
+        if problems or had_problems:
+            self.edit_model.refresh_rows()
+        self.update_problem_status()
+        return problems
+    
+    def update_problem_status(self):
+        problems = self.file_manager.name_problems
+        self.problem_label.setText(f'{len(problems)} 个新名称无法应用' if problems else '')
+        self.problem_label.setVisible(bool(problems))
     
     def handle_mode_change(self):
-        if self.file_manager.current_directory:
-            self.refresh_directory()
+        if self.file_manager.current_directory and self.confirm_discard_changes():
+            self.reload_directory()
     
     def update_tables(self):
-        files = self.file_manager.files
-        self.edit_table.setRowCount(len(files))
-        self.info_table.setRowCount(len(files))
+        """文件列表整体变化（加载/刷新目录、过滤）后重置表格模型"""
+        self.edit_model.reset()
+        self.info_model.reset()
         
+    def update_column_widths(self):
+        """按最长的文件名设置列宽；需要遍历全部文件，每次加载只计算一次，过滤时不重新计算"""
+        files = self.file_manager.files
         # 计算最大文件名长度
         max_name_length = max([file_info['name_length'] for file_info in files]) if files else 0
         redundancy = self.settings.get('redundancy', 25)
@@ -207,26 +579,6 @@ class MainWindow(QMainWindow):
         self.info_table.setColumnWidth(0, min(name_width, self.width() * 3 // 5 - 15 * char_width)) #原文件名列宽度不超过窗口大小的3/5（修改区域宽度：原文件信息区域=2:3）
         self.info_table.setColumnWidth(1, 11 * char_width) #类型列宽度
         self.info_table.setColumnWidth(2, 33 * char_width) #修改时间列宽度 
-        
-        for i, file_info in enumerate(files):
-            # 更新修改区域
-            name_item = QTableWidgetItem(file_info['new_name'])
-            self.edit_table.setItem(i, 0, name_item)
-            if file_info['is_modified']:
-                name_item.setBackground(self.settings['modified_color'])
-            
-            # 更新信息区域
-            original_name_item = QTableWidgetItem(file_info['original_name'])
-            type_item = QTableWidgetItem(file_info['type'])
-            time_item = QTableWidgetItem(file_info['modified_time'])
-            
-            # 设置信息区域的背景色
-            for item in [original_name_item, type_item, time_item]:
-                item.setBackground(QColor(245, 245, 245))
-            
-            self.info_table.setItem(i, 0, original_name_item)
-            self.info_table.setItem(i, 1, type_item)
-            self.info_table.setItem(i, 2, time_item)
     
     def handle_sort(self, column):
         if column == self.sort_column:
@@ -249,34 +601,163 @@ class MainWindow(QMainWindow):
             reverse=self.sort_order == Qt.SortOrder.DescendingOrder,
             use_natural_sort=use_natural_sort
         )
-        self.update_tables()
+        self.refresh_tables()
     
-    def handle_rename(self, item):
-        if item.column() == 0:  # 处理重命名列
-            row = item.row()
-            new_name = item.text()
-            if self.file_manager.rename_file(row, new_name):
-                if self.file_manager.files[row]['is_modified']:
-                    item.setBackground(self.settings['modified_color'])
-                else:
-                    item.setBackground(Qt.GlobalColor.white)
+    def refresh_tables(self):
+        """行数不变（排序、预览、应用更改）时只通知视图数据已更新，由视图重绘可见行"""
+        self.edit_model.refresh_rows()
+        self.info_model.refresh_rows()
+    
+    def refresh_file_rows(self, rows):
+        """只刷新 files 中指定行（升序）所在的范围；过滤时换算为显示的行号"""
+        if not rows:
+            return
+        filtered_rows = self.file_manager.filtered_rows
+        if filtered_rows is None:
+            first, last = rows[0], rows[-1]
+        else:
+            first = bisect_left(filtered_rows, rows[0])
+            last = bisect_right(filtered_rows, rows[-1]) - 1
+        for model in [self.edit_model, self.info_model]:
+            model.refresh_rows(first, last)
     
     def open_settings(self):
+        # 对话框在首次打开时才导入，缩短程序启动时间
+        from settings_dialog import SettingsDialog
         dialog = SettingsDialog(self)
         dialog.set_settings(self.settings)
         if dialog.exec():
             self.settings = dialog.get_settings()
             self.config_manager.save_settings(self.settings)
+            self.edit_model.modified_color = QColor(self.settings['modified_color'])
+            self.edit_model.refresh_rows()
     
     def apply_changes(self):
+        exclude = None
         if self.file_manager.current_directory:
-            if any(file_info['is_modified'] for file_info in self.file_manager.files):
+            problems = self.validate_names()
+            if problems:
+                reply = QMessageBox.question(self, '新名称无效',
+                    f'{len(problems)} 个文件的新名称无法应用（已在修改区域中标出），这些文件将保持原名。\n\n'
+                    '是否继续应用其余更改？',
+                    QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+                if reply == QMessageBox.StandardButton.No:
+                    return
+                exclude = set(problems)
+            if self.file_manager.has_modified_files():
                 reply = QMessageBox.question(self, '确认',
-                    '应用更改后无法撤销，是否继续？',
+                    '应用更改后可通过“撤销上次更改”恢复，是否继续？',
                     QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
                 if reply == QMessageBox.StandardButton.No:
                     return
-        success_count, errors = self.file_manager.apply_changes()
+        
+        self._applied_rows = self.file_manager.modified_rows()
+        self.start_rename_task(self.file_manager.apply_changes,
+                               max_workers=self.settings.get('rename_threads', 8), journal=self.journal,
+                               exclude=exclude)
+    
+    def undo_last_changes(self):
+        batch = self.journal.last_undoable_batch()
+        if batch is None:
+            self.update_undo_button()
+            return
+        step_count = sum(batch.executed_count(i) for i in range(len(batch.groups)))
+        message = f'将撤销上次应用的更改（{step_count} 步重命名），是否继续？'
+        if self.file_manager.has_modified_files():
+            message += '\n\n撤销后将重新加载目录，未保存的修改会丢失。'
+        reply = QMessageBox.question(self, '确认撤销', message,
+            QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
+        if reply == QMessageBox.StandardButton.No:
+            return
+        self.start_rename_task(undo_batch, batch, self.journal, reload=True)
+    
+    def check_incomplete_renames(self):
+        """上次重命名未完成（如程序崩溃、断电）时，询问继续执行、撤销已完成的部分或忽略"""
+        try:
+            incomplete = self.journal.incomplete_batches()
+        except OSError:
+            return
+        if not incomplete:
+            return
+        batch = incomplete[-1]
+        box = QMessageBox(QMessageBox.Icon.Warning, '重命名未完成',
+                          f'上次重命名未完成（共 {len(batch.groups)} 组），请选择处理方式：', parent=self)
+        resume_btn = box.addButton('继续执行', QMessageBox.ButtonRole.AcceptRole)
+        undo_btn = box.addButton('撤销', QMessageBox.ButtonRole.DestructiveRole)
+        box.addButton('忽略', QMessageBox.ButtonRole.RejectRole)
+        box.exec()
+        if box.clickedButton() is resume_btn:
+            self.start_rename_task(resume_batch, batch, self.journal, reload=True)
+        elif box.clickedButton() is undo_btn:
+            self.start_rename_task(undo_batch, batch, self.journal, reload=True)
+        else:
+            self.journal.abort_batch(batch.id)
+            self.update_undo_button()
+    
+    def start_rename_task(self, task, *args, reload=False, **kwargs):
+        """在工作线程中执行重命名，期间禁止编辑和切换目录；reload 为 True 时完成后重新加载当前目录"""
+        self.load_progress.setRange(0, 0)
+        self.set_busy(True, '正在重命名...')
+        self.set_renaming_state(True)
+        self._reload_after_rename = reload
+        worker = RenameWorker(task, *args, **kwargs)
+        worker.progress.connect(self.handle_rename_progress)
+        worker.finished.connect(self.handle_rename_finished)
+        self._rename_worker = worker
+        self._rename_thread = self.run_in_thread(worker, [worker.finished])
+    
+    def undo_edit(self):
+        self._step_edit_history(self.file_manager.undo_edit)
+    
+    def redo_edit(self):
+        self._step_edit_history(self.file_manager.redo_edit)
+    
+    def _step_edit_history(self, step):
+        """撤销或重做一步名称修改，只刷新受影响的行"""
+        if self._rename_thread is not None:
+            return
+        rows = step()
+        if rows is not None:
+            self.refresh_file_rows(rows)
+            self.validate_timer.start()
+        self.update_edit_history_buttons()
+    
+    def update_edit_history_buttons(self):
+        history = self.file_manager.history
+        renaming = self._rename_thread is not None
+        self.undo_edit_btn.setEnabled(history.can_undo() and not renaming)
+        self.redo_edit_btn.setEnabled(history.can_redo() and not renaming)
+    
+    def update_undo_button(self):
+        try:
+            undoable = self.journal.last_undoable_batch() is not None
+        except OSError:
+            undoable = False
+        self.undo_btn.setEnabled(undoable and self._rename_thread is None)
+    
+    def set_renaming_state(self, renaming):
+        for widget in [self.import_btn, self.file_radio, self.folder_radio, self.settings_btn, self.undo_btn,
+                       self.recursive_check, self.depth_spin, self.include_edit, self.exclude_edit,
+                       self.filter_edit, self.filter_mode_combo, self.filter_ext_edit, self.mtime_check]:
+            widget.setEnabled(not renaming)
+        if renaming:
+            self.undo_edit_btn.setEnabled(False)
+            self.redo_edit_btn.setEnabled(False)
+        self.edit_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers if renaming
+                                        else self._edit_triggers)
+    
+    def handle_rename_progress(self, finished, total):
+        self.load_progress.setRange(0, total)
+        self.load_progress.setValue(finished)
+        self.load_label.setText(f'正在重命名 {finished}/{total}')
+    
+    def handle_rename_finished(self, success_count, errors):
+        self._rename_thread = None
+        self._rename_worker = None
+        self.set_renaming_state(False)
+        self.set_busy(False)
+        self.update_undo_button()
+        self.update_edit_history_buttons()
         if success_count >0:
             message = f'成功重命名 {success_count} 个项目'
         elif  success_count == 0:
@@ -284,25 +765,72 @@ class MainWindow(QMainWindow):
         if errors:
             message += '\n\n失败项目：\n' + '\n'.join(errors)
         QMessageBox.information(self, '重命名结果', message)
+        if self._reload_after_rename:
+            # 撤销或继续执行时 files 中的记录不再对应磁盘上的文件
+            if self.file_manager.current_directory:
+                self.reload_directory()
+            return
+        applied_rows, self._applied_rows = self._applied_rows, []
         if success_count > 0:
-            self.update_tables()
+            if self.file_manager.is_folder_mode and self.file_manager.walk_options.get('recursive'):
+                # 上层文件夹改名后其下各行的相对路径都会变化
+                self.refresh_tables()
+            else:
+                self.refresh_file_rows(applied_rows)
+        # 未能应用的记录仍保留新名称，重新标出其中的问题
+        self.validate_names()
+        self.apply_pending_changes()
+        if self._filter_pending:
+            # 重命名期间输入的过滤条件
+            self.apply_filter()
 
     def open_rename_dialog(self):
-        dialog = RenameDialog(self.file_manager, self)
-        if dialog.exec():
-            self.update_tables()
+        from rename_dialog import RenameDialog
+        dialog = RenameDialog(self.file_manager, self,
+                              use_parallel_preview=self.settings.get('parallel_preview', False))
+        self._dialog_open = True
+        try:
+            accepted = dialog.exec()
+        finally:
+            self._dialog_open = False
+        if accepted:
+            self.refresh_tables()
+            self.validate_names()
+            self.update_edit_history_buttons()
+        self.apply_pending_changes()
     
     def closeEvent(self, event):
-        if any(file_info['is_modified'] for file_info in self.file_manager.files):
+        if self.file_manager.has_modified_files():
             reply = QMessageBox.question(self, '确认退出',
                 '有未保存的修改，关闭程序将丢失这些修改，是否继续？',
                 QMessageBox.StandardButton.Yes | QMessageBox.StandardButton.No)
             if reply == QMessageBox.StandardButton.No:
                 event.ignore()
                 return
+        if self._rename_thread is not None:
+            QMessageBox.information(self, '提示', '正在重命名，请等待完成后再关闭')
+            event.ignore()
+            return
+        self.cancel_loading(wait=True)
+        self.stop_watching(wait=True)
+        self.journal.close()
+        self.directory_cache.close()
         event.accept()
 
+def _row_ranges(rows):
+    """把升序的行号列表合并为连续区间 [(first, last), ...]"""
+    ranges = []
+    for row in rows:
+        if ranges and ranges[-1][1] == row - 1:
+            ranges[-1][1] = row
+        else:
+            ranges.append([row, row])
+    return ranges
+
 def main():
+    # 打包为 exe 后，多进程预览的子进程需要由此进入
+    import multiprocessing
+    multiprocessing.freeze_support()
     app = QApplication(sys.argv)
     window = MainWindow()
     window.show()
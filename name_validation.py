@@ -0,0 +1,121 @@
+"""应用更改前检查新文件名
+
+在线性时间内找出所有无法执行的新名称：空名称、包含非法字符、超过文件系统长度上限（255 字节）、
+Windows 保留名称，以及同一目录中重复或（不区分大小写的文件系统上）仅大小写不同的名称。
+重复检查使用按目录划分的哈希表，总耗时与文件数成正比，除检测目录是否区分大小写外不访问磁盘。
+"""
+import os
+import re
+import sys
+from itertools import islice
+
+# 大多数文件系统单个名称的长度上限：ext4 等为 255 字节（UTF-8），NTFS 为 255 个 UTF-16 单元
+MAX_NAME_LENGTH = 255
+# Windows 上不能作为文件名（含带扩展名的形式，如 CON.txt）的设备名
+WINDOWS_RESERVED_NAMES = frozenset(['CON', 'PRN', 'AUX', 'NUL',
+                                    *(f'COM{i}' for i in range(1, 10)), *(f'LPT{i}' for i in range(1, 10))])
+# 各系统上文件名不能包含的字符：Windows 为 <>:"/\|?* 和控制字符，其他系统为 / 和 \0
+WINDOWS_INVALID_CHARS = re.compile(r'[<>:"/\\|?*\x00-\x1f]')
+POSIX_INVALID_CHARS = re.compile(r'[/\x00]')
+# 无法检测时假定的大小写敏感性：Windows 和 macOS 默认不区分大小写
+CASE_INSENSITIVE_DEFAULT = os.name == 'nt' or sys.platform == 'darwin'
+
+def name_length(name, windows=os.name == 'nt'):
+    """名称占用的长度：Windows 为 UTF-16 单元数，其他系统为字节数"""
+    if windows:
+        return len(name.encode('utf-16-le', 'surrogatepass')) // 2
+    return len(os.fsencode(name))
+
+def check_name(name, windows=os.name == 'nt'):
+    """检查单个名称本身是否合法，合法时返回 None，否则返回错误信息；windows 为 False 时按其他系统的规则检查
+    
+    只拒绝目标系统上确实不能使用的名称，RenameRuleProcessor.sanitize_filename 替换的字符（按 Windows 的规则）在其他系统上是合法的。
+    """
+    if not name:
+        return '新名称为空'
+    if name in ('.', '..'):
+        return f'名称无效: {name}'
+    if (WINDOWS_INVALID_CHARS if windows else POSIX_INVALID_CHARS).search(name):
+        return f'包含非法字符: {name}'
+    if windows:
+        if name[-1] in '. ':
+            return f'名称不能以点或空格结尾: {name}'
+        if name.split('.', 1)[0].rstrip(' ').upper() in WINDOWS_RESERVED_NAMES:
+            return f'系统保留名称: {name}'
+    length = name_length(name, windows)
+    if length > MAX_NAME_LENGTH:
+        return f'名称过长（{length}，上限 {MAX_NAME_LENGTH}）: {name}'
+    return None
+
+def is_case_insensitive(directory, names):
+    """用目录中一个已有名称的大小写互换形式访问，指向同一文件则说明该目录不区分大小写
+    
+    names 为目录中现有的名称，最多尝试其中 3 个含字母的名称；都无法判断时按当前系统的默认情况。
+    """
+    for name in islice((name for name in names if name.swapcase() != name), 3):
+        swapped = name.swapcase()
+        try:
+            st = os.stat(os.path.join(directory, name))
+        except OSError:
+            continue
+        try:
+            return os.path.samestat(st, os.stat(os.path.join(directory, swapped)))
+        except FileNotFoundError:
+            return False
+        except OSError:
+            continue
+    return CASE_INSENSITIVE_DEFAULT
+
+def validate_names(files, index=None):
+    """检查 files 中所有待修改记录的新名称，返回 {记录: 错误信息}，只包含有问题的待修改记录
+    
+    index 为 {目录: {原名称: 记录}}（见 FileManager._record_index），不传时只为包含待修改记录的目录临时建立；
+    有了 index，重复检查只需对每个待修改记录查找一次哈希表，与目录中的文件总数无关。
+    新名称与其他待修改记录的新名称相同，或与不修改的记录的名称相同时视为重复；不区分大小写的目录中先转为小写再比较，
+    同一记录只改变大小写不算冲突。
+    只比较 files 中的记录，未加载的文件（被过滤或跳过）与新名称的冲突由 plan_renames 在应用时检查。
+    """
+    problems = {}
+    by_directory = {}
+    for file_info in files:
+        if file_info.new_name != file_info.original_name:
+            message = check_name(file_info.new_name)
+            if message is not None:
+                problems[file_info] = message
+            by_directory.setdefault(file_info.directory, []).append(file_info)
+    if not by_directory:
+        return problems
+    
+    if index is None:
+        index = {directory: {} for directory in by_directory}
+        for file_info in files:
+            records = index.get(file_info.directory)
+            if records is not None:
+                records[file_info.original_name] = file_info
+    
+    for directory, modified in by_directory.items():
+        existing = index.get(directory, {})
+        fold = is_case_insensitive(directory, existing)
+        if fold:
+            existing = {name.lower(): file_info for name, file_info in existing.items()}
+        # 新名称 -> 使用该名称的待修改记录
+        targets = {}
+        for file_info in modified:
+            key = file_info.new_name.lower() if fold else file_info.new_name
+            targets.setdefault(key, []).append(file_info)
+        for key, group in targets.items():
+            if len(group) > 1:
+                for file_info in group:
+                    if file_info not in problems:
+                        problems[file_info] = (f'目标名称重复: {file_info.new_name}'
+                                               if all(other.new_name == file_info.new_name for other in group)
+                                               else f'与其他新名称仅大小写不同: {file_info.new_name}')
+                continue
+            file_info = group[0]
+            owner = existing.get(key)
+            # 名称被不修改的记录占用；占用者自己也要改名时会先腾出名称
+            if owner is None or owner is file_info or owner.new_name != owner.original_name or file_info in problems:
+                continue
+            problems[file_info] = (f'文件已存在: {file_info.new_name}' if owner.original_name == file_info.new_name
+                                   else f'与 {owner.original_name} 仅大小写不同: {file_info.new_name}')
+    return problems
\ No newline at end of file
@@ -0,0 +1,50 @@
+import os
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from file_manager import FileRecord
+from rename_rules import RenameRuleProcessor
+
+# 文件数低于该值时直接在当前进程中计算，进程池的启动和数据传输开销不划算
+PARALLEL_THRESHOLD = 100000
+# 每个进程分到的块数，块越多负载越均衡
+CHUNKS_PER_WORKER = 4
+
+def _preview_chunk(pipeline, names, mtimes, directories, relative_dirs, start_index):
+    """在子进程中处理一块文件名，只接收文件名、修改时间和所在目录
+    
+    同一目录的记录共享目录字符串，pickle 时只会序列化一次。
+    """
+    processor = RenameRuleProcessor()
+    pipeline.prepare(processor)
+    files = [FileRecord(directory, name, False, mtime, relative_dir)
+             for name, mtime, directory, relative_dir in zip(names, mtimes, directories, relative_dirs)]
+    return pipeline.apply_column(processor, files, start_index)
+
+def preview_names(processor, files, pipeline, parallel=False, max_workers=None):
+    """计算所有文件经过规则链后的新文件名，结果顺序与 files 一致
+    
+    pipeline 为 RulePipeline。
+    parallel=True 且文件数超过 PARALLEL_THRESHOLD 时分块交给进程池计算，否则串行计算。
+    """
+    if not parallel or len(files) < PARALLEL_THRESHOLD:
+        return list(pipeline.iter_names(processor, files))
+    
+    # 在提交给进程池之前检查规则，无效时直接在当前进程中报错
+    pipeline.prepare(processor)
+    max_workers = max_workers or os.cpu_count() or 1
+    chunk_size = -(-len(files) // (max_workers * CHUNKS_PER_WORKER))
+    chunks = []
+    for start in range(0, len(files), chunk_size):
+        chunk = files[start:start + chunk_size]
+        chunks.append(([file_info['original_name'] for file_info in chunk],
+                       array('d', (file_info['mtime'] for file_info in chunk)),
+                       [file_info['directory'] for file_info in chunk],
+                       [file_info['relative_dir'] for file_info in chunk],
+                       start))
+    
+    new_names = []
+    with ProcessPoolExecutor(max_workers=max_workers) as executor:
+        futures = [executor.submit(_preview_chunk, pipeline, *chunk) for chunk in chunks]
+        for future in futures:
+            new_names.extend(future.result())
+    return new_names
\ No newline at end of file
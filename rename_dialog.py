@@ -1,18 +1,30 @@
 from PyQt6.QtWidgets import (QDialog, QTabWidget, QWidget, QVBoxLayout, QHBoxLayout,
                              QLabel, QLineEdit, QSpinBox, QComboBox, QPushButton,
-                             QCheckBox, QTextEdit, QMessageBox, QRadioButton, QButtonGroup)
-from PyQt6.QtCore import Qt
+                             QCheckBox, QTextEdit, QMessageBox, QRadioButton, QButtonGroup,
+                             QTableView, QHeaderView, QAbstractItemView, QListWidget,
+                             QFileDialog)
+from PyQt6.QtCore import Qt, QTimer
 from rename_rules import RenameRuleProcessor
+from rule_pipeline import RulePipeline, describe_rule
+from parallel_preview import preview_names
+from file_table_model import PreviewTableModel
 import os
+import re
 
 class RenameDialog(QDialog):
-    def __init__(self, file_manager, parent=None):
+    # 输入停止变化多久后刷新实时预览（毫秒）
+    PREVIEW_DELAY = 250
+    # 后台补全预览时每次处理的行数，保证输入时界面依然流畅
+    PREVIEW_CHUNK_SIZE = 2000
+    
+    def __init__(self, file_manager, parent=None, use_parallel_preview=False):
         super().__init__(parent)
         self.file_manager = file_manager
         self.rule_processor = RenameRuleProcessor()
+        self.use_parallel_preview = use_parallel_preview
         self.setWindowTitle('高级重命名')
         self.setModal(True)
-        self.setMinimumSize(600, 400)
+        self.setMinimumSize(600, 600)
         
         # 创建主布局
         layout = QVBoxLayout(self)
@@ -26,6 +38,41 @@ class RenameDialog(QDialog):
         tab_widget.addTab(self.create_regex_tab(), '正则替换')
         layout.addWidget(tab_widget)
         
+        # 创建规则链区域：可将多个选项卡的规则依次组合后一次执行
+        self.pipeline = RulePipeline()
+        pipeline_layout = QHBoxLayout()
+        self.pipeline_list = QListWidget()
+        self.pipeline_list.setMaximumHeight(100)
+        pipeline_layout.addWidget(self.pipeline_list)
+        pipeline_buttons = QVBoxLayout()
+        self.use_pipeline_check = QCheckBox('使用规则链')
+        add_rule_btn = QPushButton('添加到规则链')
+        add_rule_btn.clicked.connect(self.add_rule_to_pipeline)
+        remove_rule_btn = QPushButton('移除所选规则')
+        remove_rule_btn.clicked.connect(self.remove_pipeline_rule)
+        clear_rules_btn = QPushButton('清空规则链')
+        clear_rules_btn.clicked.connect(self.clear_pipeline)
+        save_pipeline_btn = QPushButton('保存规则链')
+        save_pipeline_btn.clicked.connect(self.save_pipeline)
+        load_pipeline_btn = QPushButton('加载规则链')
+        load_pipeline_btn.clicked.connect(self.load_pipeline)
+        for widget in [self.use_pipeline_check, add_rule_btn, remove_rule_btn, clear_rules_btn,
+                       save_pipeline_btn, load_pipeline_btn]:
+            pipeline_buttons.addWidget(widget)
+        pipeline_layout.addLayout(pipeline_buttons)
+        layout.addLayout(pipeline_layout)
+        
+        # 创建实时预览区域
+        self.preview_model = PreviewTableModel(self.file_manager, self.rule_processor, self)
+        self.preview_table = QTableView()
+        self.preview_table.setModel(self.preview_model)
+        self.preview_table.setEditTriggers(QAbstractItemView.EditTrigger.NoEditTriggers)
+        self.preview_table.verticalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Fixed)
+        self.preview_table.horizontalHeader().setSectionResizeMode(QHeaderView.ResizeMode.Stretch)
+        layout.addWidget(self.preview_table)
+        self.preview_status = QLabel()
+        layout.addWidget(self.preview_status)
+        
         # 创建预览和确认按钮
         preview_btn = QPushButton('预览')
         preview_btn.clicked.connect(self.preview_changes)
@@ -46,6 +93,27 @@ class RenameDialog(QDialog):
         
         self.current_tab = 0
         tab_widget.currentChanged.connect(self.handle_tab_change)
+        
+        # 输入变化后延迟刷新预览；后台补全通过零间隔定时器分批执行，新的输入会中止旧的计算
+        self.preview_timer = QTimer(self)
+        self.preview_timer.setSingleShot(True)
+        self.preview_timer.setInterval(self.PREVIEW_DELAY)
+        self.preview_timer.timeout.connect(self.update_live_preview)
+        self.fill_timer = QTimer(self)
+        self.fill_timer.setInterval(0)
+        self.fill_timer.timeout.connect(self.fill_preview_chunk)
+        self.fill_position = 0
+        
+        for line_edit in [self.old_text, self.new_text, self.insert_text, self.target_input,
+                          self.template_edit, self.pattern_edit, self.replace_edit]:
+            line_edit.textChanged.connect(self.schedule_preview)
+        for spin_box in [self.n_input, self.width_spin]:
+            spin_box.valueChanged.connect(self.schedule_preview)
+        self.position_combo.currentIndexChanged.connect(self.schedule_preview)
+        self.include_ext_check.toggled.connect(self.schedule_preview)
+        self.use_pipeline_check.toggled.connect(self.schedule_preview)
+        tab_widget.currentChanged.connect(self.schedule_preview)
+        self.update_live_preview()
     
     def create_batch_replace_tab(self):
         tab = QWidget()
@@ -159,6 +227,8 @@ class RenameDialog(QDialog):
         help_text += "（”[]“括号内为可选项，无论使用或不使用都应该删除括号）\n"
         help_text += "<name[:upper/:lower]> - 原文件名(不含后缀)，可指定大小写\n"
         help_text += "<ext[:upper/:lower]> - 原后缀名，可指定大小写\n"
+        help_text += "<dir> - 所在文件夹名称\n"
+        help_text += "<relpath> - 相对于导入目录的子目录路径（分隔符替换为_），用于包含子目录时\n"
         help_text += "<##:i> - 编号（#的重复次数为位数，i为起始编号）\n"
         help_text += "<date>- 当前日期，形式固定为：year.month.day\n"
         help_text += "<date.modify> - 文件修改日期，形式固定为：year.month.day\n"
@@ -179,6 +249,11 @@ class RenameDialog(QDialog):
         template_layout.addWidget(self.template_edit)
         layout.addLayout(template_layout)
         
+        # 默认使用导入目录时读取的修改时间，勾选后重新读取
+        self.fresh_mtime_check = QCheckBox('重新读取文件修改时间')
+        self.fresh_mtime_check.setChecked(False)
+        layout.addWidget(self.fresh_mtime_check)
+        
         layout.addStretch()
         return tab
     
@@ -236,15 +311,97 @@ class RenameDialog(QDialog):
     def handle_tab_change(self, index):
         self.current_tab = index
     
+    def add_rule_to_pipeline(self):
+        rule = self.get_current_rule()
+        if rule is None:
+            return
+        self.pipeline.add_rule(rule)
+        self.update_pipeline_list()
+        self.use_pipeline_check.setChecked(True)
+    
+    def remove_pipeline_rule(self):
+        row = self.pipeline_list.currentRow()
+        if row >= 0:
+            self.pipeline.remove_rule(row)
+            self.update_pipeline_list()
+    
+    def clear_pipeline(self):
+        self.pipeline.clear()
+        self.update_pipeline_list()
+    
+    def save_pipeline(self):
+        if not len(self.pipeline):
+            QMessageBox.warning(self, '错误', '规则链为空')
+            return
+        file_path, _ = QFileDialog.getSaveFileName(self, '保存规则链', '', '规则链 (*.json)')
+        if file_path:
+            try:
+                self.pipeline.save(file_path)
+            except OSError as e:
+                QMessageBox.warning(self, '错误', f'保存失败：{str(e)}')
+    
+    def load_pipeline(self):
+        file_path, _ = QFileDialog.getOpenFileName(self, '加载规则链', '', '规则链 (*.json)')
+        if file_path:
+            try:
+                self.pipeline = RulePipeline.load(file_path)
+            except (OSError, ValueError, KeyError) as e:
+                QMessageBox.warning(self, '错误', f'加载失败：{str(e)}')
+                return
+            self.update_pipeline_list()
+            self.use_pipeline_check.setChecked(True)
+    
+    def update_pipeline_list(self):
+        self.pipeline_list.clear()
+        self.pipeline_list.addItems([describe_rule(rule) for rule in self.pipeline.rules])
+        self.schedule_preview()
+    
+    def schedule_preview(self):
+        """输入变化时停止旧的预览计算，并在输入停止后刷新"""
+        self.fill_timer.stop()
+        self.preview_timer.start()
+    
+    def update_live_preview(self):
+        # 先通知视图刷新，可见行会立即按新规则计算，其余行在后台补全
+        self.preview_model.set_pipeline(self.get_pipeline(show_errors=False))
+        self.fill_position = 0
+        self.fill_timer.start()
+        self.update_preview_status()
+    
+    def fill_preview_chunk(self):
+        self.fill_position = self.preview_model.fill(self.fill_position, self.PREVIEW_CHUNK_SIZE)
+        if self.fill_position >= self.preview_model.rowCount():
+            self.fill_timer.stop()
+        self.update_preview_status()
+    
+    def update_preview_status(self):
+        model = self.preview_model
+        if model.error:
+            self.preview_status.setText(f'预览出错：{model.error}')
+        elif model.pipeline is None:
+            self.preview_status.setText('请输入重命名规则')
+        elif model.is_complete():
+            changed = sum(1 for file_info, new_name in zip(self.file_manager.visible_files, model.names)
+                          if new_name != file_info['original_name'])
+            self.preview_status.setText(f'共 {model.rowCount()} 项，将修改 {changed} 项')
+        else:
+            self.preview_status.setText(f'正在计算预览 {model.computed_count}/{model.rowCount()}')
+    
+    def done(self, result):
+        # 对话框关闭时停止尚未完成的预览计算
+        self.preview_timer.stop()
+        self.fill_timer.stop()
+        super().done(result)
+    
     def preview_changes(self):
         try:
             new_names = self.get_preview_names()
             if not new_names:
                 return
             
-            # 更新文件管理器中的新名称
-            for i, new_name in enumerate(new_names):
-                self.file_manager.rename_file(i, new_name)
+            # 更新文件管理器中的新名称，过滤时只修改显示的文件；整体作为一步，可在主窗口中撤销
+            file_manager = self.file_manager
+            file_manager.rename_rows(map(file_manager.file_row, range(len(new_names))), new_names)
             
             # 关闭当前对话框，让用户可以看到主窗口的预览效果
             self.accept()
@@ -253,22 +410,49 @@ class RenameDialog(QDialog):
             QMessageBox.warning(self, '错误', f'预览失败：{str(e)}')
     
     def get_preview_names(self):
+        pipeline = self.get_pipeline()
+        if pipeline is None:
+            return None
+        uses_template = any(method == 'apply_template' for method, _ in pipeline.rules)
+        if uses_template and self.fresh_mtime_check.isChecked():
+            self.file_manager.refresh_metadata(self.file_manager.visible_files)
+        elif pipeline == self.preview_model.pipeline and self.preview_model.is_complete():
+            # 实时预览已经算完当前规则链，直接复用结果
+            return self.preview_model.names
+        return preview_names(self.rule_processor, self.file_manager.visible_files, pipeline,
+                             parallel=self.use_parallel_preview)
+    
+    def get_pipeline(self, show_errors=True):
+        """勾选“使用规则链”时返回规则链，否则返回只包含当前选项卡规则的规则链"""
+        if self.use_pipeline_check.isChecked():
+            if not len(self.pipeline):
+                if show_errors:
+                    QMessageBox.warning(self, '错误', '规则链为空')
+                return None
+            return RulePipeline(self.pipeline.rules)
+        rule = self.get_current_rule(show_errors)
+        if rule is None:
+            return None
+        return RulePipeline([rule])
+    
+    def get_current_rule(self, show_errors=True):
+        """根据当前选项卡的输入生成规则描述 (方法名, 参数字典)，输入不完整时返回 None"""
         include_ext = self.include_ext_check.isChecked()
-        files = self.file_manager.files
         
         if self.current_tab == 0:  # 批量替换
             old_str = self.old_text.text()
             new_str = self.new_text.text()
             if not old_str:
-                QMessageBox.warning(self, '错误', '请输入要替换的内容')
+                if show_errors:
+                    QMessageBox.warning(self, '错误', '请输入要替换的内容')
                 return None
-            return [self.rule_processor.batch_replace(file_info, old_str, new_str, include_ext)
-                    for file_info in files]
+            return ('batch_replace', {'old_str': old_str, 'new_str': new_str, 'include_ext': include_ext})
         
         elif self.current_tab == 1:  # 插入字符
             text = self.insert_text.text()
             if not text:
-                QMessageBox.warning(self, '错误', '请输入要插入的内容')
+                if show_errors:
+                    QMessageBox.warning(self, '错误', '请输入要插入的内容')
                 return None
             
             position_map = {
@@ -283,29 +467,35 @@ class RenameDialog(QDialog):
             n = self.n_input.value() if position in ['nth', 'nth_last'] else 0
             target = self.target_input.text() if position in ['before', 'after'] else ''
             
-            return [self.rule_processor.insert_text(file_info, text, position, n, target, include_ext)
-                    for file_info in files]
+            return ('insert_text', {'text': text, 'position': position, 'n': n, 'target': target,
+                                    'include_ext': include_ext})
         
         elif self.current_tab == 2:  # 序号补齐
             width = self.width_spin.value()
-            return [self.rule_processor.pad_numbers(file_info, width)
-                    for file_info in files]
+            return ('pad_numbers', {'width': width})
         
         elif self.current_tab == 3:  # 重新命名
             template = self.template_edit.text()
             if not template:
-                QMessageBox.warning(self, '错误', '请输入命名模板')
+                if show_errors:
+                    QMessageBox.warning(self, '错误', '请输入命名模板')
                 return None
-            return [self.rule_processor.apply_template(file_info, template, i, include_ext)
-                    for i, file_info in enumerate(files)]
+            return ('apply_template', {'template': template, 'include_ext': include_ext})
         
         elif self.current_tab == 4:  # 正则替换
             pattern = self.pattern_edit.text()
             repl = self.replace_edit.text()
             if not pattern:
-                QMessageBox.warning(self, '错误', '请输入正则表达式')
+                if show_errors:
+                    QMessageBox.warning(self, '错误', '请输入正则表达式')
                 return None
-            return [self.rule_processor.apply_regex(file_info, pattern, repl, include_ext)
-                    for file_info in files]
+            # 实时预览时由预览模型显示错误，这里只在执行前检查
+            if show_errors:
+                try:
+                    self.rule_processor.prepare_rule(('apply_regex', {'pattern': pattern, 'repl': repl}))
+                except re.error as e:
+                    QMessageBox.warning(self, '错误', f'无效的正则表达式：{e}')
+                    return None
+            return ('apply_regex', {'pattern': pattern, 'repl': repl, 'include_ext': include_ext})
         
         return None
\ No newline at end of file
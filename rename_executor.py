@@ -0,0 +1,69 @@
+import os
+from rename_planner import execute_group
+
+# 每个线程任务最多包含的步骤组数，减少大量小任务的调度开销
+GROUPS_PER_TASK = 64
+
+def _execute_groups(groups, start, rename, journal, batch_id):
+    success_count = 0
+    errors = []
+    for offset, group in enumerate(groups):
+        done, error, executed = execute_group(group, rename)
+        success_count += done
+        if error:
+            errors.append(error)
+        if journal is not None:
+            journal.record_group(batch_id, start + offset, executed)
+    return success_count, errors
+
+def execute_plan(plan, max_workers=1, rename=os.rename, progress=None, journal=None):
+    """执行重命名计划，返回 (成功数, 错误列表)
+    
+    同一轮（见 RenamePlan.waves）中的步骤组互不依赖，可在有界线程池中并发执行；组内的步骤仍按顺序执行。
+    在 SMB/NFS 等高延迟文件系统上，每次 os.rename 的等待时间可以相互重叠。
+    progress(已完成文件数, 文件总数) 在调用线程中回调。
+    journal 为 RenameJournal 时，执行前写入计划，每组完成后记录已执行的步骤数，供崩溃后继续或撤销。
+    """
+    errors = list(plan.errors)
+    total = plan.file_count
+    if not plan.groups:
+        journal = None
+    batch_id = journal.begin_batch(plan.groups) if journal is not None else None
+    counts = {'success': 0, 'finished': 0}
+    
+    def collect(groups, result):
+        done, task_errors = result
+        counts['success'] += done
+        errors.extend(task_errors)
+        counts['finished'] += sum(1 for group in groups for step in group if step[2] is not None)
+        if progress:
+            progress(counts['finished'], total)
+    
+    executor = None
+    if max_workers > 1:
+        # concurrent.futures 会连带导入 logging 等模块，只在需要线程池时导入
+        from concurrent.futures import ThreadPoolExecutor, as_completed
+        executor = ThreadPoolExecutor(max_workers=max_workers)
+    try:
+        for wave_start, wave_end in plan.waves:
+            # 组数较少时缩小任务，保证每个线程都能分到任务
+            task_size = max(1, min(GROUPS_PER_TASK, (wave_end - wave_start) // (max_workers * 4)))
+            tasks = [(start, plan.groups[start:min(start + task_size, wave_end)])
+                     for start in range(wave_start, wave_end, task_size)]
+            if executor is None:
+                for start, groups in tasks:
+                    collect(groups, _execute_groups(groups, start, rename, journal, batch_id))
+            else:
+                futures = {executor.submit(_execute_groups, groups, start, rename, journal, batch_id): groups
+                           for start, groups in tasks}
+                for future in as_completed(futures):
+                    collect(futures[future], future.result())
+            if journal is not None:
+                # 上层文件夹改名前，先把下层的完成记录写入磁盘
+                journal.sync()
+    finally:
+        if executor is not None:
+            executor.shutdown()
+    if journal is not None:
+        journal.commit_batch(batch_id)
+    return counts['success'], errors
\ No newline at end of file
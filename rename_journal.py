@@ -0,0 +1,271 @@
+import json
+import os
+import threading
+import time
+
+# 默认日志文件名，与 settings.ini 放在同一目录
+JOURNAL_FILE = 'rename_journal.jsonl'
+
+class JournalBatch:
+    """日志中的一次重命名批次
+    
+    groups 与重命名计划的步骤组对应，每个步骤为 (原路径, 目标路径)；
+    done 记录每组已执行的步骤数，崩溃时丢失的部分由 executed_count 根据磁盘状态推断；
+    identities 为借助临时名称的环中被移到临时名称的文件的 (st_dev, st_ino)。
+    """
+    def __init__(self, batch_id, groups, undo_of=None, created=0, identities=None):
+        self.id = batch_id
+        self.groups = groups
+        self.identities = identities or {}
+        self.undo_of = undo_of
+        self.created = created
+        self.done = {}
+        self.committed = False
+        self.aborted = False
+        self.undone_by = None
+    
+    @property
+    def is_complete(self):
+        return self.committed or self.aborted
+    
+    def executed_count(self, index):
+        """第 index 组实际已执行的步骤数
+        
+        组内步骤按顺序执行，已执行的一定是前缀。日志中有记录时直接使用；
+        否则从后往前找最后一个“原路径已不存在且目标路径存在”的步骤。
+        未执行的步骤原路径一定存在，已执行步骤的原路径可能被下一步重新占用，因此从后往前找到的第一个即为最后执行的步骤。
+        环的最后一步从临时名称移出，未执行第一步时临时名称同样不存在，只能通过文件标识判断。
+        """
+        if index in self.done:
+            return self.done[index]
+        group = self.groups[index]
+        for i in range(len(group) - 1, -1, -1):
+            src, dst = group[i]
+            if i > 0 and src == group[0][1]:
+                identity = self.identities.get(index)
+                if identity is not None and _identity(dst) == identity:
+                    return i + 1
+                continue
+            if not os.path.lexists(src) and os.path.lexists(dst):
+                return i + 1
+        return 0
+    
+    def undo_groups(self):
+        """生成撤销本批次的步骤组：按相反的组顺序（先恢复上层文件夹），每组已执行的步骤按相反顺序反向执行"""
+        groups = []
+        for index in range(len(self.groups) - 1, -1, -1):
+            group = self.groups[index]
+            count = self.executed_count(index)
+            if count:
+                groups.append([(dst, src) for src, dst in reversed(group[:count])])
+        return groups
+    
+    def remaining_groups(self):
+        """生成继续执行本批次所需的步骤组（每组尚未执行的步骤）及其组号"""
+        remaining = []
+        for index, group in enumerate(self.groups):
+            count = self.executed_count(index)
+            if count < len(group):
+                remaining.append((index, count))
+        return remaining
+
+class RenameJournal:
+    """只追加的重命名日志（JSON Lines）
+    
+    执行前先写入完整的计划并 fsync；执行过程中每完成一组步骤追加一条记录，
+    记录先写入缓冲区，每 sync_every 条或批次结束时再 flush + fsync，对重命名循环的影响很小。
+    程序崩溃后可根据日志和磁盘状态继续执行或撤销未完成的批次。
+    """
+    def __init__(self, file_path, sync_every=1000):
+        self.file_path = file_path
+        self.sync_every = sync_every
+        self._file = None
+        self._pending = 0
+        self._lock = threading.Lock()
+    
+    def _write(self, record, sync=False):
+        if self._file is None:
+            self._file = open(self.file_path, 'a', encoding='utf-8')
+        self._file.write(json.dumps(record, ensure_ascii=False, separators=(',', ':')) + '\n')
+        self._pending += 1
+        if sync or self._pending >= self.sync_every:
+            self._sync()
+    
+    def _sync(self):
+        self._file.flush()
+        os.fsync(self._file.fileno())
+        self._pending = 0
+    
+    def begin_batch(self, groups, undo_of=None):
+        """写入计划，返回批次号；groups 中的步骤为 (原路径, 目标路径, ...)"""
+        batch_id = os.urandom(16).hex()
+        identities = {}
+        for index, group in enumerate(groups):
+            if len(group) > 1 and group[-1][0] == group[0][1]:
+                identities[str(index)] = _identity(group[0][0])
+        record = {
+            'op': 'begin',
+            'batch': batch_id,
+            'time': time.time(),
+            'undo_of': undo_of,
+            'groups': [[[step[0], step[1]] for step in group] for group in groups],
+            'identities': identities,
+        }
+        with self._lock:
+            self._write(record, sync=True)
+        return batch_id
+    
+    def record_group(self, batch_id, index, executed):
+        """记录第 index 组已执行的步骤数，可在多个线程中调用"""
+        with self._lock:
+            self._write({'op': 'group', 'batch': batch_id, 'index': index, 'executed': executed})
+    
+    def commit_batch(self, batch_id):
+        with self._lock:
+            self._write({'op': 'commit', 'batch': batch_id}, sync=True)
+    
+    def abort_batch(self, batch_id):
+        """放弃未完成的批次，之后不再提示继续或撤销"""
+        with self._lock:
+            self._write({'op': 'abort', 'batch': batch_id}, sync=True)
+    
+    def sync(self):
+        """立即把已写入的记录刷新到磁盘"""
+        with self._lock:
+            if self._file is not None:
+                self._sync()
+    
+    def close(self):
+        with self._lock:
+            if self._file is not None:
+                self._sync()
+                self._file.close()
+                self._file = None
+    
+    def read_batches(self):
+        """读取日志中的全部批次，按写入顺序返回；忽略崩溃时写了一半的行"""
+        batches = {}
+        if not os.path.exists(self.file_path):
+            return []
+        with self._lock:
+            if self._file is not None:
+                self._file.flush()
+        with open(self.file_path, 'r', encoding='utf-8') as f:
+            for line in f:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                op = record.get('op')
+                if op == 'begin':
+                    identities = {int(index): tuple(identity) if identity else None
+                                  for index, identity in record.get('identities', {}).items()}
+                    batch = JournalBatch(record['batch'],
+                                         [[tuple(step) for step in group] for group in record['groups']],
+                                         record.get('undo_of'), record.get('time', 0), identities)
+                    batches[batch.id] = batch
+                    if batch.undo_of in batches:
+                        batches[batch.undo_of].undone_by = batch.id
+                    continue
+                batch = batches.get(record.get('batch'))
+                if batch is None:
+                    continue
+                if op == 'group':
+                    batch.done[record['index']] = record['executed']
+                elif op == 'commit':
+                    batch.committed = True
+                elif op == 'abort':
+                    batch.aborted = True
+        return list(batches.values())
+    
+    def incomplete_batches(self):
+        return [batch for batch in self.read_batches() if not batch.is_complete]
+    
+    def last_undoable_batch(self):
+        """最近一次已完成、未被撤销、且本身不是撤销操作的批次"""
+        for batch in reversed(self.read_batches()):
+            if batch.committed and batch.undone_by is None and batch.undo_of is None:
+                return batch
+        return None
+    
+    def trim(self, keep=20):
+        """只保留最近 keep 个批次，防止日志无限增长；未完成的批次总是保留"""
+        batches = self.read_batches()
+        if len(batches) <= keep:
+            return
+        kept = {batch.id for batch in batches[-keep:]}
+        kept.update(batch.id for batch in batches if not batch.is_complete)
+        self.close()
+        temp_path = self.file_path + '.tmp'
+        with open(self.file_path, 'r', encoding='utf-8') as src, \
+                open(temp_path, 'w', encoding='utf-8') as dst:
+            for line in src:
+                try:
+                    record = json.loads(line)
+                except ValueError:
+                    continue
+                if record.get('batch') in kept:
+                    dst.write(line)
+            dst.flush()
+            os.fsync(dst.fileno())
+        os.replace(temp_path, self.file_path)
+
+def run_journaled(groups, journal, undo_of=None, rename=os.rename, progress=None):
+    """按日志执行只包含路径的步骤组（撤销或继续未完成的批次），返回 (成功步骤数, 错误列表)
+    
+    目标已存在时跳过该组剩余步骤，避免覆盖其他文件。
+    """
+    batch_id = journal.begin_batch(groups, undo_of=undo_of)
+    success_count = 0
+    errors = []
+    total = sum(len(group) for group in groups)
+    for index, group in enumerate(groups):
+        executed = _run_steps(group, rename, errors)
+        success_count += executed
+        journal.record_group(batch_id, index, executed)
+        if progress:
+            progress(success_count, total)
+    journal.commit_batch(batch_id)
+    return success_count, errors
+
+def resume_batch(batch, journal, rename=os.rename, progress=None):
+    """继续执行未完成的批次，返回 (成功步骤数, 错误列表)"""
+    success_count = 0
+    errors = []
+    remaining = batch.remaining_groups()
+    total = sum(len(batch.groups[index]) - count for index, count in remaining)
+    for index, count in remaining:
+        executed = _run_steps(batch.groups[index][count:], rename, errors)
+        success_count += executed
+        journal.record_group(batch.id, index, count + executed)
+        if progress:
+            progress(success_count, total)
+    journal.commit_batch(batch.id)
+    return success_count, errors
+
+def undo_batch(batch, journal, rename=os.rename, progress=None):
+    """撤销批次中已执行的步骤；未完成的批次会先标记为放弃"""
+    if not batch.is_complete:
+        journal.abort_batch(batch.id)
+    return run_journaled(batch.undo_groups(), journal, undo_of=batch.id, rename=rename, progress=progress)
+
+def _identity(path):
+    try:
+        stat = os.lstat(path)
+    except OSError:
+        return None
+    return (stat.st_dev, stat.st_ino)
+
+def _run_steps(steps, rename, errors):
+    executed = 0
+    for src, dst in steps:
+        if os.path.lexists(dst):
+            errors.append(f'文件已存在: {os.path.basename(dst)}')
+            break
+        try:
+            rename(src, dst)
+        except OSError as e:
+            errors.append(f'重命名失败 {os.path.basename(src)}: {str(e)}')
+            break
+        executed += 1
+    return executed
\ No newline at end of file
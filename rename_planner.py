@@ -0,0 +1,196 @@
+import os
+from name_validation import is_case_insensitive
+
+class RenamePlan:
+    """重命名计划
+    
+    groups：互不依赖的步骤组列表，每组内的步骤必须按顺序执行；
+    每个步骤为 (原路径, 目标路径, file_info)，file_info 为 None 表示移动到临时名称的中间步骤。
+    errors：规划阶段即可发现的错误（目标重名、目标已被其他文件占用等），对应的文件不会出现在 groups 中。
+    groups 按所在目录的深度从深到浅排列，同一深度的组构成一轮（wave），上一轮全部完成后才能执行下一轮，
+    避免包含子目录时上层文件夹先改名导致下层路径失效。
+    """
+    def __init__(self):
+        self.groups = []
+        self.errors = []
+    
+    @property
+    def steps(self):
+        return [step for group in self.groups for step in group]
+    
+    @property
+    def file_count(self):
+        return sum(1 for group in self.groups for step in group if step[2] is not None)
+    
+    @property
+    def waves(self):
+        """每一轮在 groups 中的 (起始下标, 结束下标)"""
+        waves = []
+        start = 0
+        for index in range(1, len(self.groups) + 1):
+            if index == len(self.groups) or group_depth(self.groups[index]) != group_depth(self.groups[start]):
+                waves.append((start, index))
+                start = index
+        return waves
+
+def group_depth(group):
+    """步骤组所在目录相对于导入目录的深度；每组最后一步总是对应实际文件"""
+    relative_dir = group[-1][2]['relative_dir']
+    return relative_dir.count(os.sep) + 1 if relative_dir else 0
+
+def plan_renames(files):
+    """根据 files 中待修改的文件生成重命名计划，在任何磁盘操作之前完成
+    
+    通过哈希索引在 O(n) 内找出重复的目标名称和与现有文件的冲突，
+    并把互相占用名称的重命名（如 a->b、b->a）排好顺序，循环依赖借助临时名称打破。
+    不区分大小写的目录中名称一律转为小写后比较，只改变大小写的重命名借助临时名称完成，
+    目标与未加载的文件仅大小写不同时视为已存在，不会覆盖该文件。
+    """
+    plan = RenamePlan()
+    
+    # 每个目录只读取一次现有名称，不区分大小写的目录保存小写形式
+    existing = {}
+    folded = set()
+    for directory in {file_info['directory'] for file_info in files
+                      if file_info['original_name'] != file_info['new_name']}:
+        try:
+            names = set(os.listdir(directory))
+        except OSError:
+            names = set()
+        if is_case_insensitive(directory, names):
+            folded.add(directory)
+            names = {name.lower() for name in names}
+        existing[directory] = names
+    
+    def key(directory, name):
+        return os.path.join(directory, name.lower() if directory in folded else name)
+    
+    # 原路径的比较键 -> (目标路径的比较键, 原路径, 目标路径, file_info)
+    moves = {}
+    targets = {}
+    for file_info in files:
+        if file_info['original_name'] == file_info['new_name']:
+            continue
+        directory = file_info['directory']
+        src = key(directory, file_info['original_name'])
+        dst = key(directory, file_info['new_name'])
+        moves[src] = (dst, file_info['path'], os.path.join(directory, file_info['new_name']), file_info)
+        targets.setdefault(dst, []).append(src)
+    
+    # 被拒绝的文件保持原名，以其原路径为目标的重命名随之无法执行，沿依赖关系逐个传播
+    rejected = []
+    def reject(src, message):
+        plan.errors.append(message)
+        del moves[src]
+        rejected.append(src)
+    
+    # 同一批次中多个文件指向同一个目标
+    for dst, sources in targets.items():
+        if len(sources) > 1:
+            for src in sources:
+                reject(src, f'目标名称重复: {moves[src][3]["new_name"]}')
+    
+    # 目标被不参与本次重命名的文件占用
+    for src, (dst, _, _, file_info) in list(moves.items()):
+        directory = file_info['directory']
+        name = file_info['new_name']
+        if dst not in moves and (name.lower() if directory in folded else name) in existing[directory]:
+            reject(src, f'文件已存在: {name}')
+    
+    while rejected:
+        for waiting in targets.get(rejected.pop(), ()):
+            if waiting in moves:
+                reject(waiting, f'文件已存在: {moves[waiting][3]["new_name"]}')
+    
+    # 目标互不相同，每个原路径最多被一个重命名作为目标，依赖关系只构成链和环（只改变大小写时为单个文件的环）
+    targeted = {dst for dst, _, _, _ in moves.values() if dst in moves}
+    visited = set()
+    
+    # 链：从原路径不被占用的一端开始，沿依赖方向收集，再倒序执行
+    for src in moves:
+        if src in targeted or src in visited:
+            continue
+        chain = []
+        current = src
+        while current is not None:
+            visited.add(current)
+            dst, src_path, dst_path, file_info = moves[current]
+            chain.append((src_path, dst_path, file_info))
+            current = dst if dst in moves else None
+        chain.reverse()
+        plan.groups.append(chain)
+    
+    # 环：先把其中一个文件移到临时名称，腾出原名称后依次执行，最后从临时名称移到目标
+    for src in moves:
+        if src in visited:
+            continue
+        cycle = []
+        current = src
+        while current not in visited:
+            visited.add(current)
+            cycle.append(current)
+            current = moves[current][0]
+        _, first_src, first_dst, first_info = moves[cycle[0]]
+        temp_path = _temp_path(first_info['directory'], existing[first_info['directory']])
+        group = [(first_src, temp_path, None)]
+        for current in reversed(cycle[1:]):
+            _, src_path, dst_path, file_info = moves[current]
+            group.append((src_path, dst_path, file_info))
+        group.append((temp_path, first_dst, first_info))
+        plan.groups.append(group)
+    
+    plan.groups.sort(key=group_depth, reverse=True)
+    return plan
+
+def _temp_path(directory, existing_names):
+    while True:
+        name = f'.rename_tmp_{os.urandom(6).hex()}'
+        if name not in existing_names:
+            existing_names.add(name)
+            return os.path.join(directory, name)
+
+def execute_group(group, rename=os.rename):
+    """按顺序执行一组重命名步骤，并更新成功文件的 original_name
+    
+    返回 (成功重命名的文件数, 错误信息或 None, 最终保留在磁盘上的步骤数)。某一步失败时停止执行该组的后续步骤；
+    如果该组是借助临时名称的环，则按相反顺序撤销已完成的步骤，避免文件停留在临时名称。
+    与 rename_journal 相同，执行每一步前确认目标不存在（规划后才出现的文件），os.rename 在部分系统上会直接覆盖目标。
+    """
+    completed = []
+    error = None
+    for src, dst, file_info in group:
+        name = file_info['original_name'] if file_info is not None else os.path.basename(src)
+        if os.path.lexists(dst) and not _same_file(src, dst):
+            error = f'文件已存在: {os.path.basename(dst)}'
+            break
+        try:
+            rename(src, dst)
+        except OSError as e:
+            error = f'重命名失败 {name}: {str(e)}'
+            break
+        completed.append((src, dst, file_info))
+    
+    if error is not None and group[0][2] is None:
+        # 恢复失败时，未恢复的步骤仍保留在磁盘上，对应文件的 original_name 照常更新
+        while completed:
+            src, dst, _ = completed[-1]
+            try:
+                rename(dst, src)
+            except OSError:
+                error += f'（{os.path.basename(dst)} 未能恢复为 {os.path.basename(src)}）'
+                break
+            completed.pop()
+    
+    done = 0
+    for _, _, file_info in completed:
+        if file_info is not None:
+            file_info['original_name'] = file_info['new_name']
+            done += 1
+    return done, error, len(completed)
+
+def _same_file(src, dst):
+    """不区分大小写的文件系统上 dst 可能就是 src 本身（只改变大小写）"""
+    try:
+        return os.path.samestat(os.lstat(src), os.lstat(dst))
+    except OSError:
+        return False
\ No newline at end of file
@@ -1,36 +1,237 @@
 import re
-from datetime import datetime
-import uuid
 import os
+from datetime import datetime
+from functools import lru_cache
+from itertools import repeat
+
+# 模板标签：<##:i> 编号、<uuid[:n][:upper/:lower]>、<name/ext[:upper/:lower]> 及其他模板变量
+_TEMPLATE_TAG = re.compile(
+    r'<(?:(?P<number>#+)(?::(?P<start>[0-9]+))?'
+    r'|(?P<uuid>uuid)(?::(?P<uuid_length>\d+))?(?::(?P<uuid_case>upper|lower))?'
+    r'|(?P<case_var>name|ext)(?::(?P<case>upper|lower))?'
+    r'|(?P<var>[a-z.]+))>')
+
+# pad_numbers 查找的数字序列
+_DIGITS = re.compile(r'\d+')
+# Windows 文件名不能包含的字符；在所有系统上都替换，生成的名称可以复制到其他系统
+_INVALID_FILENAME_CHARS = re.compile(r'[<>:"/\\|?*]')
+_SEPARATORS = tuple(sep for sep in (os.sep, os.altsep) if sep)
+
+def _splitext(name):
+    """与 os.path.splitext 相同；不含路径分隔符时（绝大多数情况）不调用通用实现"""
+    for sep in _SEPARATORS:
+        if sep in name:
+            return os.path.splitext(name)
+    dot = name.rfind('.')
+    if dot <= 0 or (name[dot - 1] == '.' and not name[:dot].strip('.')):
+        return name, ''
+    return name[:dot], name[dot:]
+
+def split_names(names):
+    """把一列文件名拆分为主名列和扩展名列"""
+    pairs = list(map(_splitext, names))
+    return [pair[0] for pair in pairs], [pair[1] for pair in pairs]
+
+@lru_cache(maxsize=None)
+def _number_padder(width):
+    """生成把匹配到的数字补零到 width 位的替换函数，同一宽度只创建一次"""
+    def pad_match(match):
+        return str(int(match.group())).zfill(width)
+    return pad_match
+
+class TemplatePlan:
+    """编译后的命名模板
+    
+    segments 中字符串为原样输出的文本，其余为 (file_info, index, name, ext) -> str 的函数，
+    对每个文件只需依次拼接，不再重复解析模板和多轮字符串替换。
+    columns 与 segments 一一对应，为按列生成整列结果的函数 (files, first_index, names, exts) -> list，
+    供 render_column 使用，编号、主名和扩展名等不依赖文件信息的变量不再逐个文件调用。
+    """
+    def __init__(self, template, template_variables):
+        self.segments = []
+        self.columns = []
+        pos = 0
+        for match in _TEMPLATE_TAG.finditer(template):
+            segment = self._compile_tag(match, template_variables)
+            if segment is None:
+                # 未知变量按原文保留
+                continue
+            self._add_literal(template[pos:match.start()])
+            self.segments.append(segment)
+            self.columns.append(self._compile_column(match, segment))
+            pos = match.end()
+        self._add_literal(template[pos:])
+    
+    def _add_literal(self, text):
+        if not text:
+            return
+        if self.segments and isinstance(self.segments[-1], str):
+            self.segments[-1] += text
+            self.columns[-1] = self.segments[-1]
+        else:
+            self.segments.append(text)
+            self.columns.append(text)
+    
+    @staticmethod
+    def _compile_column(match, segment):
+        if match.group('number'):
+            width = len(match.group('number'))
+            start = int(match.group('start')) if match.group('start') else 1
+            return lambda files, first_index, names, exts: [
+                str(number).zfill(width) for number in range(first_index + start, first_index + start + len(files))]
+        
+        if match.group('case_var'):
+            is_name = match.group('case_var') == 'name'
+            case = match.group('case')
+            def case_column(files, first_index, names, exts):
+                values = names if is_name else [ext[1:] for ext in exts]
+                if case == 'upper':
+                    return [value.upper() for value in values]
+                if case == 'lower':
+                    return [value.lower() for value in values]
+                return values
+            return case_column
+        
+        # uuid 及其他模板变量逐个文件计算
+        return lambda files, first_index, names, exts: [
+            segment(file_info, first_index + offset, name, ext)
+            for offset, (file_info, name, ext) in enumerate(zip(files, names, exts))]
+    
+    @staticmethod
+    def _compile_tag(match, template_variables):
+        if match.group('number'):
+            width = len(match.group('number'))
+            start = int(match.group('start')) if match.group('start') else 1
+            return lambda file_info, index, name, ext: str(index + start).zfill(width)
+        
+        if match.group('uuid'):
+            length = int(match.group('uuid_length')) if match.group('uuid_length') else 32
+            upper = match.group('uuid_case') == 'upper'
+            import uuid  # 只有模板中使用 <uuid> 时才需要
+            def uuid_segment(file_info, index, name, ext):
+                uuid_str = uuid.uuid4().hex[:length]
+                return uuid_str.upper() if upper else uuid_str
+            return uuid_segment
+        
+        if match.group('case_var'):
+            if match.group('case_var') == 'name':
+                value = lambda file_info, index, name, ext: name
+            else:
+                value = lambda file_info, index, name, ext: ext[1:]
+            case = match.group('case')
+            if case == 'upper':
+                return lambda file_info, index, name, ext: value(file_info, index, name, ext).upper()
+            if case == 'lower':
+                return lambda file_info, index, name, ext: value(file_info, index, name, ext).lower()
+            return value
+        
+        variable = template_variables.get(match.group('var'))
+        if variable is None:
+            return None
+        return lambda file_info, index, name, ext: variable(file_info)
+    
+    def render(self, file_info, index, name, ext):
+        """按计划生成新文件名，name/ext 为已拆分的原文件名和扩展名"""
+        return ''.join([segment if segment.__class__ is str else segment(file_info, index, name, ext)
+                        for segment in self.segments])
+    
+    def render_column(self, files, first_index, names, exts):
+        """按列生成 files 的新文件名，第 i 个文件的序号为 first_index + i"""
+        if not self.columns:
+            return [''] * len(files)
+        columns = [repeat(column, len(files)) if column.__class__ is str
+                   else column(files, first_index, names, exts) for column in self.columns]
+        if len(columns) == 1:
+            return list(columns[0])
+        return list(map(''.join, zip(*columns)))
+
+def _format_now(fmt):
+    return datetime.now().strftime(fmt)
+
+def _format_mtime(file_info, fmt):
+    return datetime.fromtimestamp(file_info['mtime']).strftime(fmt)
 
 class RenameRuleProcessor:
     def __init__(self):
         self.template_variables = {
             'name': lambda file_info: os.path.splitext(file_info['original_name'])[0],
             'ext': lambda file_info: os.path.splitext(file_info['original_name'])[1][1:],
-            'date': lambda _: datetime.now().strftime('%Y.%m.%d'),
-            'date.modify': lambda file_info: datetime.fromtimestamp(os.path.getmtime(file_info['path'])).strftime('%Y.%m.%d'),
-            'time': lambda _: datetime.now().strftime('%Hh%Mm%Ss'),
-            'time.modify': lambda file_info: datetime.fromtimestamp(os.path.getmtime(file_info['path'])).strftime('%Hh%Mm%Ss'),
+            # 所在文件夹名称；包含子目录时的相对目录，路径分隔符替换为 _
+            'dir': lambda file_info: os.path.basename(os.path.normpath(file_info['directory'])),
+            'relpath': lambda file_info: file_info['relative_dir'].replace(os.sep, '_').replace('/', '_'),
+            'date': lambda _: _format_now('%Y.%m.%d'),
+            # 修改时间使用加载目录时记录的 mtime，不再逐个文件访问磁盘
+            'date.modify': lambda file_info: _format_mtime(file_info, '%Y.%m.%d'),
+            'time': lambda _: _format_now('%Hh%Mm%Ss'),
+            'time.modify': lambda file_info: _format_mtime(file_info, '%Hh%Mm%Ss'),
         }
+        self._template_cache = {}
+        self._regex_cache = {}
     
-    def batch_replace(self, file_info, old_str, new_str='', include_ext=True):
+    def prepare_rule(self, rule):
+        """处理一批文件之前编译规则中的正则表达式和模板并检查参数
+        
+        参数无效时立即抛出异常（如正则表达式或替换字符串无效时为 re.error），不会在每个文件上重复出错。
+        """
+        method, params = rule
+        if method == 'apply_regex':
+            # 对空字符串替换一次，同时检查替换字符串中的分组引用
+            self.compile_regex(params['pattern']).sub(params['repl'], '')
+        elif method == 'apply_template':
+            self.compile_template(params['template'])
+        elif not callable(getattr(self, method, None)):
+            raise ValueError(f'未知的规则：{method}')
+    
+    def apply_rule(self, file_info, rule, index=0, current_name=None):
+        """按规则描述处理单个文件
+        
+        rule 为 (方法名, 参数字典)，如 ('batch_replace', {'old_str': 'a', 'new_str': 'b'})，
+        方法名为本类的规则方法之一；index 为文件序号，仅命名模板使用。
+        current_name 为规则作用的文件名，默认为原文件名，规则链中为上一条规则的结果。
+        """
+        method, params = rule
+        if method == 'apply_template':
+            return self.apply_template(file_info, index=index, current_name=current_name, **params)
+        return getattr(self, method)(file_info, current_name=current_name, **params)
+    
+    def apply_rule_column(self, files, names, rule, first_index=0):
+        """按列对一批文件执行规则，与对每个文件调用 apply_rule 的结果相同
+        
+        names 为规则作用的文件名列（与 files 对应），返回新的文件名列；第 i 个文件的序号为 first_index + i。
+        整列只分派一次方法、拆分一次扩展名，逐个文件的部分只剩字符串操作本身。
+        """
+        method, params = rule
+        if method == 'apply_template':
+            return self.apply_template_column(files, names, first_index=first_index, **params)
+        return getattr(self, method + '_column')(names, **params)
+    
+    def batch_replace(self, file_info, old_str, new_str='', include_ext=True, current_name=None):
         """批量替换指定字符串"""
+        source = file_info['original_name'] if current_name is None else current_name
         if not old_str:
-            return file_info['original_name']
+            return source
         
         if include_ext:
-            name = file_info['original_name']
-            return name.replace(old_str, new_str)
+            return source.replace(old_str, new_str)
         else:
-            name, ext = os.path.splitext(file_info['original_name'])
+            name, ext = os.path.splitext(source)
             return name.replace(old_str, new_str) + ext
     
-    def insert_text(self, file_info, text, position='start', n=0, target='', include_ext=True):
+    def batch_replace_column(self, names, old_str, new_str='', include_ext=True):
+        """batch_replace 的按列版本"""
+        if not old_str:
+            return list(names)
+        if include_ext:
+            return [name.replace(old_str, new_str) for name in names]
+        stems, exts = split_names(names)
+        return [stem.replace(old_str, new_str) + ext for stem, ext in zip(stems, exts)]
+    
+    def insert_text(self, file_info, text, position='start', n=0, target='', include_ext=True, current_name=None):
         """在指定位置插入文本
         position: 'start'/'end'/'nth'/'nth_last'/'before'/'after'
         """
-        name, ext = os.path.splitext(file_info['original_name'])
+        source = file_info['original_name'] if current_name is None else current_name
+        name, ext = os.path.splitext(source)
         result = name
         
         if position == 'start':
@@ -60,80 +261,102 @@ class RenameRuleProcessor:
             return result + ext
         return result + (ext if not include_ext else '')
     
-    def pad_numbers(self, file_info, width, include_ext=True):
+    def insert_text_column(self, names, text, position='start', n=0, target='', include_ext=True):
+        """insert_text 的按列版本；与 insert_text 相同，include_ext=True 时结果不含扩展名"""
+        stems, exts = split_names(names)
+        if position == 'start':
+            result = [text + stem for stem in stems]
+        elif position == 'end':
+            result = [stem + text for stem in stems]
+        elif position == 'nth':
+            result = [stem[:n] + text + stem[n:] for stem in stems]
+        elif position == 'nth_last':
+            result = []
+            for stem in stems:
+                pos = max(len(stem) - n, 0)
+                result.append(stem[:pos] + text + stem[pos:])
+        elif position == 'before' and target:
+            result = [stem.replace(target, text + target) for stem in stems]
+        elif position == 'after' and target:
+            result = [stem.replace(target, target + text) for stem in stems]
+        else:
+            result = stems
+        if not include_ext:
+            return [stem + ext for stem, ext in zip(result, exts)]
+        return result
+    
+    def pad_numbers(self, file_info, width, include_ext=True, current_name=None):
         """数字补零处理"""
-        name, ext = os.path.splitext(file_info['original_name'])
-        
-        def pad_match(match):
-            return str(int(match.group())).zfill(width)
+        source = file_info['original_name'] if current_name is None else current_name
+        name, ext = os.path.splitext(source)
         
-        result = re.sub(r'\d+', pad_match, name)
+        result = _DIGITS.sub(_number_padder(width), name)
         if not include_ext:
             # 如果不包含扩展名，则强制使用原始扩展名
             return result + ext
         return result + ext
     
+    def pad_numbers_column(self, names, width, include_ext=True):
+        """pad_numbers 的按列版本"""
+        sub = _DIGITS.sub
+        pad_match = _number_padder(width)
+        stems, exts = split_names(names)
+        return [sub(pad_match, stem) + ext for stem, ext in zip(stems, exts)]
+    
     def sanitize_filename(self, filename):
-        """确保文件名合法"""
-        # Windows文件名不能包含的字符
-        invalid_chars = r'[<>:"/\\|?*]'
-        # 替换非法字符为下划线
-        return re.sub(invalid_chars, '_', filename)
+        """确保文件名合法：把 Windows 不允许的字符替换为下划线，与当前系统无关"""
+        return _INVALID_FILENAME_CHARS.sub('_', filename)
 
-    def apply_template(self, file_info, template, index=0, include_ext=True):
+    def compile_template(self, template):
+        """将命名模板编译为文本段和变量段组成的执行计划，同一模板只解析一次"""
+        plan = self._template_cache.get(template)
+        if plan is None:
+            if len(self._template_cache) >= 32:
+                self._template_cache.clear()
+            plan = self._template_cache[template] = TemplatePlan(template, self.template_variables)
+        return plan
+    
+    def compile_regex(self, pattern):
+        """编译正则表达式，同一表达式只编译一次；表达式无效时抛出 re.error"""
+        regex = self._regex_cache.get(pattern)
+        if regex is None:
+            if len(self._regex_cache) >= 32:
+                self._regex_cache.clear()
+            regex = self._regex_cache[pattern] = re.compile(pattern)
+        return regex
+    
+    def apply_template(self, file_info, template, index=0, include_ext=True, current_name=None):
         """应用命名模板"""
-        name, ext = os.path.splitext(file_info['original_name'])
-        result = template
-        
-        # 处理编号
-        number_pattern = r'<#+(?::([0-9]+))?>'
-        for match in re.finditer(number_pattern, template):
-            hash_part = match.group().split(':')[0]
-            width = hash_part.count('#')
-            start = int(match.group(1)) if match.group(1) else 1
-            number = str(index + start).zfill(width)
-            result = result.replace(match.group(), number)
-        
-        # 处理UUID
-        uuid_pattern = r'<uuid(?::(\d+))?(?::(upper|lower))?>'
-        for match in re.finditer(uuid_pattern, result):
-            length = int(match.group(1)) if match.group(1) else 32
-            style = match.group(2)
-            uuid_str = str(uuid.uuid4()).replace('-', '')[:length]
-            if style == 'upper':
-                uuid_str = uuid_str.upper()
-            elif style == 'lower':
-                uuid_str = uuid_str.lower()
-            result = result.replace(match.group(), uuid_str)
-        
-        # 处理日期时间格式
-        # 替换未带格式化参数的变量
-        for var_name in self.template_variables:
-            simple_tag = f'<{var_name}>'
-            if simple_tag in result:
-                value = self.template_variables[var_name](file_info)
-                result = result.replace(simple_tag, value)
-
-        
-        # 处理大小写转换
-        for var_name in ['name', 'ext']:
-            base_value = self.template_variables[var_name](file_info)
-            result = result.replace(f'<{var_name}:upper>', base_value.upper())
-            result = result.replace(f'<{var_name}:lower>', base_value.lower())
-            result = result.replace(f'<{var_name}>', base_value)
+        source = file_info['original_name'] if current_name is None else current_name
+        name, ext = os.path.splitext(source)
+        result = self.compile_template(template).render(file_info, index, name, ext)
         
         if not include_ext:
             # 如果不包含扩展名，则强制使用原始扩展名
             return result + ext
         return result
     
-    def apply_regex(self, file_info, pattern, repl, include_ext=True):
-        """应用正则表达式替换"""
-        try:
-            if include_ext:
-                return re.sub(pattern, repl, file_info['original_name'])
-            else:
-                name, ext = os.path.splitext(file_info['original_name'])
-                return re.sub(pattern, repl, name) + ext
-        except re.error:
-            return file_info['original_name']
\ No newline at end of file
+    def apply_template_column(self, files, names, template, first_index=0, include_ext=True):
+        """apply_template 的按列版本，第 i 个文件的序号为 first_index + i"""
+        stems, exts = split_names(names)
+        result = self.compile_template(template).render_column(files, first_index, stems, exts)
+        if not include_ext:
+            return [name + ext for name, ext in zip(result, exts)]
+        return result
+    
+    def apply_regex(self, file_info, pattern, repl, include_ext=True, current_name=None):
+        """应用正则表达式替换，表达式无效时抛出 re.error"""
+        source = file_info['original_name'] if current_name is None else current_name
+        regex = self.compile_regex(pattern)
+        if include_ext:
+            return regex.sub(repl, source)
+        name, ext = os.path.splitext(source)
+        return regex.sub(repl, name) + ext
+    
+    def apply_regex_column(self, names, pattern, repl, include_ext=True):
+        """apply_regex 的按列版本，表达式无效时抛出 re.error"""
+        sub = self.compile_regex(pattern).sub
+        if include_ext:
+            return [sub(repl, name) for name in names]
+        stems, exts = split_names(names)
+        return [sub(repl, stem) + ext for stem, ext in zip(stems, exts)]
\ No newline at end of file
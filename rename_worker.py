@@ -0,0 +1,25 @@
+from PyQt6.QtCore import QObject, pyqtSignal
+
+class RenameWorker(QObject):
+    """在工作线程中执行重命名，避免高延迟文件系统上界面卡顿
+    
+    task 为 FileManager.apply_changes、rename_journal.undo_batch 等返回 (成功数, 错误列表) 的函数，
+    调用时附加 progress 参数。
+    progress(int, int)：已完成文件数、文件总数
+    finished(int, list)：成功数、错误列表
+    """
+    progress = pyqtSignal(int, int)
+    finished = pyqtSignal(int, list)
+    
+    def __init__(self, task, *args, **kwargs):
+        super().__init__()
+        self.task = task
+        self.args = args
+        self.kwargs = kwargs
+    
+    def run(self):
+        try:
+            success_count, errors = self.task(*self.args, progress=self.progress.emit, **self.kwargs)
+        except Exception as e:
+            success_count, errors = 0, [f'重命名失败: {str(e)}']
+        self.finished.emit(success_count, errors)
\ No newline at end of file
@@ -0,0 +1,123 @@
+import inspect
+import json
+
+from rename_rules import RenameRuleProcessor
+
+# iter_names 每次按列处理的文件数，兼顾按列处理的效率和逐个返回结果时的内存占用
+COLUMN_CHUNK_SIZE = 10000
+
+# 规则方法名与界面中选项卡名称的对应关系
+RULE_LABELS = {
+    'batch_replace': '批量替换',
+    'insert_text': '插入字符',
+    'pad_numbers': '序号补齐',
+    'apply_template': '重新命名',
+    'apply_regex': '正则替换',
+}
+
+def describe_rule(rule):
+    """生成规则的简短说明，用于界面显示"""
+    method, params = rule
+    details = '，'.join(f'{key}={value!r}' for key, value in params.items())
+    return f'{RULE_LABELS.get(method, method)}：{details}'
+
+# 规则方法中由 apply_rule 传入、不属于规则参数的参数
+_CALL_PARAMS = {'self', 'file_info', 'index', 'current_name'}
+
+def check_rule_params(method, params):
+    """按 RenameRuleProcessor 中规则方法的签名检查参数，缺少必需参数或有未知参数时抛出 ValueError"""
+    signature = inspect.signature(getattr(RenameRuleProcessor, method))
+    accepted = [param for name, param in signature.parameters.items() if name not in _CALL_PARAMS]
+    unknown = set(params) - {param.name for param in accepted}
+    if unknown:
+        raise ValueError(f'{RULE_LABELS[method]}规则不支持参数：{"、".join(sorted(unknown))}')
+    missing = [param.name for param in accepted if param.default is param.empty and param.name not in params]
+    if missing:
+        raise ValueError(f'{RULE_LABELS[method]}规则缺少参数：{"、".join(missing)}')
+
+class RulePipeline:
+    """由多条规则组成的重命名规则链
+    
+    每条规则为 (方法名, 参数字典)，与 RenameRuleProcessor.apply_rule 相同。
+    规则按顺序作用在上一条规则的结果上。iter_names 每次取 COLUMN_CHUNK_SIZE 个文件，
+    按列依次执行全部规则，中间结果最多为一批文件的名称列，不会为全部文件生成中间列表。
+    规则链只包含规则本身，可以保存为 JSON 并在其他目录上重复使用。
+    """
+    def __init__(self, rules=None):
+        self.rules = [(method, dict(params)) for method, params in rules or []]
+    
+    def __len__(self):
+        return len(self.rules)
+    
+    def __eq__(self, other):
+        return isinstance(other, RulePipeline) and self.rules == other.rules
+    
+    # 规则链可以修改，按内容比较的对象不能作为字典键
+    __hash__ = None
+    
+    def add_rule(self, rule):
+        method, params = rule
+        if method not in RULE_LABELS:
+            raise ValueError(f'未知的规则：{method}')
+        check_rule_params(method, params)
+        self.rules.append((method, dict(params)))
+    
+    def remove_rule(self, index):
+        del self.rules[index]
+    
+    def clear(self):
+        self.rules = []
+    
+    def prepare(self, processor):
+        """处理一批文件之前编译并检查全部规则，参数无效时抛出异常，见 RenameRuleProcessor.prepare_rule"""
+        for rule in self.rules:
+            processor.prepare_rule(rule)
+    
+    def apply(self, processor, file_info, index=0):
+        """对单个文件依次执行全部规则，返回新文件名"""
+        name = file_info['original_name']
+        for rule in self.rules:
+            name = processor.apply_rule(file_info, rule, index, current_name=name)
+        return name
+    
+    def apply_column(self, processor, files, first_index=0):
+        """按列对一批文件依次执行全部规则，返回新文件名列表，第 i 个文件的序号为 first_index + i
+        
+        每条规则对整列只调用一次，见 RenameRuleProcessor.apply_rule_column；调用前需先 prepare。
+        """
+        names = [file_info['original_name'] for file_info in files]
+        for rule in self.rules:
+            names = processor.apply_rule_column(files, names, rule, first_index)
+        return names
+    
+    def iter_names(self, processor, files):
+        """逐个生成 files 中每个文件的新文件名；开始之前检查全部规则，规则无效时不会处理任何文件
+        
+        内部每 COLUMN_CHUNK_SIZE 个文件按列计算一次。
+        """
+        self.prepare(processor)
+        for start in range(0, len(files), COLUMN_CHUNK_SIZE):
+            yield from self.apply_column(processor, files[start:start + COLUMN_CHUNK_SIZE], start)
+    
+    def to_dict(self):
+        return {'rules': [{'method': method, 'params': params} for method, params in self.rules]}
+    
+    @classmethod
+    def from_dict(cls, data):
+        pipeline = cls()
+        for step, rule in enumerate(data.get('rules', []), 1):
+            try:
+                pipeline.add_rule((rule.get('method'), rule.get('params', {})))
+            except ValueError as e:
+                # 规则链文件可能是手工编辑的，指出出错的是第几条规则
+                raise ValueError(f'第 {step} 条规则无效：{e}') from e
+        return pipeline
+    
+    def save(self, file_path):
+        with open(file_path, 'w', encoding='utf-8') as f:
+            json.dump(self.to_dict(), f, ensure_ascii=False, indent=2)
+    
+    @classmethod
+    def load(cls, file_path):
+        with open(file_path, 'r', encoding='utf-8') as f:
+            return cls.from_dict(json.load(f))
\ No newline at end of file
@@ -1,5 +1,6 @@
 from PyQt6.QtWidgets import (QDialog, QVBoxLayout, QHBoxLayout, QLabel,
-                             QSpinBox, QComboBox, QPushButton, QColorDialog)
+                             QSpinBox, QComboBox, QPushButton, QColorDialog,
+                             QCheckBox)
 from PyQt6.QtCore import Qt
 from PyQt6.QtGui import QColor
 
@@ -43,6 +44,30 @@ class SettingsDialog(QDialog):
         color_layout.addWidget(self.color_button)
         layout.addLayout(color_layout)
         
+        # 并发重命名线程数设置
+        threads_layout = QHBoxLayout()
+        threads_label = QLabel('并发重命名线程数：')
+        self.threads_spinbox = QSpinBox()
+        self.threads_spinbox.setRange(1, 64)
+        self.threads_spinbox.setValue(8)
+        threads_layout.addWidget(threads_label)
+        threads_layout.addWidget(self.threads_spinbox)
+        layout.addLayout(threads_layout)
+        
+        # 多进程预览设置
+        self.parallel_check = QCheckBox('文件较多时使用多进程计算重命名预览')
+        layout.addWidget(self.parallel_check)
+        
+        # 目录缓存设置
+        self.cache_check = QCheckBox('缓存目录列表，加快重新打开和刷新大目录')
+        self.cache_check.setChecked(True)
+        layout.addWidget(self.cache_check)
+        
+        # 目录监视设置
+        self.watch_check = QCheckBox('自动同步目录中新增、删除和修改的文件')
+        self.watch_check.setChecked(True)
+        layout.addWidget(self.watch_check)
+        
         # 确定和取消按钮
         buttons_layout = QHBoxLayout()
         ok_button = QPushButton('确定')
@@ -69,7 +94,11 @@ class SettingsDialog(QDialog):
         return {
             'redundancy': self.redundancy_spinbox.value(),
             'sort_method': self.sort_combo.currentText(),
-            'modified_color': self.modified_color
+            'modified_color': self.modified_color.name(),
+            'parallel_preview': self.parallel_check.isChecked(),
+            'rename_threads': self.threads_spinbox.value(),
+            'directory_cache': self.cache_check.isChecked(),
+            'watch_directory': self.watch_check.isChecked()
         }
     
     def set_settings(self, settings):
@@ -78,5 +107,9 @@ class SettingsDialog(QDialog):
         index = self.sort_combo.findText(sort_method)
         if index >= 0:
             self.sort_combo.setCurrentIndex(index)
-        self.modified_color = settings.get('modified_color', QColor(255, 255, 200))
-        self.update_color_button()
\ No newline at end of file
+        self.modified_color = QColor(settings.get('modified_color', '#FFFFC8'))
+        self.update_color_button()
+        self.parallel_check.setChecked(settings.get('parallel_preview', False))
+        self.threads_spinbox.setValue(settings.get('rename_threads', 8))
+        self.cache_check.setChecked(settings.get('directory_cache', True))
+        self.watch_check.setChecked(settings.get('watch_directory', True))
\ No newline at end of file
@@ -0,0 +1,67 @@
+import json
+import os
+import subprocess
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import cli
+
+
+def write_pipeline(path, rules):
+    path.write_text(json.dumps({'rules': rules}), encoding='utf-8')
+    return str(path)
+
+
+def run_script(argv):
+    """在子进程中运行 cli.py，捕获实际的标准输出"""
+    return subprocess.run([sys.executable, cli.__file__, *argv], capture_output=True, text=True, encoding='utf-8')
+
+
+def run_cli(argv, capsys):
+    with pytest.raises(SystemExit) as exc_info:
+        cli.main(argv)
+    return exc_info.value.code, capsys.readouterr().err
+
+
+def test_invalid_regex_in_pipeline_is_rejected_before_loading(tmp_path, capsys, monkeypatch):
+    pipeline = write_pipeline(tmp_path / 'rules.json',
+                              [{'method': 'apply_regex', 'params': {'pattern': '(', 'repl': ''}}])
+    monkeypatch.setattr(cli.FileManager, 'load_directory',
+                        lambda *args, **kwargs: pytest.fail('规则无效时不应加载目录'))
+    code, err = run_cli([str(tmp_path), '--pipeline', pipeline, '--dry-run'], capsys)
+    assert code == 2
+    assert '正则表达式无效' in err
+
+
+def test_valid_pipeline_dry_run(tmp_path):
+    (tmp_path / 'IMG_1.jpg').write_text('')
+    pipeline = write_pipeline(tmp_path / 'rules.json',
+                              [{'method': 'batch_replace', 'params': {'old_str': 'IMG_', 'new_str': 'photo_'}}])
+    result = run_script([str(tmp_path), '--pipeline', pipeline, '--include', '*.jpg', '--dry-run'])
+    assert result.returncode == 0
+    assert result.stdout == 'IMG_1.jpg -> photo_1.jpg\n'
+
+
+def test_recursive_dry_run_prints_relative_paths(tmp_path):
+    for sub in ['a', 'b']:
+        (tmp_path / sub).mkdir()
+        (tmp_path / sub / 'IMG_1.jpg').write_text('')
+    result = run_script([str(tmp_path), '-r', '--replace', 'IMG_', 'photo_', '--dry-run'])
+    assert result.returncode == 0
+    assert sorted(result.stdout.splitlines()) == [
+        f'{os.path.join(sub, "IMG_1.jpg")} -> {os.path.join(sub, "photo_1.jpg")}' for sub in ['a', 'b']]
+
+@pytest.mark.parametrize('rules, message', [
+    ([{'method': 'batch_replace', 'params': {'old_str': 'a', 'new_str': 'b'}},
+      {'method': 'batch_replace', 'params': {'old': 'a', 'new_str': 'b'}}], '第 2 条规则无效：批量替换规则不支持参数：old'),
+    ([{'method': 'pad_numbers', 'params': {}}], '第 1 条规则无效：序号补齐规则缺少参数：width'),
+    ([{'method': 'rename_all', 'params': {}}], '第 1 条规则无效：未知的规则：rename_all'),
+])
+def test_pipeline_params_are_checked_against_rule(tmp_path, capsys, rules, message):
+    pipeline = write_pipeline(tmp_path / 'rules.json', rules)
+    code, err = run_cli([str(tmp_path), '--pipeline', pipeline, '--dry-run'], capsys)
+    assert code == 2
+    assert message in err
\ No newline at end of file
@@ -0,0 +1,83 @@
+import os
+import sqlite3
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from directory_cache import DirectoryCache
+
+
+def age(path, seconds=60):
+    """把修改时间调到整秒的过去时间，同样的参数总是得到同样的修改时间"""
+    past = int(time.time()) // 3600 * 3600 - seconds
+    os.utime(path, (past, past))
+
+
+def scan_mtimes(cache, directory, refresh=False):
+    return {entry.name: entry.stat().st_mtime for entry in cache.scan(str(directory), refresh)}
+
+
+def replace_file(path, text):
+    """写入临时文件再替换，与多数编辑器保存文件的方式相同，得到新的 inode"""
+    temp = path.with_name(path.name + '.tmp')
+    temp.write_text(text)
+    os.replace(temp, path)
+
+
+def make_directory(tmp_path, names):
+    directory = tmp_path / 'files'
+    directory.mkdir()
+    for name in names:
+        (directory / name).write_text(name)
+        age(directory / name, 120)
+    age(directory)
+    return directory
+
+
+def test_relisting_restats_only_replaced_entries(tmp_path):
+    directory = make_directory(tmp_path, ['a.txt', 'b.txt'])
+    cache = DirectoryCache(str(tmp_path / 'cache.sqlite3'))
+    first = scan_mtimes(cache, directory)
+    
+    # b.txt 被替换（新的 inode），a.txt 原地写入（inode 不变）；新增 c.txt 使目录发生变化
+    replace_file(directory / 'b.txt', 'changed')
+    (directory / 'a.txt').write_text('changed')
+    (directory / 'c.txt').write_text('c')
+    age(directory, 30)
+    mtimes = scan_mtimes(cache, directory)
+    assert mtimes['b.txt'] == os.stat(directory / 'b.txt').st_mtime != first['b.txt']
+    assert mtimes['c.txt'] == os.stat(directory / 'c.txt').st_mtime
+    # 类型和 inode 都未变化的条目沿用缓存的修改时间，不调用 stat
+    assert mtimes['a.txt'] == first['a.txt']
+    cache.close()
+
+
+def test_refresh_relists_unchanged_directory_through_cache(tmp_path):
+    directory = make_directory(tmp_path, ['a.txt', 'b.txt'])
+    cache = DirectoryCache(str(tmp_path / 'cache.sqlite3'))
+    first = scan_mtimes(cache, directory)
+    
+    replace_file(directory / 'a.txt', 'changed')
+    (directory / 'b.txt').unlink()
+    age(directory)
+    # 目录修改时间未变化：普通扫描命中缓存，refresh 时重新读取目录并与缓存比较
+    assert scan_mtimes(cache, directory) == first
+    edited = os.stat(directory / 'a.txt').st_mtime
+    assert scan_mtimes(cache, directory, refresh=True) == {'a.txt': edited}
+    assert scan_mtimes(cache, directory) == {'a.txt': edited}
+    cache.close()
+    
+
+def test_cache_from_older_schema_is_rebuilt(tmp_path):
+    directory = make_directory(tmp_path, ['a.txt'])
+    path = str(tmp_path / 'cache.sqlite3')
+    connection = sqlite3.connect(path)
+    connection.execute('CREATE TABLE directories (path TEXT PRIMARY KEY, mtime REAL, scanned_at REAL, '
+                       'last_used REAL, names BLOB, kinds BLOB, mtimes BLOB)')
+    connection.commit()
+    connection.close()
+    cache = DirectoryCache(path)
+    assert list(scan_mtimes(cache, directory)) == ['a.txt']
+    assert list(scan_mtimes(cache, directory)) == ['a.txt']
+    cache.close()
\ No newline at end of file
@@ -0,0 +1,111 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from edit_history import EditHistory
+from file_manager import FileManager, FileRecord
+
+
+def make_manager(count=5, history=None):
+    manager = FileManager()
+    manager.files = [FileRecord('/data', f'file_{i}.txt', False, 0.0) for i in range(count)]
+    if history is not None:
+        manager.history = history
+    return manager
+
+
+def new_names(manager):
+    return [file_info.new_name for file_info in manager.files]
+
+
+def test_undo_redo_restores_each_step():
+    manager = make_manager()
+    original = new_names(manager)
+    manager.rename_file(1, 'one.txt')
+    manager.rename_rows(range(5), [f'r_{i}.txt' for i in range(5)])
+    after_rule = new_names(manager)
+    manager.rename_file(1, 'edited.txt')
+    
+    assert manager.undo_edit() == [1]
+    assert new_names(manager) == after_rule
+    assert manager.undo_edit() == [0, 1, 2, 3, 4]
+    assert new_names(manager) == ['file_0.txt', 'one.txt', 'file_2.txt', 'file_3.txt', 'file_4.txt']
+    assert manager.undo_edit() == [1]
+    assert new_names(manager) == original
+    assert manager.undo_edit() is None
+    
+    assert manager.redo_edit() == [1]
+    assert manager.redo_edit() == [0, 1, 2, 3, 4]
+    assert new_names(manager) == after_rule
+    assert manager.redo_edit() == [1]
+    assert manager.files[1].new_name == 'edited.txt'
+    assert manager.redo_edit() is None
+
+
+def test_new_edit_clears_redo_and_unchanged_rows_are_not_recorded():
+    manager = make_manager()
+    manager.rename_file(0, 'a.txt')
+    manager.undo_edit()
+    manager.rename_file(2, 'c.txt')
+    assert not manager.history.can_redo()
+    # 与当前新名称相同的行不计入步骤
+    assert manager.rename_rows([2, 3], ['c.txt', 'file_3.txt']) == 0
+    assert manager.undo_edit() == [2]
+    assert not manager.history.can_undo()
+
+
+def test_modified_files_follow_undo_and_redo():
+    manager = make_manager()
+    manager.rename_rows([1, 3], ['b.txt', 'd.txt'])
+    assert [file_info.original_name for file_info in manager.modified_files()] == ['file_1.txt', 'file_3.txt']
+    manager.undo_edit()
+    assert manager.modified_files() == []
+    manager.redo_edit()
+    assert len(manager.modified_files()) == 2
+
+
+def test_undo_after_rows_are_reordered():
+    manager = make_manager()
+    manager.rename_file(4, 'last.txt')
+    manager.files.reverse()
+    manager._rows = None
+    # 撤销按记录找到当前行号
+    assert manager.undo_edit() == [0]
+    assert manager.files[0].new_name == 'file_4.txt'
+
+
+def test_oldest_steps_dropped_by_step_and_entry_limits():
+    manager = make_manager(history=EditHistory(max_steps=3))
+    for i in range(5):
+        manager.rename_file(0, f'step_{i}.txt')
+    undone = 0
+    while manager.undo_edit() is not None:
+        undone += 1
+    assert undone == 3
+    assert manager.files[0].new_name == 'step_1.txt'
+    
+    # 交替修改两组行，记录列表不共用；各步项数为 5、5、10、10，上限 25 项时丢弃最早的一步
+    manager = make_manager(10, history=EditHistory(max_entries=25))
+    for i in range(4):
+        rows = range(0, 5) if i % 2 == 0 else range(5, 10)
+        manager.rename_rows(rows, [f'r{i}_{row}.txt' for row in rows])
+    assert manager.history._entry_count == 25
+    undone = 0
+    while manager.undo_edit() is not None:
+        undone += 1
+    assert undone == 3
+    # 被丢弃的第一步无法撤销
+    assert new_names(manager)[:5] == [f'r0_{row}.txt' for row in range(5)]
+    assert new_names(manager)[5:] == [f'file_{row}.txt' for row in range(5, 10)]
+
+
+def test_consecutive_rules_share_the_record_list():
+    manager = make_manager()
+    manager.rename_rows(range(5), [f'a_{i}.txt' for i in range(5)])
+    manager.rename_rows(range(5), [f'b_{i}.txt' for i in range(5)])
+    first, second = manager.history._undo
+    assert second.records is first.records and second.shared
+    # 第一步修改前都是原名称，不保存名称列表
+    assert first.names is None
+    assert manager.history._entry_count == 5 + 5
\ No newline at end of file
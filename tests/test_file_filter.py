@@ -0,0 +1,86 @@
+import os
+import random
+import re
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from file_filter import FileFilter, FilterIndex, filter_rows
+from file_manager import FileRecord
+
+
+def make_files(count=500, seed=1):
+    rng = random.Random(seed)
+    stems = ['IMG', 'img', 'photo', '照片', 'report', 'a', 'aa', 'data_2024']
+    exts = ['.jpg', '.JPG', '.png', '.txt', '', '.tar.gz']
+    files = []
+    for i in range(count):
+        is_dir = rng.random() < 0.1
+        name = f'{rng.choice(stems)}_{rng.randrange(50)}' + ('' if is_dir else rng.choice(exts))
+        files.append(FileRecord('/data', name, is_dir, float(rng.randrange(1000))))
+    return files
+
+
+def expected_rows(files, file_filter):
+    """逐个文件检查全部条件的参考实现"""
+    rows = []
+    for row, file_info in enumerate(files):
+        if file_filter.name_match is not None and not file_filter.name_match(file_info.original_name):
+            continue
+        if file_filter.extensions and file_info.type.lower() not in file_filter.extensions:
+            continue
+        if file_filter.mtime_min is not None and file_info.mtime < file_filter.mtime_min:
+            continue
+        if file_filter.mtime_max is not None and file_info.mtime > file_filter.mtime_max:
+            continue
+        rows.append(row)
+    return rows
+
+
+FILTERS = [
+    {},
+    {'pattern': 'img'},
+    {'pattern': 'IMG', 'case_sensitive': True},
+    {'pattern': 'a'},
+    {'pattern': '照片_1'},
+    {'pattern': '*.jpg', 'mode': 'glob'},
+    {'pattern': '*.JPG', 'mode': 'glob', 'case_sensitive': True},
+    {'pattern': r'_\d$', 'mode': 'regex'},
+    {'extensions': ['jpg']},
+    {'extensions': ['.PNG', 'txt', '文件夹', '文件']},
+    {'extensions': ['gz']},
+    {'mtime_min': 100.0, 'mtime_max': 300.0},
+    {'mtime_max': 10.0},
+    {'mtime_min': 999.0},
+    {'pattern': 'photo', 'extensions': ['jpg'], 'mtime_min': 500.0},
+    {'pattern': 'a', 'extensions': ['txt'], 'mtime_min': 10.0, 'mtime_max': 20.0},
+    {'pattern': 'report', 'mode': 'glob', 'extensions': ['文件夹']},
+]
+
+
+@pytest.mark.parametrize('options', FILTERS)
+def test_indexed_filter_matches_reference(options):
+    files = make_files()
+    file_filter = FileFilter(**options)
+    index = FilterIndex(files)
+    expected = expected_rows(files, file_filter)
+    assert filter_rows(files, file_filter, index) == expected
+    # 索引在多次过滤之间复用
+    assert filter_rows(files, file_filter, index) == expected
+
+
+def test_substring_rows_reports_each_name_once():
+    files = [FileRecord('/data', name, False, 0.0) for name in ['aaa.txt', 'b.txt', 'xa', 'A.a']]
+    index = FilterIndex(files)
+    assert index.substring_rows('a') == [0, 2, 3]
+    assert index.substring_rows('a', case_sensitive=True) == [0, 2, 3]
+    assert index.substring_rows('A', case_sensitive=True) == [3]
+    # 匹配不会跨越两个文件名
+    assert index.substring_rows('txtb') == []
+
+
+def test_invalid_regex_raises_when_filter_is_created():
+    with pytest.raises(re.error):
+        FileFilter('(', mode='regex')
\ No newline at end of file
@@ -0,0 +1,71 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import file_manager
+from file_manager import FileManager
+
+
+@pytest.fixture
+def tree(tmp_path):
+    for name in ['a.txt', 'gone.txt', 'b.txt']:
+        (tmp_path / name).write_text(name)
+    (tmp_path / 'sub').mkdir()
+    for name in ['c.txt', 'gone.txt', 'd.txt']:
+        (tmp_path / 'sub' / name).write_text(name)
+    return tmp_path
+
+
+def vanish(monkeypatch, name):
+    """模拟读取目录之后、读取文件信息之前被删除的文件"""
+    get_file_info = FileManager._get_file_info
+    def failing(self, entry, directory_path, relative_dir=''):
+        if entry.name == name:
+            raise FileNotFoundError(2, 'No such file or directory', entry.path)
+        return get_file_info(self, entry, directory_path, relative_dir)
+    monkeypatch.setattr(FileManager, '_get_file_info', failing)
+
+
+def loaded_paths(manager):
+    return sorted(os.path.join(file_info.relative_dir, file_info.original_name) for file_info in manager.files)
+
+
+def test_entry_error_skips_only_that_entry(tree, monkeypatch):
+    vanish(monkeypatch, 'gone.txt')
+    manager = FileManager()
+    assert manager.load_directory(str(tree), recursive=True, batch_size=1)
+    assert loaded_paths(manager) == ['a.txt', 'b.txt', os.path.join('sub', 'c.txt'), os.path.join('sub', 'd.txt')]
+
+
+def test_unreadable_root_still_fails(tmp_path):
+    manager = FileManager()
+    assert not manager.load_directory(str(tmp_path / 'missing'))
+
+def test_should_stop_is_checked_without_a_full_batch(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_manager, 'STOP_CHECK_INTERVAL', 10)
+    for i in range(25):
+        (tmp_path / f'{i}.dat').write_text('')
+    calls = []
+    def should_stop():
+        calls.append(len(calls))
+        return len(calls) > 2
+    # 没有匹配项时从不凑满一批，仍按读取的项数检查是否停止
+    batches = FileManager().iter_directory(str(tmp_path), include=['*.none'], should_stop=should_stop)
+    assert list(batches) == []
+    assert len(calls) == 3
+
+
+def test_should_stop_is_checked_before_each_directory(tmp_path):
+    for name in ['a', 'b', 'c']:
+        (tmp_path / name).mkdir()
+        (tmp_path / name / 'file.txt').write_text('')
+    calls = []
+    def should_stop():
+        calls.append(None)
+        return len(calls) > 2
+    batches = FileManager().iter_directory(str(tmp_path), recursive=True, should_stop=should_stop)
+    assert list(batches) == []
+    assert len(calls) == 3
\ No newline at end of file
@@ -0,0 +1,33 @@
+import errno
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import file_watcher
+from file_watcher import PollingWatcher, create_watcher
+
+pytestmark = pytest.mark.skipif(sys.platform != 'linux', reason='只有 Linux 使用 inotify')
+
+
+def fail_watch(self, *args, **kwargs):
+    raise OSError(errno.ENOSPC, '监视数量达到上限')
+
+
+def test_inotify_fallback_is_reported_through_callback(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_watcher.InotifyWatcher, 'watch', fail_watch)
+    messages = []
+    watcher = create_watcher(str(tmp_path), on_fallback=messages.append)
+    assert isinstance(watcher, PollingWatcher)
+    assert len(messages) == 1 and '改为定期检查目录' in messages[0]
+    watcher.close()
+
+
+def test_inotify_fallback_warns_without_callback(tmp_path, monkeypatch):
+    monkeypatch.setattr(file_watcher.InotifyWatcher, 'watch', fail_watch)
+    with pytest.warns(RuntimeWarning, match='改为定期检查目录'):
+        watcher = create_watcher(str(tmp_path))
+    assert isinstance(watcher, PollingWatcher)
+    watcher.close()
\ No newline at end of file
@@ -0,0 +1,94 @@
+"""主窗口的端到端测试：在 Qt 工作线程中实际执行重命名；需要 PyQt6，使用 offscreen 平台，不显示窗口"""
+import os
+import sys
+import time
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+os.environ.setdefault('QT_QPA_PLATFORM', 'offscreen')
+
+QtWidgets = pytest.importorskip('PyQt6.QtWidgets')
+
+
+@pytest.fixture
+def window(tmp_path, monkeypatch):
+    # settings.ini、重命名日志和目录缓存都写在当前目录
+    monkeypatch.chdir(tmp_path)
+    import main
+    monkeypatch.setattr(main.QMessageBox, 'question', lambda *args, **kwargs: main.QMessageBox.StandardButton.Yes)
+    monkeypatch.setattr(main.QMessageBox, 'information', lambda *args, **kwargs: None)
+    app = QtWidgets.QApplication.instance() or QtWidgets.QApplication([])
+    window = main.MainWindow()
+    window.settings['watch_directory'] = False
+    window.settings['directory_cache'] = False
+    yield window
+    window.close()
+    app.processEvents()
+
+
+def wait_until(condition, timeout=10):
+    app = QtWidgets.QApplication.instance()
+    deadline = time.monotonic() + timeout
+    while not condition():
+        assert time.monotonic() < deadline, '等待超时'
+        app.processEvents()
+        time.sleep(0.01)
+
+
+def load(window, directory):
+    window.start_loading(str(directory), False, ('name', False, True))
+    wait_until(lambda: window._loader is None)
+
+
+def test_apply_changes_renames_in_worker_thread(window, tmp_path):
+    directory = tmp_path / 'files'
+    directory.mkdir()
+    for name in ['a.txt', 'b.txt']:
+        (directory / name).write_text(name)
+    load(window, directory)
+    assert [file_info.original_name for file_info in window.file_manager.files] == ['a.txt', 'b.txt']
+    
+    window.file_manager.rename_file(0, 'c.txt')
+    window.apply_changes()
+    wait_until(lambda: window._rename_thread is None)
+    
+    assert sorted(os.listdir(directory)) == ['b.txt', 'c.txt']
+    assert window.file_manager.files[0].original_name == 'c.txt'
+    assert window._rename_worker is None
+    assert window.apply_btn.isEnabled()
+    assert window.load_label.isHidden()
+    
+    # 撤销上次更改走同一条路径，完成后重新加载目录
+    window.undo_last_changes()
+    wait_until(lambda: window._rename_thread is None and window._loader is None)
+    assert sorted(os.listdir(directory)) == ['a.txt', 'b.txt']
+    assert sorted(file_info.original_name for file_info in window.file_manager.files) == ['a.txt', 'b.txt']
+
+
+def test_filter_inputs_keep_debounce_interval(window):
+    window.filter_mode_combo.setCurrentIndex(2)
+    window.mtime_check.setChecked(True)
+    window.filter_edit.setText('a')
+    assert window.filter_timer.interval() == 250
+    assert window.filter_timer.isActive()
+
+
+def test_filter_typed_during_rename_is_applied_afterwards(window, tmp_path, monkeypatch):
+    directory = tmp_path / 'files'
+    directory.mkdir()
+    for name in ['a.txt', 'b.txt']:
+        (directory / name).write_text(name)
+    load(window, directory)
+    widths = []
+    monkeypatch.setattr(window, 'update_column_widths', lambda: widths.append(None))
+    
+    # 模拟正在执行的重命名：过滤推迟到完成后
+    window._rename_thread = object()
+    window.filter_edit.setText('a')
+    window.apply_filter()
+    assert window.file_manager.filtered_rows is None
+    window.handle_rename_finished(0, [])
+    assert [window.file_manager.files[row].original_name for row in window.file_manager.filtered_rows] == ['a.txt']
+    # 过滤不重新计算列宽
+    assert widths == []
\ No newline at end of file
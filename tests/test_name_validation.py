@@ -0,0 +1,44 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from name_validation import check_name
+from rename_rules import RenameRuleProcessor
+
+
+@pytest.mark.parametrize('name', ['a:b.txt', 'what?.txt', 'a|b', 'tab\t.txt', 'a/b'])
+def test_windows_rejects_invalid_characters(name):
+    assert check_name(name, windows=True) == f'包含非法字符: {name}'
+
+
+@pytest.mark.parametrize('name', ['a:b.txt', 'what?.txt', 'a|b', 'tab\t.txt'])
+def test_posix_accepts_characters_valid_there(name):
+    assert check_name(name, windows=False) is None
+
+
+@pytest.mark.parametrize('windows', [True, False])
+def test_slash_and_nul_rejected_everywhere(windows):
+    assert check_name('a/b', windows) is not None
+    assert check_name('a\0b', windows) is not None
+
+
+def test_windows_only_rules():
+    assert check_name('CON.txt', windows=True) == '系统保留名称: CON.txt'
+    assert check_name('name.', windows=True) == '名称不能以点或空格结尾: name.'
+    assert check_name('CON.txt', windows=False) is None
+    assert check_name('name.', windows=False) is None
+
+
+def test_name_length_limit_per_platform():
+    # 85 个中文字符在 UTF-8 中为 255 字节，UTF-16 中为 85 个单元
+    assert check_name('文' * 85, windows=False) is None
+    assert check_name('文' * 86, windows=False).startswith('名称过长（258')
+    assert check_name('文' * 86, windows=True) is None
+
+
+def test_sanitize_is_portable():
+    # 与当前系统无关，总是替换 Windows 不允许的字符
+    assert RenameRuleProcessor().sanitize_filename('a:b?c|d.txt') == 'a_b_c_d.txt'
\ No newline at end of file
@@ -0,0 +1,111 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+from file_manager import FileRecord
+from rename_executor import execute_plan
+from rename_journal import RenameJournal, resume_batch, undo_batch
+from rename_planner import plan_renames
+
+
+def make_plan(directory, renames):
+    files = []
+    for name, new_name in renames.items():
+        (directory / name).write_text(name)
+        file_info = FileRecord(str(directory), name, False, 0.0)
+        file_info.new_name = new_name
+        files.append(file_info)
+    return plan_renames(files)
+
+
+def crash_after(plan, journal, steps):
+    """写入计划后只执行前 steps 步就“崩溃”：不记录组的进度，也不提交批次"""
+    groups = [[step[:2] for step in group] for group in plan.groups]
+    journal.begin_batch(groups)
+    for src, dst in [step for group in groups for step in group][:steps]:
+        os.rename(src, dst)
+    journal.close()
+
+
+def contents(directory):
+    return {name: (directory / name).read_text() for name in sorted(os.listdir(directory))}
+
+
+def test_resume_chain_after_crash(tmp_path):
+    directory = tmp_path / 'files'
+    directory.mkdir()
+    plan = make_plan(directory, {'a.txt': 'b.txt', 'b.txt': 'c.txt'})
+    journal_path = str(tmp_path / 'journal.jsonl')
+    crash_after(plan, RenameJournal(journal_path), 1)
+    
+    journal = RenameJournal(journal_path)
+    [batch] = journal.incomplete_batches()
+    # 日志中没有进度记录，由磁盘状态推断已执行的步骤
+    assert batch.executed_count(0) == 1
+    assert resume_batch(batch, journal) == (1, [])
+    journal.close()
+    assert contents(directory) == {'b.txt': 'a.txt', 'c.txt': 'b.txt'}
+    assert RenameJournal(journal_path).incomplete_batches() == []
+
+
+def test_undo_cycle_interrupted_at_temp_name(tmp_path):
+    directory = tmp_path / 'files'
+    directory.mkdir()
+    plan = make_plan(directory, {'a.txt': 'b.txt', 'b.txt': 'a.txt'})
+    journal_path = str(tmp_path / 'journal.jsonl')
+    # 第一步把 a.txt 移到临时名称后崩溃
+    crash_after(plan, RenameJournal(journal_path), 1)
+    assert 'a.txt' not in os.listdir(directory)
+    
+    journal = RenameJournal(journal_path)
+    [batch] = journal.incomplete_batches()
+    assert batch.executed_count(0) == 1
+    assert undo_batch(batch, journal) == (1, [])
+    journal.close()
+    assert contents(directory) == {'a.txt': 'a.txt', 'b.txt': 'b.txt'}
+    assert RenameJournal(journal_path).incomplete_batches() == []
+
+
+def test_completed_cycle_detected_by_file_identity(tmp_path):
+    directory = tmp_path / 'files'
+    directory.mkdir()
+    plan = make_plan(directory, {'a.txt': 'b.txt', 'b.txt': 'a.txt'})
+    journal_path = str(tmp_path / 'journal.jsonl')
+    # 全部步骤已执行但未提交：最后一步从临时名称移出，只能通过文件标识判断
+    crash_after(plan, RenameJournal(journal_path), 3)
+    
+    journal = RenameJournal(journal_path)
+    [batch] = journal.incomplete_batches()
+    assert batch.executed_count(0) == 3
+    assert batch.remaining_groups() == []
+    journal.close()
+
+
+def test_partial_last_line_is_ignored(tmp_path):
+    directory = tmp_path / 'files'
+    directory.mkdir()
+    plan = make_plan(directory, {'a.txt': 'b.txt'})
+    journal_path = str(tmp_path / 'journal.jsonl')
+    crash_after(plan, RenameJournal(journal_path), 0)
+    with open(journal_path, 'a', encoding='utf-8') as f:
+        f.write('{"op":"group","batch":')
+    [batch] = RenameJournal(journal_path).incomplete_batches()
+    assert batch.executed_count(0) == 0
+
+
+def test_execute_plan_then_undo_last_batch(tmp_path):
+    directory = tmp_path / 'files'
+    directory.mkdir()
+    plan = make_plan(directory, {'a.txt': 'b.txt', 'b.txt': 'a.txt', 'c.txt': 'd.txt'})
+    journal = RenameJournal(str(tmp_path / 'journal.jsonl'))
+    assert execute_plan(plan, max_workers=2, journal=journal) == (3, [])
+    assert contents(directory) == {'a.txt': 'b.txt', 'b.txt': 'a.txt', 'd.txt': 'c.txt'}
+    
+    batch = journal.last_undoable_batch()
+    assert batch is not None and batch.committed
+    undo_batch(batch, journal)
+    assert contents(directory) == {'a.txt': 'a.txt', 'b.txt': 'b.txt', 'c.txt': 'c.txt'}
+    # 撤销之后不能再次撤销同一批次
+    assert journal.last_undoable_batch() is None
+    journal.close()
\ No newline at end of file
@@ -0,0 +1,129 @@
+import os
+import sys
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rename_planner
+from file_manager import FileRecord
+from rename_planner import execute_group, plan_renames
+
+
+def make_files(directory, names):
+    for name in names:
+        (directory / name).write_text(name)
+    return {name: FileRecord(str(directory), name, False, 0.0) for name in names}
+
+
+def test_case_only_clash_with_unloaded_file_is_rejected(tmp_path, monkeypatch):
+    # 模拟不区分大小写的目录：A.txt 未加载，b.txt 改名为 a.txt
+    monkeypatch.setattr(rename_planner, 'is_case_insensitive', lambda directory, names: True)
+    (tmp_path / 'A.txt').write_text('keep')
+    files = make_files(tmp_path, ['b.txt'])
+    files['b.txt'].new_name = 'a.txt'
+    plan = plan_renames(list(files.values()))
+    assert plan.errors == ['文件已存在: a.txt']
+    assert plan.groups == []
+
+
+def test_case_only_rename_uses_temp_name(tmp_path, monkeypatch):
+    monkeypatch.setattr(rename_planner, 'is_case_insensitive', lambda directory, names: True)
+    files = make_files(tmp_path, ['a.txt'])
+    files['a.txt'].new_name = 'A.txt'
+    plan = plan_renames(list(files.values()))
+    assert plan.errors == []
+    [group] = plan.groups
+    assert group[0][2] is None and group[-1][1] == os.path.join(str(tmp_path), 'A.txt')
+    assert execute_group(group)[:2] == (1, None)
+    assert os.listdir(tmp_path) == ['A.txt']
+
+
+def test_execute_group_does_not_overwrite_file_created_after_planning(tmp_path):
+    files = make_files(tmp_path, ['a.txt'])
+    files['a.txt'].new_name = 'b.txt'
+    plan = plan_renames(list(files.values()))
+    (tmp_path / 'b.txt').write_text('new')
+    done, error, executed = execute_group(plan.groups[0])
+    assert (done, executed) == (0, 0)
+    assert error == '文件已存在: b.txt'
+    assert (tmp_path / 'b.txt').read_text() == 'new'
+    assert (tmp_path / 'a.txt').exists()
+
+
+def test_swap_still_planned_as_cycle(tmp_path):
+    files = make_files(tmp_path, ['a.txt', 'b.txt'])
+    files['a.txt'].new_name = 'b.txt'
+    files['b.txt'].new_name = 'a.txt'
+    plan = plan_renames(list(files.values()))
+    assert plan.errors == []
+    assert execute_group(plan.groups[0])[:2] == (2, None)
+    assert (tmp_path / 'a.txt').read_text() == 'b.txt'
+
+def apply_plan(plan):
+    return [execute_group(group)[:2] for group in plan.groups]
+
+
+def test_chain_renames_end_of_chain_first(tmp_path):
+    # a->b、b->c：b 必须先腾出名称
+    files = make_files(tmp_path, ['a.txt', 'b.txt'])
+    files['a.txt'].new_name = 'b.txt'
+    files['b.txt'].new_name = 'c.txt'
+    plan = plan_renames(list(files.values()))
+    assert plan.errors == []
+    [group] = plan.groups
+    assert [os.path.basename(dst) for _, dst, _ in group] == ['c.txt', 'b.txt']
+    assert apply_plan(plan) == [(2, None)]
+    assert (tmp_path / 'b.txt').read_text() == 'a.txt'
+    assert (tmp_path / 'c.txt').read_text() == 'b.txt'
+
+
+def test_three_file_cycle_uses_one_temp_name(tmp_path):
+    files = make_files(tmp_path, ['a.txt', 'b.txt', 'c.txt'])
+    files['a.txt'].new_name = 'b.txt'
+    files['b.txt'].new_name = 'c.txt'
+    files['c.txt'].new_name = 'a.txt'
+    plan = plan_renames(list(files.values()))
+    [group] = plan.groups
+    assert len(group) == 4 and group[0][2] is None
+    assert plan.file_count == 3
+    assert apply_plan(plan) == [(3, None)]
+    assert sorted(os.listdir(tmp_path)) == ['a.txt', 'b.txt', 'c.txt']
+    assert [(tmp_path / name).read_text() for name in ['a.txt', 'b.txt', 'c.txt']] == ['c.txt', 'a.txt', 'b.txt']
+    assert all(file_info.original_name == file_info.new_name for file_info in files.values())
+
+
+def test_duplicate_targets_and_dependants_are_rejected(tmp_path):
+    # a、b 都改为 x.txt；c 要改为 a.txt，而 a 保持原名，也无法执行
+    files = make_files(tmp_path, ['a.txt', 'b.txt', 'c.txt'])
+    files['a.txt'].new_name = 'x.txt'
+    files['b.txt'].new_name = 'x.txt'
+    files['c.txt'].new_name = 'a.txt'
+    plan = plan_renames(list(files.values()))
+    assert plan.groups == []
+    assert sorted(plan.errors) == ['文件已存在: a.txt', '目标名称重复: x.txt', '目标名称重复: x.txt']
+
+
+def test_target_taken_by_unloaded_file_is_rejected(tmp_path):
+    (tmp_path / 'b.txt').write_text('keep')
+    files = make_files(tmp_path, ['a.txt'])
+    files['a.txt'].new_name = 'b.txt'
+    plan = plan_renames(list(files.values()))
+    assert plan.errors == ['文件已存在: b.txt']
+    assert (tmp_path / 'b.txt').read_text() == 'keep'
+
+
+def test_failed_cycle_step_is_rolled_back(tmp_path):
+    files = make_files(tmp_path, ['a.txt', 'b.txt'])
+    files['a.txt'].new_name = 'b.txt'
+    files['b.txt'].new_name = 'a.txt'
+    [group] = plan_renames(list(files.values())).groups
+    calls = []
+    def rename(src, dst):
+        calls.append(dst)
+        if len(calls) == 2:
+            raise PermissionError(13, 'Permission denied')
+        os.rename(src, dst)
+    done, error, executed = execute_group(group, rename)
+    assert (done, executed) == (0, 0)
+    assert error.startswith('重命名失败')
+    assert sorted(os.listdir(tmp_path)) == ['a.txt', 'b.txt']
+    assert (tmp_path / 'a.txt').read_text() == 'a.txt'
\ No newline at end of file
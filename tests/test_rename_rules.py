@@ -0,0 +1,77 @@
+import os
+import sys
+
+import pytest
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import rule_pipeline
+from file_manager import FileRecord
+from rename_rules import RenameRuleProcessor
+from rule_pipeline import RulePipeline
+
+NAMES = ['IMG_7.jpg', 'img_12_take3.JPG', 'archive.tar.gz', '.hidden', 'no_ext', '..', 'a.b.c',
+         '文件_5.txt', 'IMG', 'photo.', '123.png']
+
+RULES = [
+    ('batch_replace', {'old_str': 'IMG', 'new_str': 'photo'}),
+    ('batch_replace', {'old_str': '.', 'new_str': '_', 'include_ext': False}),
+    ('insert_text', {'text': 'x_', 'position': 'start'}),
+    ('insert_text', {'text': '_x', 'position': 'end', 'include_ext': False}),
+    ('insert_text', {'text': '-', 'position': 'nth', 'n': 3, 'include_ext': False}),
+    ('insert_text', {'text': '-', 'position': 'nth_last', 'n': 20, 'include_ext': False}),
+    ('insert_text', {'text': '[', 'position': 'before', 'target': '_', 'include_ext': False}),
+    ('insert_text', {'text': ']', 'position': 'after', 'target': 'g', 'include_ext': True}),
+    ('pad_numbers', {'width': 4}),
+    ('pad_numbers', {'width': 3, 'include_ext': False}),
+    ('apply_template', {'template': '<name:upper>_<##:5>.<ext:lower>'}),
+    ('apply_template', {'template': '<parent>-<###>', 'include_ext': False}),
+    ('apply_regex', {'pattern': r'(\d+)', 'repl': r'<\1>'}),
+    ('apply_regex', {'pattern': r'^(\w)', 'repl': r'\1\1', 'include_ext': False}),
+]
+
+
+def make_files():
+    return [FileRecord('/data/photos', name, False, 1700000000.0) for name in NAMES]
+
+
+@pytest.mark.parametrize('rule', RULES, ids=lambda rule: rule[0])
+def test_column_rules_match_row_rules(rule):
+    files = make_files()
+    pipeline = RulePipeline([rule])
+    processor = RenameRuleProcessor()
+    expected = [pipeline.apply(processor, file_info, index) for index, file_info in enumerate(files)]
+    assert list(pipeline.iter_names(processor, files)) == expected
+
+
+def test_chained_rules_match_across_chunks(monkeypatch):
+    # 小批量时序号跨批连续，整列结果与逐个文件相同
+    monkeypatch.setattr(rule_pipeline, 'COLUMN_CHUNK_SIZE', 4)
+    files = make_files()
+    pipeline = RulePipeline([RULES[0], RULES[8], RULES[10], RULES[12]])
+    processor = RenameRuleProcessor()
+    expected = [pipeline.apply(processor, file_info, index) for index, file_info in enumerate(files)]
+    assert list(pipeline.iter_names(processor, files)) == expected
+
+@pytest.mark.parametrize('template', ['<uuidx>', '<uuid_foo>', '<uuid.bar>', '<nosuchvar>', '<name:title>'])
+def test_unknown_template_tags_pass_through(template):
+    files = make_files()[:2]
+    pipeline = RulePipeline([('apply_template', {'template': template, 'include_ext': False})])
+    processor = RenameRuleProcessor()
+    expected = [template + '.jpg', template + '.JPG']
+    assert [pipeline.apply(processor, file_info) for file_info in files] == expected
+    assert list(pipeline.iter_names(processor, files)) == expected
+
+
+def test_uuid_tag_options():
+    files = make_files()[:1]
+    processor = RenameRuleProcessor()
+    [name] = RulePipeline([('apply_template', {'template': '<uuid:8:upper>'})]).iter_names(processor, files)
+    assert len(name) == 8 and name == name.upper() and name != '<uuid:8:upper>'
+
+def test_pipeline_compares_by_rules_and_is_unhashable():
+    rules = [RULES[0], RULES[8]]
+    assert RulePipeline(rules) == RulePipeline.from_dict(RulePipeline(rules).to_dict())
+    assert RulePipeline(rules) != RulePipeline(rules[:1])
+    with pytest.raises(TypeError):
+        hash(RulePipeline(rules))
\ No newline at end of file